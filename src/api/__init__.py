@@ -1,6 +1,6 @@
 """
 
-"api"  package contains following 3 important classes to handle the logic for api end points to perform CRUD operations on databases to
+"api"  package contains following important classes to handle the logic for api end points to perform CRUD operations on databases to
 store the market data. It also contains the class to fetch the required market data from database and returns the calculated option prices.
 
 OptionDataFetcher: This class is responsible for fetching option data from a database using an instance of the DataPersistence class. It has two methods: fetch_records_asof and fetch_distinct_dates, which respectively fetch option data records for a given date and fetch all distinct dates available in the option data.
@@ -9,4 +9,6 @@ OptionDataUploader: This class is responsible for uploading option data to a dat
 
 OptionPricer: This class is responsible for calculating option prices for a given date using an instance of the DataPersistence class and the B76OptionPricer model. It has one method: calculate_market_prices, which calculates option prices for a given date and returns a JSONResponse with the calculated option prices.
 
+OptionGreeksCalculator: This class is responsible for calculating option prices and greeks (delta, gamma, vega, theta, rho, vanna and volga) for a given date in one batch using the B76GreeksCalculator model. It has one method: calculate_market_greeks.
+
 """
\ No newline at end of file
@@ -0,0 +1,187 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Dict, Iterable, List, Optional, Sequence
+from dbutil.dbschema import BrentOptionData, DiscountCurveData
+from dbutil.optiondata_dao import DataPersistence
+from api.option_price_store import OptionPriceStore
+from models.b76_model import RISK_FREE_RATE, SETTLEMENT_LAG_MONTHS, time_to_maturity
+from models.discount_curve import DiscountCurve
+from util.app_logger import logger_decorator
+from util.file_read_util import DataProcessingUtilities
+from util.result_cache import ResultCache
+from util.task_dispatcher import TaskDispatcher
+import numpy as np
+import pandas as pd
+
+class DiscountCurvePointPydantic(BaseModel):
+    """
+        Represents one pillar of a discount curve, given either as a discount factor or as a continuously
+        compounded zero rate.
+    """
+    DateAsOf: int
+    MaturityDate: int
+    DiscountFactor: Optional[float]
+    ZeroRate: Optional[float]
+
+class DiscountCurveList(BaseModel):
+    data: List[DiscountCurvePointPydantic]
+
+class DiscountCurveManager:
+    """
+    DiscountCurveManager class stores the discount curves per DateAsOf and provides them to the pricing models.
+    The curves are built once from the DiscountCurveData table and kept in a cache across requests. The dates
+    without a stored curve use a flat curve at the default rate.
+
+    Attributes:
+    -----------
+    persistence : DataPersistence
+        An instance of the DataPersistence class for storing and fetching the curves.
+    default_curve : DiscountCurve
+        Flat curve at default_rate, used for the dates without a stored curve.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date of the options.
+    curve_cache : ResultCache
+        Cache of the DiscountCurve objects keyed by DateAsOf.
+    caches : Sequence[ResultCache]
+        Caches of results keyed by DateAsOf, e.g. the priced option chains, invalidated when a curve is loaded.
+    dispatcher : TaskDispatcher
+        Runs the database calls outside of the event loop.
+    price_store : OptionPriceStore
+        Computes the option prices stored for the dates of a loaded curve again, with the new curve.
+
+    Methods:
+    --------
+    curve_generations(dates: Iterable[int]) -> List[int]
+        Returns the generation of the curve of every date, which changes when a curve is loaded for the date.
+    get_pricing_environment(dates: Iterable[int]) -> dict
+        Returns the discount_curves, default_curve and settlement_lag_months arguments of the B76 models for the dates.
+    get_discount_curves(dates: Iterable[int]) -> Dict[int, DiscountCurve]
+        Returns the curve of every date, from the cache when available.
+    load_discount_curves(curve_list: DiscountCurveList) -> dict
+        Stores the curve pillars of the given dates, replacing the stored curves of these dates,
+        and stores the option prices of these dates computed with the new curves.
+    fetch_discount_curve(date_as_of: int) -> JSONResponse
+        Returns the pillars of the stored curve of the date with their zero rates.
+    """
+
+    def __init__(self, persistence: DataPersistence, default_rate: float = RISK_FREE_RATE,
+                 settlement_lag_months: int = SETTLEMENT_LAG_MONTHS, curve_cache: Optional[ResultCache] = None,
+                 caches: Sequence[ResultCache] = (), dispatcher: Optional[TaskDispatcher] = None):
+        self.persistence = persistence
+        self.default_curve = DiscountCurve.flat(default_rate)
+        self.settlement_lag_months = settlement_lag_months
+        self.curve_cache = curve_cache if curve_cache is not None else ResultCache(max_entries=1024)
+        self.caches = caches
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.price_store = OptionPriceStore(persistence, self.dispatcher, self.get_pricing_environment,
+                                            self.curve_generations)
+
+    def curve_generations(self, dates: Iterable[int]) -> List[int]:
+        return [self.curve_cache.generation(int(date_as_of)) for date_as_of in dates]
+
+    async def get_pricing_environment(self, dates: Iterable[int]) -> dict:
+        return {"discount_curves": await self.get_discount_curves(dates),
+                "default_curve": self.default_curve,
+                "settlement_lag_months": self.settlement_lag_months}
+
+    async def get_discount_curves(self, dates: Iterable[int]) -> Dict[int, DiscountCurve]:
+        discount_curves = {}
+        missing_dates = []
+        generations = {}
+        for date_as_of in {int(date_as_of) for date_as_of in dates}:
+            generations[date_as_of] = self.curve_cache.generation(date_as_of)
+            discount_curve = self.curve_cache.get(date_as_of)
+            if discount_curve is None:
+                missing_dates.append(date_as_of)
+            else:
+                discount_curves[date_as_of] = discount_curve
+        if not missing_dates:
+            return discount_curves
+
+        # The curve table is small, the missing dates are read with a single range query.
+        query = (DiscountCurveData.DateAsOf.between(min(missing_dates), max(missing_dates)),)
+        curve_points = await self.dispatcher.run_io(self.persistence.fetch_records, DiscountCurveData, query)
+        stored_curves = self._build_curves(curve_points)
+        for date_as_of in missing_dates:
+            # The dates without a stored curve keep the default curve until a curve is loaded for them.
+            discount_curves[date_as_of] = stored_curves.get(date_as_of, self.default_curve)
+            # A curve loaded since the generation was read is not overwritten in the cache by the old one.
+            self.curve_cache.put(date_as_of, discount_curves[date_as_of], generations[date_as_of])
+        return discount_curves
+
+    @logger_decorator
+    async def load_discount_curves(self, curve_list: DiscountCurveList) -> dict:
+        curve_points = pd.DataFrame([curve_point.dict() for curve_point in curve_list.data],
+                                    columns=['DateAsOf', 'MaturityDate', 'DiscountFactor', 'ZeroRate'])
+        try:
+            curve_points = self._to_discount_factors(curve_points)
+            # Build the curves once to reject the invalid pillars before storing them.
+            loaded_dates = list(self._build_curves(curve_points))
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+
+        # A loaded curve replaces the whole stored curve of its date, in one transaction so the readers never see
+        # a date without its curve or with a mix of the old and new pillars.
+        upsert_report = await self.dispatcher.run_io(self.persistence.replace_records, DiscountCurveData,
+                                                     (DiscountCurveData.DateAsOf.in_(loaded_dates),), curve_points)
+        # The curve generations are bumped before the stored prices are reset, so a concurrent OptionPriceStore
+        # whose prices land after the reset sees the change and computes them again with the new curve.
+        self.curve_cache.invalidate(loaded_dates)
+        # The option prices stored with the previous curve are reset and computed again with the new curve,
+        # until they are stored the readers compute them when read.
+        await self.dispatcher.run_io(self.persistence.update_records, BrentOptionData,
+                                     (BrentOptionData.DateAsOf.in_(loaded_dates),), {'OptionPrice': None})
+        for cache in self.caches:
+            cache.invalidate(loaded_dates)
+        priced_rows = await self.price_store.store_option_prices(loaded_dates)
+        return {"success": "Discount curves uploaded to database.", "dates": loaded_dates, **upsert_report,
+                "priced": priced_rows}
+
+    @logger_decorator
+    async def fetch_discount_curve(self, date_as_of: int) -> JSONResponse:
+        query = (DiscountCurveData.DateAsOf == date_as_of,)
+        curve_points = await self.dispatcher.run_io(self.persistence.fetch_records, DiscountCurveData, query)
+        if curve_points.empty:
+            raise HTTPException(status_code=404, detail=f"No discount curve for {date_as_of}, "
+                                                        f"the flat default rate {self.default_curve.zero_rates(1.0):.6g} is used.")
+        curve_points = curve_points.sort_values('MaturityDate')
+        curve = self._build_curves(curve_points)[date_as_of]
+        return JSONResponse(content={"DateAsOf": date_as_of,
+                                     "MaturityDate": curve_points['MaturityDate'].tolist(),
+                                     "DiscountFactor": curve_points['DiscountFactor'].tolist(),
+                                     "ZeroRate": curve.zero_rates(curve.times).tolist()})
+
+    @staticmethod
+    def _to_discount_factors(curve_points: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fills the missing discount factors from the zero rates and returns the DiscountCurveData columns.
+        """
+        if curve_points.empty:
+            raise ValueError("No discount curve pillars were given.")
+        T = time_to_maturity(curve_points['DateAsOf'], curve_points['MaturityDate'], settlement_lag_months=0)
+        zero_rate_factors = np.exp(-curve_points['ZeroRate'].to_numpy(dtype=np.float64) * T)
+        discount_factors = curve_points['DiscountFactor'].to_numpy(dtype=np.float64)
+        discount_factors = np.where(np.isnan(discount_factors), zero_rate_factors, discount_factors)
+        if np.isnan(discount_factors).any():
+            raise ValueError("Every discount curve pillar needs a DiscountFactor or a ZeroRate.")
+        return pd.DataFrame({'DateAsOf': curve_points['DateAsOf'].astype(np.int64),
+                             'MaturityDate': curve_points['MaturityDate'].astype(np.int64),
+                             'DiscountFactor': discount_factors})
+
+    @staticmethod
+    def _build_curves(curve_points: pd.DataFrame) -> Dict[int, DiscountCurve]:
+        """
+        Builds the DiscountCurve of every date of the curve pillars. Raises a ValueError on invalid pillars.
+        """
+        if curve_points.empty:
+            return {}
+        curve_points = curve_points.sort_values(['DateAsOf', 'MaturityDate'])
+        T = time_to_maturity(curve_points['DateAsOf'], curve_points['MaturityDate'], settlement_lag_months=0)
+        discount_curves = {}
+        for date_as_of, rows in curve_points.assign(T=T).groupby('DateAsOf'):
+            try:
+                discount_curves[int(date_as_of)] = DiscountCurve(rows['T'], rows['DiscountFactor'])
+            except ValueError as err_msg:
+                raise ValueError(f"Invalid discount curve for {date_as_of}: {err_msg}")
+        return discount_curves
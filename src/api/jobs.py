@@ -0,0 +1,138 @@
+import functools
+import json
+import os
+import shutil
+import tempfile
+from fastapi import File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+from api.option_pricer import OptionPricer
+from api.optionadata_uploader import OptionDataUploader
+from models.model_registry import DEFAULT_MODEL, validate_model
+from util.app_logger import logger_decorator
+from util.file_read_util import DataProcessingUtilities
+from typing import AsyncIterator, BinaryIO
+from util.job_queue import DONE, JobQueue, ProgressCallback
+
+# Extensions of the market data files read by the upload jobs.
+MARKET_DATA_FILE_EXTENSIONS = ('.csv', '.xlsx')
+# Size of the blocks copied from the uploaded file to the spool file and read back by the upload job.
+FILE_BLOCK_BYTES = 1024 * 1024
+
+class JobManager:
+    """
+    JobManager class submits the market data uploads and the option pricings as background jobs of the JobQueue,
+    their requests return the JobId at once with a 202 status, and serves the status and result of the jobs.
+
+    Attributes:
+    -----------
+    job_queue : JobQueue
+        Runs the jobs and stores their state.
+    uploader : OptionDataUploader
+        Stores the uploaded market data, in chunks with the number of stored rows reported as progress.
+    calculator : OptionPricer
+        Prices the option chains, with the same result cache as the pricing endpoints.
+
+    Methods:
+    --------
+    submit_market_data_file(file: UploadFile) -> JSONResponse
+        Submits the upload of a CSV or Excel file sent in the request. The file is spooled to a temporary file
+        deleted by the job, a CSV file is read back and stored in chunks so the job never holds the whole file.
+    submit_market_data_json_columnar(request: Request) -> JSONResponse
+        Submits the upload of a columnar JSON body, {"DateAsOf": [...], "StrikePrice": [...], ...}.
+    submit_option_pricing(date_as_of: int, model: str) -> JSONResponse
+        Submits the pricing of the option chain of the date, the result is the records of the priced chain.
+    fetch_job_status(job_id: str) -> JSONResponse
+        Returns the status of the job with the rows processed so far and the total rows, once known.
+    fetch_job_result(job_id: str) -> Response
+        Returns the JSON document of the result of a done job, 409 while the job is not done.
+    """
+
+    def __init__(self, job_queue: JobQueue, uploader: OptionDataUploader, calculator: OptionPricer):
+        self.job_queue = job_queue
+        self.uploader = uploader
+        self.calculator = calculator
+
+    @logger_decorator
+    async def submit_market_data_file(self, file: UploadFile = File(...)) -> JSONResponse:
+        if os.path.splitext(file.filename)[1].lower() not in MARKET_DATA_FILE_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="Invalid file format. Please upload a CSV or Excel file.")
+        spool_path = await self.uploader.dispatcher.run_io(self._spool_file, file.file,
+                                                           os.path.splitext(file.filename)[1].lower())
+        try:
+            return await self._submit("loadmarketdatafile", functools.partial(self._load_market_data_file, spool_path))
+        except Exception:
+            os.remove(spool_path)
+            raise
+
+    @logger_decorator
+    async def submit_market_data_json_columnar(self, request: Request) -> JSONResponse:
+        job = functools.partial(self._load_market_data_json_columnar, await request.body())
+        return await self._submit("loadmarketdatajsoncolumnar", job)
+
+    @logger_decorator
+    async def submit_option_pricing(self, date_as_of: int, model: str = DEFAULT_MODEL) -> JSONResponse:
+        # The invalid models are rejected by the request rather than by a failed job.
+        try:
+            validate_model(model)
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        job = functools.partial(self._price_option_chain, date_as_of, model)
+        return await self._submit("calculateoptionprices", job)
+
+    async def fetch_job_status(self, job_id: str) -> JSONResponse:
+        job_state = await self.job_queue.fetch_job(job_id)
+        if job_state is None:
+            raise HTTPException(status_code=404, detail=f"No job {job_id}.")
+        return JSONResponse(content=job_state)
+
+    async def fetch_job_result(self, job_id: str) -> Response:
+        job_state = await self.job_queue.fetch_job(job_id)
+        if job_state is None:
+            raise HTTPException(status_code=404, detail=f"No job {job_id}.")
+        if job_state['Status'] != DONE:
+            raise HTTPException(status_code=409, detail=f"The job {job_id} is {job_state['Status']}.")
+        # The result is stored as a JSON document and returned as it is, without being decoded.
+        return Response(content=await self.job_queue.fetch_job_result(job_id), media_type="application/json")
+
+    async def _submit(self, job_type: str, job) -> JSONResponse:
+        job_id = await self.job_queue.submit(job_type, job)
+        return JSONResponse(status_code=202, content={"JobId": job_id, "Status": "queued"})
+
+    @staticmethod
+    def _spool_file(file: BinaryIO, extension: str) -> str:
+        # The extension is kept, the job reads the spool file in the format of the uploaded file.
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as spool_file:
+            shutil.copyfileobj(file, spool_file, FILE_BLOCK_BYTES)
+        return spool_file.name
+
+    async def _read_file_blocks(self, path: str) -> AsyncIterator[bytes]:
+        with open(path, 'rb') as file:
+            while True:
+                block = await self.uploader.dispatcher.run_io(file.read, FILE_BLOCK_BYTES)
+                if not block:
+                    return
+                yield block
+
+    async def _load_market_data_file(self, spool_path: str, report_progress: ProgressCallback) -> str:
+        try:
+            if spool_path.endswith('.csv'):
+                upload_report = await self.uploader.store_market_data_stream(self._read_file_blocks(spool_path),
+                                                                             report_progress=report_progress)
+            else:
+                # An Excel workbook cannot be parsed in chunks, it is read at once.
+                market_data_df = await self.uploader.dispatcher.run_io(DataProcessingUtilities.read_file, spool_path)
+                upload_report = await self.uploader.store_market_data(market_data_df, report_progress)
+        finally:
+            os.remove(spool_path)
+        return json.dumps({"success": "Market data from the given file uploaded successfully.", **upload_report})
+
+    async def _load_market_data_json_columnar(self, json_body: bytes, report_progress: ProgressCallback) -> str:
+        market_data_df = await self.uploader.dispatcher.run_io(OptionDataUploader.columnar_json_to_dataframe, json_body)
+        upload_report = await self.uploader.store_market_data(market_data_df, report_progress)
+        return json.dumps({"success": "Columnar json market data uploaded to database.", **upload_report})
+
+    async def _price_option_chain(self, date_as_of: int, model: str, report_progress: ProgressCallback) -> str:
+        option_prices = await self.calculator.get_option_prices(date_as_of, model)
+        # The chain is priced in one vectorized pass, the progress goes from 0 to all the rows at once.
+        await report_progress(len(option_prices), len(option_prices))
+        return option_prices.to_json(orient="records")
@@ -0,0 +1,43 @@
+from dbutil.dbschema import BrentOptionData
+from dbutil.optiondata_dao import DataPersistence
+from fastapi.responses import JSONResponse
+from models.b76_greeks import B76GreeksCalculator
+from util.app_logger import logger_decorator
+from util.task_dispatcher import TaskDispatcher
+from typing import Optional
+from api.discount_curves import DiscountCurveManager
+
+class OptionGreeksCalculator:
+    """
+    OptionGreeksCalculator class is responsible for calculating the option prices and greeks for the given
+    date_as_of value using the B76GreeksCalculator model and returns a JSONResponse with the results.
+    Attributes:
+    -----------
+    persistence : DataPersistence
+    An instance of the DataPersistence class for fetching option data.
+    dispatcher : TaskDispatcher
+    Runs the database fetch on the thread pool and the greeks calculation on the process pool.
+    curve_manager : DiscountCurveManager
+    Provides the discount curve of the date. Without it the flat RISK_FREE_RATE is used.
+    Methods:
+    --------
+    calculate_market_greeks(date_as_of: int) -> JSONResponse:
+    Calculates option prices, delta, gamma, vega, theta, rho, vanna and volga for the whole chain of the
+    given date_as_of value in one batch and returns a JSONResponse with the results.
+    """
+    def __init__(self, persistence: DataPersistence, dispatcher: Optional[TaskDispatcher] = None,
+                 curve_manager: Optional[DiscountCurveManager] = None):
+        self.persistence = persistence
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.curve_manager = curve_manager
+
+    @logger_decorator
+    async def calculate_market_greeks(self, date_as_of: int) -> JSONResponse:
+        query = (BrentOptionData.DateAsOf == date_as_of,)
+        fetched_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        pricing_environment = {} if self.curve_manager is None else await self.curve_manager.get_pricing_environment([date_as_of])
+        greeks_calculator = B76GreeksCalculator(fetched_data, **pricing_environment)
+        option_greeks = await self.dispatcher.run_cpu(greeks_calculator.calculate_option_greeks)
+
+        json_str = option_greeks.to_json(orient="records")
+        return JSONResponse(content={"success": json_str})
@@ -0,0 +1,70 @@
+from dbutil.dbschema import BrentOptionData
+from dbutil.optiondata_dao import DataPersistence
+from models.model_registry import STORED_PRICE_MODEL, calculate_option_prices
+from util.task_dispatcher import TaskDispatcher
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+class OptionPriceStore:
+    """
+    OptionPriceStore class computes the OptionPrice stored in BrentOptionData for the rows without one, e.g. the
+    rows inserted or changed by an upload or the rows of a date whose discount curve was loaded.
+
+    Attributes:
+    -----------
+    persistence : DataPersistence
+        An instance of the DataPersistence class for fetching the unpriced rows and storing their prices.
+    dispatcher : TaskDispatcher
+        Runs the database calls on the thread pool and the pricing on the process pool.
+    get_pricing_environment : Callable[[Iterable[int]], Awaitable[dict]]
+        Returns the discount_curves, default_curve and settlement_lag_months arguments of the pricer for the dates.
+        Without it the flat RISK_FREE_RATE is used.
+    get_curve_generations : Callable[[Iterable[int]], List[int]]
+        Returns the generation of the discount curve of every date, which changes when a curve is loaded. The prices
+        stored while the curve of their date changed are reset and computed again with the new curve.
+
+    Methods:
+    --------
+    store_option_prices(dates: Iterable[int]) -> int
+        Prices the rows of the dates without a stored OptionPrice with the STORED_PRICE_MODEL and stores their
+        prices. Returns the number of stored prices.
+    """
+
+    def __init__(self, persistence: DataPersistence, dispatcher: Optional[TaskDispatcher] = None,
+                 get_pricing_environment: Optional[Callable[[Iterable[int]], Awaitable[dict]]] = None,
+                 get_curve_generations: Optional[Callable[[Iterable[int]], List[int]]] = None):
+        self.persistence = persistence
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.get_pricing_environment = get_pricing_environment
+        self.get_curve_generations = get_curve_generations
+
+    async def store_option_prices(self, dates: Iterable[int]) -> int:
+        dates = [int(date_as_of) for date_as_of in dates]
+        curve_generations = self._curve_generations(dates)
+        query = (BrentOptionData.DateAsOf.in_(dates), BrentOptionData.OptionPrice.is_(None))
+        unpriced_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        if unpriced_data.empty:
+            return 0
+        pricing_environment = {} if self.get_pricing_environment is None else await self.get_pricing_environment(dates)
+        option_prices = await self.dispatcher.run_cpu(calculate_option_prices, unpriced_data, STORED_PRICE_MODEL,
+                                                      **pricing_environment)
+        # The rows which cannot be priced, e.g. past their settlement date, are left without a price.
+        option_prices = option_prices[option_prices['OptionPrice'].notna()]
+        if option_prices.empty:
+            return 0
+        # Only the rows left unchanged and unpriced since they were read get their price. A concurrent upload
+        # reprices the changed rows, and a row priced in the meantime, e.g. with the curve of a concurrent curve
+        # load, keeps its price.
+        priced_rows = await self.dispatcher.run_io(self.persistence.update_matching_records, BrentOptionData,
+                                                   option_prices, ['OptionPrice'], only_null_values=True)
+        # A curve loaded meanwhile may have reset the prices before they were stored, the prices of its dates
+        # computed with the previous curve are reset again and computed with the new one.
+        repriced_dates = [date_as_of for date_as_of, before, after in zip(dates, curve_generations, self._curve_generations(dates))
+                          if before != after]
+        if not repriced_dates:
+            return priced_rows
+        await self.dispatcher.run_io(self.persistence.update_records, BrentOptionData,
+                                     (BrentOptionData.DateAsOf.in_(repriced_dates),), {'OptionPrice': None})
+        return priced_rows + await self.store_option_prices(repriced_dates)
+
+    def _curve_generations(self, dates: List[int]) -> List[int]:
+        return [0] * len(dates) if self.get_curve_generations is None else self.get_curve_generations(dates)
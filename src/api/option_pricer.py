@@ -1,32 +1,148 @@
-from dbutil.dbschema import BrentOptionData
+from dbutil.dbschema import BrentOptionData, OPTION_TYPES
 from dbutil.optiondata_dao import DataPersistence
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from models.b76_model import B76OptionPricer
-from typing import List
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from models.model_registry import DEFAULT_MODEL, NORMAL_FORWARD_THRESHOLD, STORED_PRICE_MODEL, calculate_missing_option_prices, \
+    calculate_option_prices, missing_option_prices, validate_model
+from typing import List, Optional
+from util.result_cache import ResultCache
+from util.task_dispatcher import TaskDispatcher
+from api.discount_curves import DiscountCurveManager
+from api.response_formatter import DataFrameResponseFormatter, RECORDS_LAYOUT
+import pandas as pd
 
 class OptionPricer:
     """
     OptionPricer class is responsible for calculating the option prices for the given date_as_of value
-    using the B76OptionPricer model and returns a JSONResponse with the calculated option prices.
+    using the Black-76 model, or another model of the model registry, and returns a JSONResponse with the calculated option prices.
+    The Black-76 prices stored at upload time are served as they are, only the rows without a stored price are computed.
     Attributes:
     -----------
     persistence : DataPersistence
     An instance of the DataPersistence class for fetching option data.
+    result_cache : ResultCache
+    Cache of the priced option chains keyed by DateAsOf, each entry holds the chains priced per model.
+    Uploads and deletes invalidate the dates they change.
+    dispatcher : TaskDispatcher
+    Runs the database fetch on the thread pool and the pricing on the process pool, outside of the event loop.
+    curve_manager : DiscountCurveManager
+    Provides the discount curves of the priced dates. Without it the options are priced with the flat RISK_FREE_RATE.
+    normal_forward_threshold : float
+    Future or strike price at or below which the auto model prices with Bachelier instead of Black-76.
     Methods:
     --------
-    calculate_market_prices(date_as_of: int) -> JSONResponse:
-    Calculates option prices for the given date_as_of value using B76OptionPricer model
-    and returns a JSONResponse with the calculated option prices.
+    calculate_market_prices(date_as_of: int, model: str, accept: str) -> Response:
+    Calculates option prices for the given date_as_of value using the given model (Black76, Bachelier, BAW or auto)
+    and returns a JSONResponse with the calculated option prices, or an Arrow IPC stream / Parquet body
+    when the Accept header asks for it.
+    calculate_market_prices_v2(date_as_of: int, layout: str, model: str, accept: str) -> Response:
+    Same prices as calculate_market_prices, streamed as a single JSON document in the records or columnar layout,
+    or as Arrow / Parquet depending on the Accept header.
+    calculate_market_prices_range(start_date: int, end_date: int, future_expiry_date: int, option_type: str, model: str, accept: str) -> Response:
+    Prices every option of the dates between start_date and end_date, optionally restricted to one expiry and
+    option type, with one query and one vectorized pricing pass. The prices are streamed as NDJSON with one line
+    per DateAsOf, or returned as Arrow / Parquet sorted by DateAsOf depending on the Accept header.
+    fetch_cache_stats() -> JSONResponse:
+    Returns the hit, miss and eviction counters of the result cache.
     """
-    def __init__(self, persistence: DataPersistence):
+    def __init__(self, persistence: DataPersistence, result_cache: Optional[ResultCache] = None,
+                 dispatcher: Optional[TaskDispatcher] = None, curve_manager: Optional[DiscountCurveManager] = None,
+                 normal_forward_threshold: float = NORMAL_FORWARD_THRESHOLD):
         self.persistence = persistence
-        
-    async def calculate_market_prices(self, date_as_of: int) -> JSONResponse:
-        query = (BrentOptionData.DateAsOf == date_as_of,)
-        fetched_data = self.persistence.fetch_records(BrentOptionData, query)
-        option_pricer = B76OptionPricer(fetched_data)
-        option_prices = option_pricer.calculate_option_prices()
-        
-        json_str = fetched_data.to_json(orient="records")
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.curve_manager = curve_manager
+        self.normal_forward_threshold = normal_forward_threshold
+
+    async def calculate_market_prices(self, date_as_of: int, model: str = DEFAULT_MODEL,
+                                      accept: Optional[str] = Header(None)) -> Response:
+        option_prices = await self.get_option_prices(date_as_of, model)
+        binary_response = DataFrameResponseFormatter.to_binary_response(option_prices, accept)
+        if binary_response is not None:
+            return binary_response
+        json_str = option_prices.to_json(orient="records")
         return JSONResponse(content={"success": json_str})
+
+    async def calculate_market_prices_v2(self, date_as_of: int, layout: str = RECORDS_LAYOUT, model: str = DEFAULT_MODEL,
+                                         accept: Optional[str] = Header(None)) -> Response:
+        DataFrameResponseFormatter.validate_layout(layout)
+        option_prices = await self.get_option_prices(date_as_of, model)
+        binary_response = DataFrameResponseFormatter.to_binary_response(option_prices, accept)
+        if binary_response is not None:
+            return binary_response
+        return DataFrameResponseFormatter.to_json_response(option_prices, layout)
+
+    async def calculate_market_prices_range(self, start_date: int, end_date: int, future_expiry_date: Optional[int] = None,
+                                            option_type: Optional[str] = None, model: str = DEFAULT_MODEL,
+                                            accept: Optional[str] = Header(None)) -> Response:
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="The start_date must not be after the end_date.")
+        if option_type is not None and option_type not in OPTION_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid option_type. Supported option types: " + ", ".join(OPTION_TYPES))
+        self._validate_model(model)
+
+        query = [BrentOptionData.DateAsOf.between(start_date, end_date)]
+        if future_expiry_date is not None:
+            query.append(BrentOptionData.FutureExpiryDate == future_expiry_date)
+        if option_type is not None:
+            query.append(BrentOptionData.OptionType == option_type)
+        fetched_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        option_prices = await self._price_option_chain(fetched_data, model)
+        # The rows read through the expiry index come ordered by expiry first, the stable sort groups them by date.
+        option_prices = option_prices.sort_values('DateAsOf', kind='mergesort', ignore_index=True)
+
+        binary_response = DataFrameResponseFormatter.to_binary_response(option_prices, accept)
+        if binary_response is not None:
+            return binary_response
+        return DataFrameResponseFormatter.to_grouped_ndjson_response(option_prices, 'DateAsOf')
+
+    async def fetch_cache_stats(self) -> JSONResponse:
+        return JSONResponse(content={"success": self.result_cache.stats()})
+
+    async def get_option_prices(self, date_as_of: int, model: str = DEFAULT_MODEL) -> pd.DataFrame:
+        """
+        Returns the option chain for the given date priced with the given model, from the result cache when available.
+        The returned DataFrame is shared with the cache and must not be modified.
+        """
+        self._validate_model(model)
+        # The cache is keyed by DateAsOf so the writers invalidate the chains of every model of a date at once.
+        # The generation is read first, a chain priced from data changed by a writer meanwhile is not cached.
+        generation = self.result_cache.generation(date_as_of)
+        priced_chains = self.result_cache.get(date_as_of) or {}
+        option_prices = priced_chains.get(model)
+        if option_prices is None:
+            query = (BrentOptionData.DateAsOf == date_as_of,)
+            fetched_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+            option_prices = await self._price_option_chain(fetched_data, model)
+            self.result_cache.put(date_as_of, {**priced_chains, model: option_prices}, generation)
+        return option_prices
+
+    async def _price_option_chain(self, fetched_data: pd.DataFrame, model: str) -> pd.DataFrame:
+        """
+        Returns the fetched option chain priced with the given model. The chains fully priced at upload time
+        are returned at read cost, without going through the process pool.
+        """
+        if model == STORED_PRICE_MODEL:
+            if not missing_option_prices(fetched_data).any():
+                return fetched_data
+            pricing_environment = await self._get_pricing_environment(fetched_data['DateAsOf'].unique())
+            return await self.dispatcher.run_cpu(calculate_missing_option_prices, fetched_data, **pricing_environment)
+        pricing_environment = await self._get_pricing_environment(fetched_data['DateAsOf'].unique())
+        try:
+            return await self.dispatcher.run_cpu(calculate_option_prices, fetched_data, model,
+                                                 self.normal_forward_threshold, **pricing_environment)
+        except ValueError as err_msg:
+            # e.g. the options priced with Bachelier without a normal vol.
+            raise HTTPException(status_code=400, detail=str(err_msg))
+
+    @staticmethod
+    def _validate_model(model: str) -> None:
+        try:
+            validate_model(model)
+        except ValueError as err_msg:
+            raise HTTPException(status_code=400, detail=str(err_msg))
+
+    async def _get_pricing_environment(self, dates) -> dict:
+        if self.curve_manager is None:
+            return {}
+        return await self.curve_manager.get_pricing_environment(dates)
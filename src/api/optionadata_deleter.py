@@ -1,8 +1,10 @@
-from typing import Any
+from typing import Any, Optional, Sequence
 from fastapi.responses import JSONResponse
 from dbutil.optiondata_dao import DataPersistence
 from dbutil.dbschema import BrentOptionData
 from util.app_logger import logger_decorator
+from util.result_cache import ResultCache
+from util.task_dispatcher import TaskDispatcher
 import pandas as pd
 
 class OptionDataDeleter:
@@ -14,6 +16,10 @@ class OptionDataDeleter:
     -----------
     persistence : DataPersistence
         An instance of the DataPersistence class for fetching option data.
+    caches : Sequence[ResultCache]
+        Caches keyed by DateAsOf, the deleted date is invalidated in each of them.
+    dispatcher : TaskDispatcher
+        Runs the database delete on the thread pool, outside of the event loop.
 
     Methods:
     --------
@@ -22,11 +28,16 @@ class OptionDataDeleter:
 
     """
 
-    def __init__(self, persistence: DataPersistence):
+    def __init__(self, persistence: DataPersistence, caches: Sequence[ResultCache] = (),
+                 dispatcher: Optional[TaskDispatcher] = None):
         self.persistence = persistence
+        self.caches = caches
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
 
     @logger_decorator
     async def delete_records_asof(self, date_as_of: int) -> None:
         query = (BrentOptionData.DateAsOf == date_as_of,)
-        fetched_data = self.persistence.delete_records(BrentOptionData, query)
+        fetched_data = await self.dispatcher.run_io(self.persistence.delete_records, BrentOptionData, query)
+        for cache in self.caches:
+            cache.invalidate([date_as_of])
         return JSONResponse(content={"success": "Records Deleted"})
@@ -1,8 +1,11 @@
-from typing import Any
-from fastapi.responses import JSONResponse
+from typing import Any, Optional
+from fastapi import Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dbutil.optiondata_dao import DataPersistence
 from dbutil.dbschema import BrentOptionData
 from util.app_logger import logger_decorator
+from api.response_formatter import DataFrameResponseFormatter, RECORDS_LAYOUT
+from util.task_dispatcher import TaskDispatcher
 import pandas as pd
 
 class OptionDataFetcher:
@@ -14,32 +17,73 @@ class OptionDataFetcher:
     -----------
     persistence : DataPersistence
         An instance of the DataPersistence class for fetching option data.
+    dispatcher : TaskDispatcher
+        Runs the database reads on the thread pool, outside of the event loop.
 
     Methods:
     --------
-    fetch_records_asof(date_as_of: int) -> JSONResponse
+    fetch_records_asof(date_as_of: int, accept: str) -> Response
         Fetches option data records for the given date_as_of and returns a JSONResponse.
+        Returns an Arrow IPC stream or Parquet body instead when the Accept header asks for it.
 
-    fetch_distinct_dates() -> JSONResponse
-        Fetches all distinct dates available in the option data and returns a JSONResponse.
+    fetch_distinct_dates(start_date: int, end_date: int, limit: int, offset: int) -> JSONResponse
+        Fetches the distinct dates available in the option data with a SELECT DISTINCT and returns a JSONResponse.
+        The dates can be restricted to a range and paginated.
+
+    fetch_records_asof_v2(date_as_of: int, layout: str, accept: str) -> Response
+        Same records as fetch_records_asof, streamed as a single JSON document in the records or columnar layout,
+        or as Arrow / Parquet depending on the Accept header.
+
+    fetch_distinct_dates_v2(start_date: int, end_date: int, limit: int, offset: int) -> JSONResponse
+        Same dates as fetch_distinct_dates, returned as a plain JSON array.
     """
 
-    def __init__(self, persistence: DataPersistence):
+    def __init__(self, persistence: DataPersistence, dispatcher: Optional[TaskDispatcher] = None):
         self.persistence = persistence
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
 
     @logger_decorator
-    async def fetch_records_asof(self, date_as_of: int) -> JSONResponse:
+    async def fetch_records_asof(self, date_as_of: int, accept: Optional[str] = Header(None)) -> Response:
         query = (BrentOptionData.DateAsOf == date_as_of,)
-        fetched_data = self.persistence.fetch_records(BrentOptionData, query)
+        fetched_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        binary_response = DataFrameResponseFormatter.to_binary_response(fetched_data, accept)
+        if binary_response is not None:
+            return binary_response
         json_str = fetched_data.to_json(orient="records")
         return JSONResponse(content={"success": json_str})
 
     @logger_decorator
-    async def fetch_distinct_dates(self) -> JSONResponse:
-        query = (BrentOptionData.DateAsOf,)
-        fetched_data = self.persistence.fetch_records(BrentOptionData, query)
-        unique_dates = fetched_data["DateAsOf"].unique()
+    async def fetch_distinct_dates(self, start_date: Optional[int] = None, end_date: Optional[int] = None,
+                                   limit: Optional[int] = None, offset: int = 0) -> JSONResponse:
+        unique_dates = await self._fetch_distinct_dates(start_date, end_date, limit, offset)
 
         # Convert the unique_dates Series to a JSON string and return it.
         json_str = pd.Series(unique_dates).to_json(orient="values")
         return JSONResponse(content={"success": json_str})
+
+    @logger_decorator
+    async def fetch_records_asof_v2(self, date_as_of: int, layout: str = RECORDS_LAYOUT,
+                                    accept: Optional[str] = Header(None)) -> Response:
+        DataFrameResponseFormatter.validate_layout(layout)
+        query = (BrentOptionData.DateAsOf == date_as_of,)
+        fetched_data = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        binary_response = DataFrameResponseFormatter.to_binary_response(fetched_data, accept)
+        if binary_response is not None:
+            return binary_response
+        return DataFrameResponseFormatter.to_json_response(fetched_data, layout)
+
+    @logger_decorator
+    async def fetch_distinct_dates_v2(self, start_date: Optional[int] = None, end_date: Optional[int] = None,
+                                      limit: Optional[int] = None, offset: int = 0) -> JSONResponse:
+        unique_dates = await self._fetch_distinct_dates(start_date, end_date, limit, offset)
+        return JSONResponse(content=[int(date_as_of) for date_as_of in unique_dates])
+
+    async def _fetch_distinct_dates(self, start_date: Optional[int], end_date: Optional[int],
+                              limit: Optional[int], offset: int) -> list:
+        query = []
+        if start_date is not None:
+            query.append(BrentOptionData.DateAsOf >= start_date)
+        if end_date is not None:
+            query.append(BrentOptionData.DateAsOf <= end_date)
+        return await self.dispatcher.run_io(self.persistence.fetch_distinct_values, BrentOptionData, "DateAsOf", query,
+                                            limit=limit, offset=offset)
@@ -1,17 +1,31 @@
 from fastapi import UploadFile, HTTPException, File, Header, Request
 from pydantic import BaseModel
-from dbutil.dbschema import BrentOptionData
+from dbutil.dbschema import BrentOptionData, OPTION_TYPES
 from dbutil.optiondata_dao import DataPersistence, DataPersistenceORM
 import pandas as pd
 from util.file_read_util import DataProcessingUtilities
 import io
 import json
-from typing import Optional, List
-import gzip
-import os
+from typing import AsyncIterable, Awaitable, Callable, Optional, List, Sequence
+import numpy as np
 from util.app_logger import logger_decorator
+from models.b76_implied_vol import B76ImpliedVolSolver
+from models.b76_model import NORMAL_VOL_COLUMN
+from util.result_cache import ResultCache
+from util.csv_stream_reader import CsvChunkStreamReader
+from util.task_dispatcher import TaskDispatcher
+from api.discount_curves import DiscountCurveManager
+from api.option_price_store import OptionPriceStore
 
 REQUIRED_COLUMNS = {'DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice', 'CurrentPrice', 'ImpliedVol'}
+# Optional column with settlement prices, used to derive the ImpliedVol when it is not provided.
+SETTLEMENT_PRICE_COLUMN = 'SettlementPrice'
+# The optional NormalVol column holds the normal vols of the options priced with Bachelier which cannot be converted
+# from their ImpliedVol, e.g. with a future or strike price at or below zero.
+OPTIONAL_COLUMNS = {NORMAL_VOL_COLUMN}
+MARKET_DATA_DTYPES = {'DateAsOf': 'int64', 'FutureExpiryDate': 'int64', 'OptionType': 'object', 'StrikePrice': 'float64',
+                      'CurrentPrice': 'float64', 'ImpliedVol': 'float64', NORMAL_VOL_COLUMN: 'float64',
+                      SETTLEMENT_PRICE_COLUMN: 'float64'}
 
 class MarketDataPydantic(BaseModel):
     """
@@ -23,11 +37,14 @@ class MarketDataPydantic(BaseModel):
     StrikePrice: Optional[float]
     CurrentPrice: Optional[float]
     ImpliedVol: Optional[float]
+    NormalVol: Optional[float]
+    SettlementPrice: Optional[float]
 
 class MarketDataList(BaseModel):
     data: List[MarketDataPydantic]
 
-column_names = ['DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice', 'CurrentPrice', 'ImpliedVol']
+column_names = ['DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice', 'CurrentPrice', 'ImpliedVol', NORMAL_VOL_COLUMN,
+                SETTLEMENT_PRICE_COLUMN]
 
 class OptionDataUploader:
     """
@@ -38,59 +55,207 @@ class OptionDataUploader:
     -----------
     persistence : DataPersistence
         An instance of the DataPersistence class for uploading option data.
+    caches : Sequence[ResultCache]
+        Caches keyed by DateAsOf, the uploaded dates are invalidated in each of them.
+    stream_chunk_rows : int
+        Number of rows parsed and upserted at a time by the streaming upload.
+    dispatcher : TaskDispatcher
+        Runs the upserts on the thread pool and the implied vol derivation on the process pool.
+    curve_manager : DiscountCurveManager
+        Provides the discount curves used to derive the implied vols. Without it the flat RISK_FREE_RATE is used.
+    price_store : OptionPriceStore
+        Computes and stores the OptionPrice of the new and changed rows, with the discount curves of the curve_manager.
 
     Methods:
     --------
     load_market_data_json(market_data_list: MarketDataList) -> dict
         Uploads market data from a JSON formatted list to the database.
 
+    load_market_data_json_columnar(request: Request) -> dict
+        Uploads market data from a columnar JSON body, {"DateAsOf": [...], "StrikePrice": [...], ...}, to the database.
+        The columns are converted straight into typed NumPy arrays, without a Pydantic model per row.
+
     load_market_data_file(file: UploadFile) -> dict
         Uploads market data from a file to the database.
 
     load_market_data_iostream(request: Request, content_encoding: str) -> dict
-        Processes a market data file compressed in gzip format or provided as an iostream.
+        Streams a CSV request body, optionally gzip encoded, into the database in chunks of stream_chunk_rows rows.
+
+    store_market_data(market_data_df: pd.DataFrame, report_progress: Callable) -> dict
+        Stores the market data in chunks of stream_chunk_rows rows, reporting the rows stored after every chunk.
+        Used by the background upload jobs.
+
+    store_market_data_stream(csv_stream: AsyncIterable[bytes], gzip_compressed: bool, report_progress: Callable) -> dict
+        Parses and stores a stream of CSV bytes in chunks of stream_chunk_rows rows, reporting the rows stored after
+        every chunk. Used by the streaming upload and the background upload jobs of CSV files.
+
+    Uploads are upserted: rows whose (DateAsOf, FutureExpiryDate, OptionType, StrikePrice) already exist are updated,
+    and the responses report the inserted and updated counts.
+
+    Rows uploaded with a SettlementPrice and without an ImpliedVol get their ImpliedVol derived
+    with the B76ImpliedVolSolver before being stored.
+
+    The NormalVol column is optional, it is stored for the Bachelier pricing of the options quoted with a normal vol.
+
+    The OptionPrice of the new and changed rows is computed after each upsert and stored with them, the rows
+    left unchanged by an upload keep their stored price. The responses report the number of priced rows.
     """
 
-    def __init__(self, persistence: DataPersistence):
+    def __init__(self, persistence: DataPersistence, caches: Sequence[ResultCache] = (), stream_chunk_rows: int = 50000,
+                 dispatcher: Optional[TaskDispatcher] = None, curve_manager: Optional[DiscountCurveManager] = None):
         self.persistence = persistence
+        self.caches = caches
+        self.stream_chunk_rows = stream_chunk_rows
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.curve_manager = curve_manager
+        self.price_store = OptionPriceStore(persistence, self.dispatcher, self._get_pricing_environment,
+                                            None if curve_manager is None else curve_manager.curve_generations)
 
     @logger_decorator
     async def load_market_data_json(self, market_data_list: MarketDataList) -> dict:
-    # async def load_market_data_json(self, market_data_list) -> dict:
-        
-        os.system('cls' if os.name == 'nt' else 'clear')
-        item = market_data_list.data
-        
-        df = pd.DataFrame(item, columns=column_names)
-        for column in column_names:
-            df[column] = df[column].apply(lambda x: x[1])
-
-        print(df)
-        self.persistence.add_records(BrentOptionData, df)
-        return {"success": "Json market data uploaded to database."}
+        df = pd.DataFrame([market_data.dict() for market_data in market_data_list.data], columns=column_names)
+        try:
+            upsert_report = await self._store_market_data(df)
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        return {"success": "Json market data uploaded to database.", **upsert_report}
 
     @logger_decorator
-    async def load_market_data_file(self, file: UploadFile) -> dict:
+    async def load_market_data_json_columnar(self, request: Request) -> dict:
         try:
-            DataProcessingUtilities.validate_file_type(file.filename)
-            market_data_df = DataProcessingUtilities.read_file(file.filename)
-            DataProcessingUtilities.validate_header(market_data_df, REQUIRED_COLUMNS)
+            df = self.columnar_json_to_dataframe(await request.body())
+            upsert_report = await self._store_market_data(df)
         except ValueError as e:
-            DataProcessingUtilities.convert_value_error_to_http_error(ValueError)
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        return {"success": "Columnar json market data uploaded to database.", **upsert_report}
+
+    @staticmethod
+    def columnar_json_to_dataframe(json_body: bytes) -> pd.DataFrame:
+        """
+        Converts a columnar JSON body into a DataFrame with the MARKET_DATA_DTYPES column types.
+        Raises a ValueError when the body is not a JSON object of equally long lists, when a column is unknown,
+        when a value does not convert to the column type or when an OptionType is neither Call nor Put.
+        """
+        try:
+            market_data_columns = json.loads(json_body)
+        except json.JSONDecodeError as err_msg:
+            raise ValueError(f"Invalid JSON body: {err_msg}")
+        if not isinstance(market_data_columns, dict):
+            raise ValueError("The JSON body must be an object mapping each column name to a list of values.")
 
-        self.persistence.add_records(BrentOptionData, market_data_df)
-        return {"success": "Market data from the given file uploaded successfully."}
+        unknown_columns = set(market_data_columns) - set(MARKET_DATA_DTYPES)
+        if unknown_columns:
+            raise ValueError("Unknown columns: " + ", ".join(sorted(unknown_columns)))
+        column_arrays = {}
+        for column, values in market_data_columns.items():
+            if not isinstance(values, list):
+                raise ValueError(f"The values of the column {column} must be a list.")
+            try:
+                # The int64 cast truncates the fractional values, e.g. 20230331.7, they are rejected rather than truncated.
+                if MARKET_DATA_DTYPES[column] == 'int64' and not np.all(np.array(values, dtype=np.float64) % 1 == 0):
+                    raise ValueError(f"The column {column} contains values which are not integers.")
+                # None converts to NaN in the float columns, e.g. the ImpliedVol of rows priced from a SettlementPrice.
+                column_arrays[column] = np.array(values, dtype=MARKET_DATA_DTYPES[column])
+            except (TypeError, ValueError):
+                raise ValueError(f"The column {column} contains values which are not of type {MARKET_DATA_DTYPES[column]}.")
+            if column_arrays[column].ndim != 1:
+                raise ValueError(f"The values of the column {column} must not be nested lists.")
+        if len({len(array) for array in column_arrays.values()}) > 1:
+            raise ValueError("All the columns must have the same number of values.")
+        if 'OptionType' in column_arrays and not np.isin(column_arrays['OptionType'], OPTION_TYPES).all():
+            raise ValueError("The OptionType values must be one of: " + ", ".join(OPTION_TYPES))
+        return pd.DataFrame(column_arrays)
+
+    @logger_decorator
+    async def load_market_data_file(self, file: UploadFile) -> dict:
+        try:
+            market_data_df = await self.dispatcher.run_io(DataProcessingUtilities.read_file, file.filename)
+            upsert_report = await self._store_market_data(market_data_df)
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        return {"success": "Market data from the given file uploaded successfully.", **upsert_report}
 
     @logger_decorator
     async def load_market_data_iostream(self, request: Request, content_encoding: str = Header(None)) -> dict:
-        #Note: This funciton is a place holder api end point for retrieving stream data from another api end point or 
-        # from other streaming servers/services. Its not fully implemented and tested..
+        # The request body is read incrementally, decompressed on the fly when gzip encoded and upserted
+        # chunk by chunk, so the memory used stays flat whatever the size of the upload.
+        if content_encoding not in (None, "identity", "gzip"):
+            raise HTTPException(status_code=400, detail="Unsupported content encoding. Supported encodings: gzip, identity")
         try:
-            if content_encoding == "gzip":
-                compressed_data = io.BytesIO(content_encoding)
-                market_data = gzip.open(compressed_data, "rb")
-            else:
-                market_data = io.BytesIO(content_encoding).getvalue()
+            upload_report = await self.store_market_data_stream(request.stream(), gzip_compressed=content_encoding == "gzip")
         except ValueError as e:
-            DataProcessingUtilities.convert_value_error_to_http_error(ValueError)
-        return {"success": "gzip or iostream file is processed."}
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        return {"success": "gzip or iostream file is processed.", **upload_report}
+
+    async def store_market_data(self, market_data_df: pd.DataFrame,
+                                report_progress: Optional[Callable[[int, int], Awaitable[None]]] = None) -> dict:
+        upload_report = {"rows": 0, "inserted": 0, "updated": 0, "priced": 0}
+        for start in range(0, len(market_data_df), self.stream_chunk_rows):
+            await self._store_stream_chunk(market_data_df.iloc[start:start + self.stream_chunk_rows], upload_report)
+            if report_progress is not None:
+                await report_progress(upload_report["rows"], len(market_data_df))
+        return upload_report
+
+    async def store_market_data_stream(self, csv_stream: AsyncIterable[bytes], gzip_compressed: bool = False,
+                                       report_progress: Optional[Callable[[int, Optional[int]], Awaitable[None]]] = None) -> dict:
+        stream_reader = CsvChunkStreamReader(chunk_rows=self.stream_chunk_rows, gzip_compressed=gzip_compressed,
+                                             dtype=MARKET_DATA_DTYPES)
+        upload_report = {"rows": 0, "inserted": 0, "updated": 0, "priced": 0}
+        async for data in csv_stream:
+            for market_data_chunk in stream_reader.feed(data):
+                await self._store_stream_chunk(market_data_chunk, upload_report)
+                if report_progress is not None:
+                    await report_progress(upload_report["rows"], None)
+        for market_data_chunk in stream_reader.close():
+            await self._store_stream_chunk(market_data_chunk, upload_report)
+        if report_progress is not None:
+            # The total is only known once the whole stream is read.
+            await report_progress(upload_report["rows"], upload_report["rows"])
+        return upload_report
+
+    async def _store_market_data(self, market_data_df: pd.DataFrame) -> dict:
+        """
+        Derives the missing implied vols, validates the columns and upserts the market data, prices the new and
+        changed rows, then invalidates the cached results of the uploaded dates. Returns the upsert report.
+        """
+        if SETTLEMENT_PRICE_COLUMN in market_data_df.columns:
+            pricing_environment = await self._get_pricing_environment(market_data_df['DateAsOf'].unique())
+            market_data_df = await self.dispatcher.run_cpu(self._derive_missing_implied_vols, market_data_df, pricing_environment)
+        DataProcessingUtilities.validate_header(market_data_df.drop(columns=list(OPTIONAL_COLUMNS), errors='ignore'),
+                                                REQUIRED_COLUMNS)
+        # The stored prices are always computed here, an OptionPrice column of the upload is not stored.
+        market_data_df = market_data_df.drop(columns=['OptionPrice'], errors='ignore')
+        upsert_report = await self.dispatcher.run_io(self.persistence.upsert_records, BrentOptionData, market_data_df)
+        priced_rows = await self.price_store.store_option_prices(market_data_df['DateAsOf'].unique())
+        self._invalidate_cached_dates(market_data_df)
+        return {**upsert_report, "priced": priced_rows}
+
+    async def _get_pricing_environment(self, dates) -> dict:
+        if self.curve_manager is None:
+            return {}
+        return await self.curve_manager.get_pricing_environment(dates)
+
+    async def _store_stream_chunk(self, market_data_chunk: pd.DataFrame, upload_report: dict) -> None:
+        if market_data_chunk.empty:
+            return
+        upsert_report = await self._store_market_data(market_data_chunk)
+        upload_report["rows"] += len(market_data_chunk)
+        upload_report["inserted"] += upsert_report["inserted"]
+        upload_report["updated"] += upsert_report["updated"]
+        upload_report["priced"] += upsert_report["priced"]
+
+    @staticmethod
+    def _derive_missing_implied_vols(market_data_df: pd.DataFrame, pricing_environment: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Derives the missing implied vols from the settlement prices and drops the settlement price column,
+        which is not part of the BrentOptionData table.
+        """
+        if SETTLEMENT_PRICE_COLUMN not in market_data_df.columns:
+            return market_data_df
+        market_data_df = B76ImpliedVolSolver(market_data_df, **(pricing_environment or {})).calculate_implied_vols(SETTLEMENT_PRICE_COLUMN)
+        return market_data_df.drop(columns=[SETTLEMENT_PRICE_COLUMN])
+
+    def _invalidate_cached_dates(self, market_data_df: pd.DataFrame) -> None:
+        uploaded_dates = [int(date_as_of) for date_as_of in market_data_df['DateAsOf'].unique()]
+        for cache in self.caches:
+            cache.invalidate(uploaded_dates)
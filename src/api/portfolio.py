@@ -0,0 +1,101 @@
+from dbutil.dbschema import BrentOptionData, OPTION_TYPES, PositionData
+from dbutil.optiondata_dao import DataPersistence
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from api.discount_curves import DiscountCurveManager
+from models.portfolio import POSITION_KEY_COLUMNS, calculate_portfolio_exposures
+from util.app_logger import logger_decorator
+from util.file_read_util import DataProcessingUtilities
+from util.task_dispatcher import TaskDispatcher
+import pandas as pd
+
+# Number of unmatched positions listed in the exposure response, the count covers all of them.
+MAX_LISTED_UNMATCHED_POSITIONS = 100
+
+class PositionList(BaseModel):
+    """
+        Columnar positions of one portfolio, one element per option contract.
+    """
+    Portfolio: str
+    FutureExpiryDate: List[int]
+    OptionType: List[str]
+    StrikePrice: List[float]
+    Quantity: List[float]
+
+class PortfolioAggregator:
+    """
+    PortfolioAggregator class stores the positions of the portfolios and values them against the option chains
+    stored in BrentOptionData, with the mark to market, delta and vega exposures per future expiry and in total.
+    Attributes:
+    -----------
+    persistence : DataPersistence
+    An instance of the DataPersistence class for storing the positions and fetching the option chains.
+    dispatcher : TaskDispatcher
+    Runs the database calls on the thread pool and the valuation on the process pool.
+    curve_manager : DiscountCurveManager
+    Provides the discount curve of the date. Without it the flat RISK_FREE_RATE is used.
+    Methods:
+    --------
+    load_positions(position_list: PositionList) -> dict:
+    Replaces the positions of the portfolio, the quantities of a contract listed several times are added up.
+    calculate_portfolio_exposures(portfolio: str, date_as_of: int) -> JSONResponse:
+    Joins the positions of the portfolio to the priced chain of the date and returns the MTM, DeltaExposure and
+    VegaExposure per FutureExpiryDate and in total, with the positions missing from the chain and the number of
+    positions which cannot be priced, e.g. past their settlement date.
+    """
+    def __init__(self, persistence: DataPersistence, dispatcher: Optional[TaskDispatcher] = None,
+                 curve_manager: Optional[DiscountCurveManager] = None):
+        self.persistence = persistence
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.curve_manager = curve_manager
+
+    @logger_decorator
+    async def load_positions(self, position_list: PositionList) -> dict:
+        try:
+            positions = self._to_positions(position_list)
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+        # The old positions are deleted and the new ones stored in one transaction, a failed upload keeps the old ones.
+        upsert_report = await self.dispatcher.run_io(self.persistence.replace_records, PositionData,
+                                                     (PositionData.Portfolio == position_list.Portfolio,), positions)
+        return {"success": "Positions uploaded to database.", "portfolio": position_list.Portfolio, **upsert_report}
+
+    @logger_decorator
+    async def calculate_portfolio_exposures(self, portfolio: str, date_as_of: int) -> JSONResponse:
+        positions = await self.dispatcher.run_io(self.persistence.fetch_records, PositionData,
+                                                 (PositionData.Portfolio == portfolio,))
+        if positions.empty:
+            raise HTTPException(status_code=404, detail=f"No positions for the portfolio {portfolio}.")
+        option_chain = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData,
+                                                    (BrentOptionData.DateAsOf == date_as_of,))
+        if option_chain.empty:
+            raise HTTPException(status_code=404, detail=f"No option data for {date_as_of}.")
+        pricing_environment = {} if self.curve_manager is None else await self.curve_manager.get_pricing_environment([date_as_of])
+        exposures = await self.dispatcher.run_cpu(calculate_portfolio_exposures, positions[POSITION_KEY_COLUMNS + ['Quantity']],
+                                                  option_chain, **pricing_environment)
+
+        unmatched = exposures["Unmatched"]
+        return JSONResponse(content={"Portfolio": portfolio,
+                                     "DateAsOf": date_as_of,
+                                     "PerExpiry": exposures["PerExpiry"].to_dict(orient='list'),
+                                     "Total": exposures["Total"],
+                                     "UnmatchedPositions": len(unmatched),
+                                     "UnpricedPositions": exposures["Unpriced"],
+                                     "Unmatched": unmatched.head(MAX_LISTED_UNMATCHED_POSITIONS).to_dict(orient='list')})
+
+    @staticmethod
+    def _to_positions(position_list: PositionList) -> pd.DataFrame:
+        """
+        Returns the PositionData rows of the positions. Raises a ValueError on invalid positions.
+        """
+        columns = {'FutureExpiryDate': position_list.FutureExpiryDate, 'OptionType': position_list.OptionType,
+                   'StrikePrice': position_list.StrikePrice, 'Quantity': position_list.Quantity}
+        if len({len(values) for values in columns.values()}) != 1:
+            raise ValueError("FutureExpiryDate, OptionType, StrikePrice and Quantity must have the same length.")
+        positions = pd.DataFrame(columns)
+        if not positions['OptionType'].isin(OPTION_TYPES).all():
+            raise ValueError("Invalid OptionType. Supported option types: " + ", ".join(OPTION_TYPES))
+        positions = positions.groupby(POSITION_KEY_COLUMNS, as_index=False, sort=False)['Quantity'].sum()
+        return positions.assign(Portfolio=position_list.Portfolio)[['Portfolio'] + POSITION_KEY_COLUMNS + ['Quantity']]
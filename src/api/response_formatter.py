@@ -0,0 +1,139 @@
+import json
+from typing import Iterator, Optional
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+RECORDS_LAYOUT = "records"
+COLUMNAR_LAYOUT = "columnar"
+JSON_LAYOUTS = (RECORDS_LAYOUT, COLUMNAR_LAYOUT)
+JSON_CHUNK_ROWS = 50_000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+
+class DataFrameResponseFormatter:
+    """
+    A utility class building the versioned API responses directly from the DataFrames.
+    The body is encoded only once (no JSON string wrapped inside another JSON object) and streamed to
+    the client in chunks, so clients decode the response a single time.
+
+    Layouts:
+    --------
+    records : [{"DateAsOf": 20230331, ...}, ...] one JSON object per row.
+    columnar : {"DateAsOf": [20230331, ...], ...} one JSON array per column.
+    grouped (application/x-ndjson) : {"DateAsOf": 20230331, "records": [{...}, ...]} one JSON line per group of rows.
+
+    Binary formats (selected with the Accept header):
+    -------------------------------------------------
+    application/vnd.apache.arrow.stream : Arrow IPC stream built from the DataFrame columns.
+    application/vnd.apache.parquet : Parquet file built from the DataFrame columns.
+    """
+
+    @staticmethod
+    def validate_layout(layout: str) -> None:
+        """
+        Raises an HTTPException with status code 400 when the layout is not supported.
+        """
+        if layout not in JSON_LAYOUTS:
+            raise HTTPException(status_code=400, detail="Invalid layout. Supported layouts: " + ", ".join(JSON_LAYOUTS))
+
+    @staticmethod
+    def to_json_response(data: pd.DataFrame, layout: str = RECORDS_LAYOUT) -> StreamingResponse:
+        """
+        Builds a streaming JSON response from the DataFrame in the requested layout.
+        """
+        DataFrameResponseFormatter.validate_layout(layout)
+        if layout == COLUMNAR_LAYOUT:
+            body = DataFrameResponseFormatter.iter_json_columns(data)
+        else:
+            body = DataFrameResponseFormatter.iter_json_records(data)
+        return StreamingResponse(body, media_type="application/json")
+
+    @staticmethod
+    def iter_json_records(data: pd.DataFrame, chunk_rows: int = JSON_CHUNK_ROWS) -> Iterator[str]:
+        """
+        Yields a single JSON array of row objects, serialized chunk by chunk.
+        """
+        yield "["
+        for start in range(0, len(data), chunk_rows):
+            chunk_json = data.iloc[start:start + chunk_rows].to_json(orient="records")
+            # Drop the brackets of the chunk array, the chunks are joined into the outer array.
+            yield ("," if start else "") + chunk_json[1:-1]
+        yield "]"
+
+    @staticmethod
+    def iter_json_columns(data: pd.DataFrame) -> Iterator[str]:
+        """
+        Yields a single JSON object holding one array of values per column.
+        """
+        yield "{"
+        for position, column in enumerate(data.columns):
+            column_json = data[column].to_json(orient="values")
+            yield ("," if position else "") + json.dumps(str(column)) + ":" + column_json
+        yield "}"
+
+    @staticmethod
+    def to_grouped_ndjson_response(data: pd.DataFrame, group_column: str) -> StreamingResponse:
+        """
+        Builds a streaming NDJSON response with one line per value of the group column.
+        """
+        return StreamingResponse(DataFrameResponseFormatter.iter_ndjson_groups(data, group_column), media_type=NDJSON_MEDIA_TYPE)
+
+    @staticmethod
+    def iter_ndjson_groups(data: pd.DataFrame, group_column: str) -> Iterator[str]:
+        """
+        Yields one JSON line {group_column: value, "records": [...]} per run of equal values of the group column.
+        The DataFrame is expected to be sorted on the group column.
+        """
+        if data.empty:
+            return
+        group_values = data[group_column].to_numpy()
+        group_starts = np.flatnonzero(np.r_[True, group_values[1:] != group_values[:-1]])
+        group_ends = np.r_[group_starts[1:], len(data)]
+        for group_start, group_end in zip(group_starts, group_ends):
+            records_json = data.iloc[group_start:group_end].to_json(orient="records")
+            group_value = group_values[group_start]
+            group_json = json.dumps({group_column: group_value.item() if isinstance(group_value, np.generic) else group_value})
+            yield group_json[:-1] + ',"records":' + records_json + "}\n"
+
+    @staticmethod
+    def to_binary_response(data: pd.DataFrame, accept: Optional[str]) -> Optional[Response]:
+        """
+        Returns an Arrow IPC stream or a Parquet response when the Accept header asks for one of them,
+        and None when the client expects JSON.
+        """
+        # When the handler is called directly the Header default object is passed instead of a string.
+        if not isinstance(accept, str) or not accept:
+            return None
+        accepted_media_types = {media_type.split(";")[0].strip().lower() for media_type in accept.split(",")}
+        if ARROW_STREAM_MEDIA_TYPE in accepted_media_types:
+            return Response(content=DataFrameResponseFormatter.to_arrow_stream(data), media_type=ARROW_STREAM_MEDIA_TYPE)
+        for media_type in PARQUET_MEDIA_TYPES:
+            if media_type in accepted_media_types:
+                return Response(content=DataFrameResponseFormatter.to_parquet(data), media_type=media_type)
+        return None
+
+    @staticmethod
+    def to_arrow_stream(data: pd.DataFrame) -> bytes:
+        """
+        Serializes the DataFrame as an Arrow IPC stream. Numeric columns are handed to Arrow without conversion.
+        """
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def to_parquet(data: pd.DataFrame) -> bytes:
+        """
+        Serializes the DataFrame as a Parquet file.
+        """
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink)
+        return sink.getvalue().to_pybytes()
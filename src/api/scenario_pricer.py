@@ -0,0 +1,116 @@
+from dbutil.dbschema import BrentOptionData
+from dbutil.optiondata_dao import DataPersistence
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from typing import Iterator, List, Optional
+from api.discount_curves import DiscountCurveManager
+from models.model_registry import DEFAULT_MODEL, NORMAL_FORWARD_THRESHOLD, validate_model
+from models.scenario_grid import MAX_MEMORY_BYTES, calculate_scenario_pnl
+from util.app_logger import logger_decorator
+from util.file_read_util import DataProcessingUtilities
+from util.task_dispatcher import TaskDispatcher
+import json
+import numpy as np
+
+PNL_DECIMALS = 6
+
+class ScenarioGrid(BaseModel):
+    """
+        Relative shocks of the future price and absolute shocks of the implied volatility of the scenario grid.
+    """
+    PriceShocks: List[float]
+    VolShocks: List[float]
+
+class ScenarioPricer:
+    """
+    ScenarioPricer class revalues the option chain of a DateAsOf under a grid of future price and volatility
+    shocks without changing the stored market data, and returns the P&L of every scenario.
+    Attributes:
+    -----------
+    persistence : DataPersistence
+    An instance of the DataPersistence class for fetching option data.
+    max_memory_bytes : int
+    Bound of the memory used at once by the revaluation, the chain is priced in chunks of options under it.
+    dispatcher : TaskDispatcher
+    Runs the database fetch on the thread pool and the revaluation on the process pool.
+    curve_manager : DiscountCurveManager
+    Provides the discount curve of the date. Without it the flat RISK_FREE_RATE is used.
+    normal_forward_threshold : float
+    Future or strike price at or below which the auto model prices with Bachelier instead of Black-76.
+    Methods:
+    --------
+    calculate_scenario_pnl(date_as_of: int, scenario_grid: ScenarioGrid, model: str, per_option: bool) -> Response:
+    Returns the value of the chain and its P&L under every (price shock, vol shock) pair, with the number of unpriced
+    options left out of every P&L, and the P&L of every option as a (price shocks, vol shocks, options) cube when
+    per_option is set. The cube is streamed one scenario at a time, it is never serialized whole.
+    iter_pnl_cube_json(content: dict, pnl: np.ndarray) -> Iterator[str]
+    Yields the JSON document of the content with the PnL cube, in one piece per scenario.
+    """
+    def __init__(self, persistence: DataPersistence, max_memory_bytes: int = MAX_MEMORY_BYTES,
+                 dispatcher: Optional[TaskDispatcher] = None, curve_manager: Optional[DiscountCurveManager] = None,
+                 normal_forward_threshold: float = NORMAL_FORWARD_THRESHOLD):
+        self.persistence = persistence
+        self.max_memory_bytes = max_memory_bytes
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self.curve_manager = curve_manager
+        self.normal_forward_threshold = normal_forward_threshold
+
+    @logger_decorator
+    async def calculate_scenario_pnl(self, date_as_of: int, scenario_grid: ScenarioGrid, model: str = DEFAULT_MODEL,
+                                     per_option: bool = False) -> Response:
+        try:
+            validate_model(model)
+            if not scenario_grid.PriceShocks or not scenario_grid.VolShocks:
+                raise ValueError("The scenario grid needs at least one price shock and one vol shock.")
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+
+        query = (BrentOptionData.DateAsOf == date_as_of,)
+        option_chain = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+        if option_chain.empty:
+            raise HTTPException(status_code=404, detail=f"No option data for {date_as_of}.")
+        if per_option:
+            # The per option cube is kept whole until it is streamed, it has to fit the memory bound too.
+            cube_bytes = len(scenario_grid.PriceShocks) * len(scenario_grid.VolShocks) * len(option_chain) * 4
+            if cube_bytes > self.max_memory_bytes:
+                raise HTTPException(status_code=400, detail=f"The per option P&L cube needs {cube_bytes} bytes, more than "
+                                                            f"{self.max_memory_bytes}. Request the total P&L only.")
+        pricing_environment = {} if self.curve_manager is None else await self.curve_manager.get_pricing_environment([date_as_of])
+        try:
+            scenario_pnl = await self.dispatcher.run_cpu(
+                calculate_scenario_pnl, option_chain, scenario_grid.PriceShocks, scenario_grid.VolShocks, model,
+                self.normal_forward_threshold, per_option, self.max_memory_bytes, **pricing_environment)
+        except ValueError as e:
+            raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+
+        content = {"DateAsOf": date_as_of,
+                   "PriceShocks": scenario_grid.PriceShocks,
+                   "VolShocks": scenario_grid.VolShocks,
+                   "BaseValue": scenario_pnl["BaseValue"],
+                   "TotalPnL": scenario_pnl["TotalPnL"].tolist(),
+                   "Unpriced": scenario_pnl["Unpriced"].tolist()}
+        if not per_option:
+            return JSONResponse(content=content)
+        content.update({column: option_chain[column].tolist() for column in ('FutureExpiryDate', 'OptionType', 'StrikePrice')})
+        return StreamingResponse(self.iter_pnl_cube_json(content, scenario_pnl["PnL"]), media_type="application/json")
+
+    @staticmethod
+    def iter_pnl_cube_json(content: dict, pnl: np.ndarray) -> Iterator[str]:
+        """
+        Yields the JSON document of the content with the PnL cube as its last member, the P&L of the options under
+        one scenario at a time, so only one scenario is converted to Python floats and JSON at once.
+        """
+        # Same separators as JSONResponse, the streamed document is the one the JSONResponse would have returned.
+        content_json = json.dumps(content, separators=(",", ":"), allow_nan=False)
+        yield content_json[:-1] + ',"PnL":['
+        for price_shock_index in range(pnl.shape[0]):
+            for vol_shock_index in range(pnl.shape[1]):
+                # The float32 values are rounded to keep the JSON short. NaN is not valid JSON, the options which
+                # cannot be priced under the scenario get null.
+                scenario_pnl = pnl[price_shock_index, vol_shock_index].astype(np.float64).round(PNL_DECIMALS)
+                scenario_json = json.dumps([None if np.isnan(value) else value for value in scenario_pnl.tolist()],
+                                           separators=(",", ":"))
+                yield ("[" if vol_shock_index == 0 else ",") + scenario_json
+            yield "]" if price_shock_index == pnl.shape[0] - 1 else "],"
+        yield "]}"
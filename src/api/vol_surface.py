@@ -0,0 +1,81 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from dbutil.dbschema import BrentOptionData
+from dbutil.optiondata_dao import DataPersistence
+from models.b76_model import SETTLEMENT_LAG_MONTHS
+from models.vol_surface import VolSurface
+from util.app_logger import logger_decorator
+from util.file_read_util import DataProcessingUtilities
+from util.result_cache import ResultCache
+from util.task_dispatcher import TaskDispatcher
+import numpy as np
+
+class VolSurfacePoints(BaseModel):
+    """
+        Columnar (strike, time to maturity in years) points at which the volatility surface is evaluated.
+    """
+    StrikePrice: List[float]
+    TimeToMaturity: List[float]
+
+class VolSurfaceEvaluator:
+    """
+    VolSurfaceEvaluator class builds the implied volatility surface of a DateAsOf from its stored option chain
+    and evaluates it at any strike and maturity. The fitted surfaces are kept in a cache across requests,
+    the uploads and deletes invalidate the dates they change.
+
+    Attributes:
+    -----------
+    persistence : DataPersistence
+        An instance of the DataPersistence class for fetching option data.
+    surface_cache : ResultCache
+        Cache of the VolSurface objects keyed by DateAsOf.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date of the options.
+    dispatcher : TaskDispatcher
+        Runs the database fetch on the thread pool and the surface fit on the process pool.
+
+    Methods:
+    --------
+    evaluate_vol_surface(date_as_of: int, points: VolSurfacePoints) -> JSONResponse
+        Returns the implied volatilities of the surface of the date at the given points, in the columnar layout.
+    get_vol_surface(date_as_of: int) -> VolSurface
+        Returns the surface of the date, from the cache when available.
+    """
+
+    def __init__(self, persistence: DataPersistence, surface_cache: Optional[ResultCache] = None,
+                 settlement_lag_months: int = SETTLEMENT_LAG_MONTHS, dispatcher: Optional[TaskDispatcher] = None):
+        self.persistence = persistence
+        self.surface_cache = surface_cache if surface_cache is not None else ResultCache()
+        self.settlement_lag_months = settlement_lag_months
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+
+    @logger_decorator
+    async def evaluate_vol_surface(self, date_as_of: int, points: VolSurfacePoints) -> JSONResponse:
+        if len(points.StrikePrice) != len(points.TimeToMaturity):
+            raise HTTPException(status_code=400, detail="StrikePrice and TimeToMaturity must have the same length.")
+        vol_surface = await self.get_vol_surface(date_as_of)
+        K = np.asarray(points.StrikePrice, dtype=np.float64)
+        T = np.asarray(points.TimeToMaturity, dtype=np.float64)
+        implied_vols = vol_surface.implied_vols(K, T)
+        # NaN is not valid JSON, the points outside of the surface get null.
+        return JSONResponse(content={"DateAsOf": date_as_of,
+                                     "StrikePrice": points.StrikePrice,
+                                     "TimeToMaturity": points.TimeToMaturity,
+                                     "ImpliedVol": [None if np.isnan(vol) else vol for vol in implied_vols.tolist()]})
+
+    async def get_vol_surface(self, date_as_of: int) -> VolSurface:
+        generation = self.surface_cache.generation(date_as_of)
+        vol_surface = self.surface_cache.get(date_as_of)
+        if vol_surface is None:
+            query = (BrentOptionData.DateAsOf == date_as_of,)
+            option_chain = await self.dispatcher.run_io(self.persistence.fetch_records, BrentOptionData, query)
+            if option_chain.empty:
+                raise HTTPException(status_code=404, detail=f"No option data for {date_as_of}.")
+            try:
+                vol_surface = await self.dispatcher.run_cpu(VolSurface.from_option_chain, option_chain, self.settlement_lag_months)
+            except ValueError as e:
+                raise DataProcessingUtilities.convert_value_error_to_http_error(e)
+            self.surface_cache.put(date_as_of, vol_surface, generation)
+        return vol_surface
@@ -1,5 +1,8 @@
 from fastapi import FastAPI, HTTPException
+import asyncio
 from dbutil.optiondata_dao import DataPersistenceORM
+from dbutil.async_optiondata_dao import AsyncDataPersistence
+from dbutil.sqlite_profile import SQLitePerformanceProfile
 from dbutil.dbschema import get_optiondata_dbschmea
 import pandas as pd
 from typing import Optional, List
@@ -8,7 +11,16 @@ from api.optionadata_fetcher import OptionDataFetcher
 from api.optionadata_uploader import OptionDataUploader
 from api.optionadata_deleter import OptionDataDeleter
 from api.option_pricer import OptionPricer
+from api.option_greeks import OptionGreeksCalculator
+from api.discount_curves import DiscountCurveManager
+from api.vol_surface import VolSurfaceEvaluator
+from api.scenario_pricer import ScenarioPricer
+from api.portfolio import PortfolioAggregator
+from api.jobs import JobManager
 from fastapi.middleware.cors import CORSMiddleware
+from util.result_cache import ResultCache
+from util.task_dispatcher import TaskDispatcher
+from util.job_queue import JobQueue
 
 """
     This module acts the API end point manager responsible for
@@ -37,8 +49,11 @@ class APIManager:
         config = configparser.ConfigParser()
         config.read(ini_path)
 
-        # create the engine and database
-        sql_engine = 'sqlite:///'
+        # create the engine and database, the async backend uses the aiosqlite driver
+        database_backend = config.get('DATABASE', 'backend', fallback='sync')
+        if database_backend not in ('sync', 'async'):
+            raise ValueError(f"Invalid database backend {database_backend}. Supported backends: sync, async")
+        sql_engine = 'sqlite+aiosqlite:///' if database_backend == 'async' else 'sqlite:///'
         db_name = config['DATABASE']['sqlite_file']
         database_url = sql_engine + db_name
         optiondata_dbschmea = get_optiondata_dbschmea()
@@ -57,13 +72,63 @@ class APIManager:
         allow_headers=["*"],
         )
 
-        self.persistence = DataPersistenceORM(database_url)
-        self.persistence.create_table(optiondata_dbschmea)
+        upsert_chunk_size = config.getint('DATABASE', 'upsert_chunk_size', fallback=50000)
+        sqlite_profile = SQLitePerformanceProfile.from_config(config['DATABASE'])
+        if database_backend == 'async':
+            self.persistence = AsyncDataPersistence(database_url, upsert_chunk_size=upsert_chunk_size, sqlite_profile=sqlite_profile)
+            asyncio.run(self.persistence.create_table(optiondata_dbschmea))
+        else:
+            self.persistence = DataPersistenceORM(database_url, upsert_chunk_size=upsert_chunk_size, sqlite_profile=sqlite_profile)
+            self.persistence.create_table(optiondata_dbschmea)
         
-        self.uploader = OptionDataUploader(self.persistence)
-        self.fetcher = OptionDataFetcher(self.persistence)
-        self.calculator = OptionPricer(self.persistence)
-        self.deleter = OptionDataDeleter(self.persistence)
+        # priced option chains are cached per DateAsOf and invalidated by the uploads and deletes
+        self.price_cache = ResultCache(max_entries=config.getint('CACHE', 'max_entries', fallback=64),
+                                       ttl_seconds=config.getfloat('CACHE', 'ttl_seconds', fallback=3600))
+        # fitted volatility surfaces are cached per DateAsOf in the same way
+        self.surface_cache = ResultCache(max_entries=config.getint('CACHE', 'surface_max_entries', fallback=64),
+                                         ttl_seconds=config.getfloat('CACHE', 'ttl_seconds', fallback=3600))
+
+        # blocking database calls run on a thread pool and the pricing on a process pool, outside of the event loop
+        self.dispatcher = TaskDispatcher(io_pool_size=config.getint('EXECUTION', 'io_pool_size', fallback=8),
+                                         cpu_pool_size=config.getint('EXECUTION', 'cpu_pool_size', fallback=0))
+        self.app.add_event_handler("shutdown", self.dispatcher.shutdown)
+
+        # discount curves per DateAsOf, the dates without a curve are priced with the flat default rate
+        self.curve_manager = DiscountCurveManager(
+            self.persistence,
+            default_rate=config.getfloat('PRICING', 'risk_free_rate', fallback=0.05),
+            settlement_lag_months=config.getint('PRICING', 'settlement_lag_months', fallback=2),
+            curve_cache=ResultCache(max_entries=config.getint('CACHE', 'curve_max_entries', fallback=1024),
+                                    ttl_seconds=config.getfloat('CACHE', 'ttl_seconds', fallback=3600)),
+            caches=[self.price_cache], dispatcher=self.dispatcher)
+
+        stream_chunk_rows = config.getint('UPLOAD', 'stream_chunk_rows', fallback=50000)
+        self.uploader = OptionDataUploader(self.persistence, caches=[self.price_cache, self.surface_cache], stream_chunk_rows=stream_chunk_rows,
+                                           dispatcher=self.dispatcher, curve_manager=self.curve_manager)
+        self.fetcher = OptionDataFetcher(self.persistence, dispatcher=self.dispatcher)
+        normal_forward_threshold = config.getfloat('PRICING', 'normal_forward_threshold', fallback=0.0)
+        self.calculator = OptionPricer(self.persistence, result_cache=self.price_cache, dispatcher=self.dispatcher,
+                                       curve_manager=self.curve_manager, normal_forward_threshold=normal_forward_threshold)
+        self.deleter = OptionDataDeleter(self.persistence, caches=[self.price_cache, self.surface_cache], dispatcher=self.dispatcher)
+        self.greeks_calculator = OptionGreeksCalculator(self.persistence, dispatcher=self.dispatcher,
+                                                        curve_manager=self.curve_manager)
+        self.vol_surface_evaluator = VolSurfaceEvaluator(
+            self.persistence, surface_cache=self.surface_cache,
+            settlement_lag_months=config.getint('PRICING', 'settlement_lag_months', fallback=2), dispatcher=self.dispatcher)
+        self.scenario_pricer = ScenarioPricer(
+            self.persistence, max_memory_bytes=config.getint('SCENARIO', 'max_memory_bytes', fallback=67108864),
+            dispatcher=self.dispatcher, curve_manager=self.curve_manager, normal_forward_threshold=normal_forward_threshold)
+        self.portfolio_aggregator = PortfolioAggregator(self.persistence, dispatcher=self.dispatcher,
+                                                        curve_manager=self.curve_manager)
+
+        # long uploads and pricings run as background jobs, their state is stored in the database
+        self.job_queue = JobQueue(self.persistence, worker_count=config.getint('JOBS', 'worker_count', fallback=2),
+                                  result_ttl_seconds=config.getfloat('JOBS', 'result_ttl_seconds', fallback=86400),
+                                  dispatcher=self.dispatcher,
+                                  max_queued_jobs=config.getint('JOBS', 'max_queued_jobs', fallback=100))
+        self.app.add_event_handler("startup", self.job_queue.start)
+        self.app.add_event_handler("shutdown", self.job_queue.stop)
+        self.job_manager = JobManager(self.job_queue, self.uploader, self.calculator)
 
         self.initialize_api_endpoints()
 
@@ -76,12 +141,34 @@ class APIManager:
         Initializes the API endpoints for the application.
         """
         self.app.post("/loadmarketdatajson")(self.uploader.load_market_data_json)
+        self.app.post("/loadmarketdatajsoncolumnar")(self.uploader.load_market_data_json_columnar)
         self.app.post("/loadmarketdatafile")(self.uploader.load_market_data_file)
         self.app.post("/loadmarketdatastreaming")(self.uploader.load_market_data_iostream)
         self.app.get("/fetchdata_asof/{date_as_of}")(self.fetcher.fetch_records_asof)
         self.app.get("/fetchuniqutedates/")(self.fetcher.fetch_distinct_dates)
         self.app.get("/calculateoptionprices/{date_as_of}/")(self.calculator.calculate_market_prices)
         self.app.delete("/deletedata_asof/{date_as_of}/")(self.deleter.delete_records_asof)
+        self.app.get("/calculategreeks/{date_as_of}/")(self.greeks_calculator.calculate_market_greeks)
+        self.app.get("/cachestats/")(self.calculator.fetch_cache_stats)
+        self.app.post("/loaddiscountcurves")(self.curve_manager.load_discount_curves)
+        self.app.get("/fetchdiscountcurve/{date_as_of}")(self.curve_manager.fetch_discount_curve)
+        self.app.post("/volsurface/{date_as_of}")(self.vol_surface_evaluator.evaluate_vol_surface)
+        self.app.post("/scenariopnl/{date_as_of}")(self.scenario_pricer.calculate_scenario_pnl)
+        self.app.post("/loadpositions")(self.portfolio_aggregator.load_positions)
+        self.app.get("/portfolioexposure/{portfolio}/{date_as_of}")(self.portfolio_aggregator.calculate_portfolio_exposures)
+
+        # job endpoints return a JobId at once, the status and result of the job are polled
+        self.app.post("/jobs/loadmarketdatafile")(self.job_manager.submit_market_data_file)
+        self.app.post("/jobs/loadmarketdatajsoncolumnar")(self.job_manager.submit_market_data_json_columnar)
+        self.app.post("/jobs/calculateoptionprices/{date_as_of}/")(self.job_manager.submit_option_pricing)
+        self.app.get("/jobs/{job_id}")(self.job_manager.fetch_job_status)
+        self.app.get("/jobs/{job_id}/result")(self.job_manager.fetch_job_result)
+
+        # version 2 endpoints return the data encoded once, as a plain JSON document
+        self.app.get("/v2/fetchdata_asof/{date_as_of}")(self.fetcher.fetch_records_asof_v2)
+        self.app.get("/v2/fetchuniqutedates/")(self.fetcher.fetch_distinct_dates_v2)
+        self.app.get("/v2/calculateoptionprices/{date_as_of}/")(self.calculator.calculate_market_prices_v2)
+        self.app.get("/v2/calculateoptionprices_range/")(self.calculator.calculate_market_prices_range)
 
     def run(self) -> None:
         """
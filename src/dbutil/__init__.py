@@ -14,4 +14,10 @@ creating, adding, fetching, deleting, and updating records in a database table
 for a given SQLAlchemy Base class. 
 The class has attributes for the database URL, SQLAlchemy engine, and session objects used for interacting with the database.
 
+AsyncDataPersistence: The same methods as DataPersistenceORM declared as coroutines, running on the
+SQLAlchemy async engine (aiosqlite), selected with backend = async in the DATABASE section of config.ini.
+
+SchemaMigrator: Creates the tables of a new database and applies the pending migrations, tracked in
+PRAGMA user_version, to the tables of an existing database.
+
 """
\ No newline at end of file
@@ -0,0 +1,139 @@
+from sqlalchemy import and_, delete, insert, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.expression import ClauseElement
+from dbutil.optiondata_dao import Base, DataPersistence, DataPersistenceORM
+from dbutil.sqlite_profile import SQLitePerformanceProfile
+from dbutil.migrations import SchemaMigrator
+import pandas as pd
+from typing import List, Optional
+
+class AsyncDataPersistence(DataPersistence):
+    """
+    AsyncDataPersistence class is responsible for persisting data to a database with the SQLAlchemy async engine,
+    e.g. SQLite through aiosqlite. It has the same methods as DataPersistenceORM, declared as coroutines, so the
+    API handlers await the database instead of holding a thread while a query runs.
+
+    The SELECT and upsert statements are the ones of DataPersistenceORM, run on the DBAPI cursor of the async
+    connection, so both implementations return the same typed DataFrames and upsert reports.
+
+    Attributes:
+    -----------
+    database_url : str
+        The URL of the database with an async driver, e.g. sqlite+aiosqlite:///optiondata.db.
+    upsert_chunk_size : int
+        Default number of rows sent per executemany call by upsert_records.
+    sqlite_profile : SQLitePerformanceProfile
+        Optional pragmas and pool settings of the engine. Without it the aiosqlite dialect opens a connection per use.
+    engine : sqlalchemy.ext.asyncio.AsyncEngine
+        The SQLAlchemy async engine object used for connecting to the database.
+
+    Methods:
+    --------
+    create_table(table_class: Base) -> None
+        Creates the tables declared on the given schema and migrates the tables of an existing database. The engine connections are released afterwards,
+        so it can run on another event loop than the requests, e.g. with asyncio.run at startup.
+
+    add_records(table_class: Base, data: pandas.DataFrame) -> None
+        Inserts the records of the DataFrame.
+
+    fetch_records(table_class: Base, query: Union[str, List[ClauseElement]]=None) -> pandas.DataFrame
+        Fetches the records matching the query as a typed DataFrame.
+
+    delete_records(table_class: Base, query: List[ClauseElement]) -> None
+        Deletes the records matching the query.
+
+    update_records(table_class: Base, query: List[ClauseElement], update_data: dict) -> None
+        Updates the records matching the query with the update data.
+
+    upsert_records(table_class: Base, data: pandas.DataFrame, chunk_size: int=None) -> dict
+        Inserts or updates the records within one transaction and returns the inserted and updated counts.
+
+    update_matching_records(table_class: Base, data: pandas.DataFrame, value_columns: List[str], chunk_size: int=None, only_null_values: bool=False) -> int
+        Sets the value columns of the records matching the other columns of the data, and whose value columns are
+        NULL with only_null_values, and returns the updated count.
+
+    replace_records(table_class: Base, query: List[ClauseElement], data: pandas.DataFrame, chunk_size: int=None) -> dict
+        Deletes the records matching the query and upserts the data within one transaction.
+
+    fetch_distinct_values(table_class: Base, column_name: str, query: List[ClauseElement]=None, limit: int=None, offset: int=0) -> list
+        Returns the sorted distinct values of the column with a loose index scan, paginated in the database.
+    """
+
+    def __init__(self, database_url: str, upsert_chunk_size: int = 50000,
+                 sqlite_profile: Optional[SQLitePerformanceProfile] = None):
+        self.database_url = database_url
+        self.sqlite_profile = sqlite_profile
+        if sqlite_profile is None:
+            self.engine = create_async_engine(database_url)
+        else:
+            self.engine = create_async_engine(database_url, **sqlite_profile.engine_kwargs(database_url, async_engine=True))
+            sqlite_profile.apply(self.engine.sync_engine)
+        self.upsert_chunk_size = upsert_chunk_size
+
+    async def create_table(self, table_class: Base) -> None:
+        async with self.engine.begin() as connection:
+            await connection.run_sync(SchemaMigrator(table_class.metadata).migrate)
+        await self.engine.dispose()
+
+    async def add_records(self, table_class: Base, data: pd.DataFrame) -> None:
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(insert(table_class.__table__), data.to_dict(orient="records"))
+        except Exception as err_msg:
+            raise ValueError(f"Error adding records: {err_msg}")
+
+    async def fetch_records(self, table_class: Base, query: ClauseElement = None) -> pd.DataFrame:
+        try:
+            async with self.engine.connect() as connection:
+                return await connection.run_sync(DataPersistenceORM._fetch_dataframe, table_class, query)
+        except Exception as err_msg:
+            raise ValueError(f"Error fetching records: {err_msg}")
+
+    async def delete_records(self, table_class: Base, query: List[ClauseElement]) -> None:
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(delete(table_class.__table__).where(and_(*query)))
+        except Exception as err_msg:
+            raise ValueError(f"Error deleting records: {err_msg}")
+
+    async def update_records(self, table_class: Base, query: List[ClauseElement], update_data: dict) -> None:
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(update(table_class.__table__).where(and_(*query)).values(update_data))
+        except Exception as err_msg:
+            raise ValueError(f"Error updating records: {err_msg}")
+
+    async def upsert_records(self, table_class: Base, data: pd.DataFrame, chunk_size: Optional[int] = None) -> dict:
+        try:
+            async with self.engine.begin() as connection:
+                return await connection.run_sync(DataPersistenceORM._upsert_dataframe, table_class, data,
+                                                 chunk_size or self.upsert_chunk_size)
+        except Exception as err_msg:
+            raise ValueError(f"Error upserting records: {err_msg}")
+
+    async def update_matching_records(self, table_class: Base, data: pd.DataFrame, value_columns: List[str],
+                                      chunk_size: Optional[int] = None, only_null_values: bool = False) -> int:
+        try:
+            async with self.engine.begin() as connection:
+                return await connection.run_sync(DataPersistenceORM._update_matching_dataframe, table_class, data,
+                                                 value_columns, chunk_size or self.upsert_chunk_size, only_null_values)
+        except Exception as err_msg:
+            raise ValueError(f"Error updating records: {err_msg}")
+
+    async def replace_records(self, table_class: Base, query: List[ClauseElement], data: pd.DataFrame,
+                              chunk_size: Optional[int] = None) -> dict:
+        try:
+            async with self.engine.begin() as connection:
+                return await connection.run_sync(DataPersistenceORM._replace_dataframe, table_class, query, data,
+                                                 chunk_size or self.upsert_chunk_size)
+        except Exception as err_msg:
+            raise ValueError(f"Error replacing records: {err_msg}")
+
+    async def fetch_distinct_values(self, table_class: Base, column_name: str, query: List[ClauseElement] = None,
+                                    limit: Optional[int] = None, offset: int = 0) -> list:
+        statement = DataPersistenceORM._distinct_values_statement(table_class, column_name, query, limit, offset)
+        try:
+            async with self.engine.connect() as connection:
+                return list((await connection.execute(statement)).scalars())
+        except Exception as err_msg:
+            raise ValueError(f"Error fetching distinct values: {err_msg}")
@@ -1,12 +1,25 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, Float, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Float, Text, PrimaryKeyConstraint, Index
 
 Base = declarative_base()
 
+# Values of the OptionType column.
+OPTION_TYPES = ('Call', 'Put')
+
 class BrentOptionData(Base):
     """
         A class representing the BrentOptionData table in the database.
         Used in Object Relational Mapping libraries to create a table in the databases.
+
+        On SQLite the table is stored WITHOUT ROWID, the rows are clustered on the primary key so the queries
+        on one DateAsOf or a range of dates read contiguous pages and need no lookup in a separate table.
+        The ix_BrentOptionData_expiry_history index covers the history of one expiry and option type
+        over a range of dates.
+        OptionPrice is the Black-76 price stored at upload time. It is a derived column: the upserts which change
+        the other values of a row reset it to NULL, and NULL prices are computed when the chain is read.
+        NormalVol is the optional normal volatility, in price units, of the options quoted with one. The Bachelier
+        pricing uses it rather than converting the ImpliedVol, which has no meaning at or below a zero price.
+        Changes to this table must come with a migration in dbutil.migrations for the existing databases.
     """
     __tablename__ = 'BrentOptionData'
     DateAsOf = Column(Integer)
@@ -15,8 +28,66 @@ class BrentOptionData(Base):
     StrikePrice = Column(Float)
     CurrentPrice = Column(Float)
     ImpliedVol = Column(Float)
-    __table_args__ = (PrimaryKeyConstraint('DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice'), {})
+    OptionPrice = Column(Float, info={'derived': True})
+    NormalVol = Column(Float)
+    __table_args__ = (PrimaryKeyConstraint('DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice'),
+                      Index('ix_BrentOptionData_expiry_history', 'FutureExpiryDate', 'OptionType', 'DateAsOf',
+                            'StrikePrice', 'CurrentPrice', 'ImpliedVol', 'OptionPrice', 'NormalVol'),
+                      {'sqlite_with_rowid': False})
+
+
+class DiscountCurveData(Base):
+    """
+        A class representing the DiscountCurveData table in the database, the discount factors of the discount curve
+        of every DateAsOf at its pillar maturity dates.
+    """
+    __tablename__ = 'DiscountCurveData'
+    DateAsOf = Column(Integer)
+    MaturityDate = Column(Integer)
+    DiscountFactor = Column(Float)
+    __table_args__ = (PrimaryKeyConstraint('DateAsOf', 'MaturityDate'), {'sqlite_with_rowid': False})
+
+
+class PositionData(Base):
+    """
+        A class representing the PositionData table in the database, the quantity held by every portfolio in each
+        option contract, identified as in BrentOptionData by its FutureExpiryDate, OptionType and StrikePrice.
+        Negative quantities are short positions.
+    """
+    __tablename__ = 'PositionData'
+    Portfolio = Column(String(50))
+    FutureExpiryDate = Column(Integer)
+    OptionType = Column(String(10))
+    StrikePrice = Column(Float)
+    Quantity = Column(Float)
+    __table_args__ = (PrimaryKeyConstraint('Portfolio', 'FutureExpiryDate', 'OptionType', 'StrikePrice'),
+                      {'sqlite_with_rowid': False})
+
+class JobData(Base):
+    """
+        A class representing the JobData table in the database, the state of the background jobs run by the
+        JobQueue: their status, the rows processed so far and the error message of the failed jobs.
+        The timestamps are seconds since the epoch.
+    """
+    __tablename__ = 'JobData'
+    JobId = Column(String(32), primary_key=True)
+    JobType = Column(String(50))
+    Status = Column(String(10))
+    RowsProcessed = Column(Integer)
+    RowsTotal = Column(Integer)
+    Error = Column(Text)
+    SubmittedAt = Column(Float)
+    UpdatedAt = Column(Float)
+
 
+class JobResultData(Base):
+    """
+        A class representing the JobResultData table in the database, the JSON document of the result of every
+        finished job. It is kept apart from JobData so that polling the status does not read the results.
+    """
+    __tablename__ = 'JobResultData'
+    JobId = Column(String(32), primary_key=True)
+    Result = Column(Text)
 
 def get_optiondata_dbschmea():
     """
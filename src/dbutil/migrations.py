@@ -0,0 +1,141 @@
+import logging
+from sqlalchemy import MetaData, inspect
+from typing import Callable, List, Sequence
+
+"""
+This module upgrades the schema of the existing databases to the tables declared in dbutil.dbschema.
+
+The schema version of a SQLite database is kept in PRAGMA user_version. A new database gets every table
+of the schema created and is stamped with the latest version, an existing one gets the pending migrations
+applied in order. Each migration holds the DDL of its own version rather than the current table definitions,
+so the migrations keep producing the same schema when the tables change later on.
+"""
+
+logger = logging.getLogger(__name__)
+
+class Migration:
+    """
+    A schema change applied to the databases older than its version.
+
+    Attributes:
+    -----------
+    version : int
+        Schema version of the database once the migration is applied.
+    description : str
+        Short description logged when the migration is applied.
+    upgrade : Callable
+        Function applying the change on the given SQLAlchemy connection.
+    """
+
+    def __init__(self, version: int, description: str, upgrade: Callable):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+
+def _cluster_option_data_on_primary_key(connection) -> None:
+    # Databases created before the primary key was declared only have the table created by pandas.to_sql,
+    # without primary key and with duplicated keys when a chain was uploaded twice. The table is rebuilt
+    # WITHOUT ROWID on its primary key, the last uploaded row of every key is kept.
+    connection.exec_driver_sql("""
+        CREATE TABLE "BrentOptionData_migration" (
+            "DateAsOf" INTEGER NOT NULL,
+            "FutureExpiryDate" INTEGER NOT NULL,
+            "OptionType" VARCHAR(10) NOT NULL,
+            "StrikePrice" FLOAT NOT NULL,
+            "CurrentPrice" FLOAT,
+            "ImpliedVol" FLOAT,
+            PRIMARY KEY ("DateAsOf", "FutureExpiryDate", "OptionType", "StrikePrice")
+        ) WITHOUT ROWID""")
+    connection.exec_driver_sql("""
+        INSERT OR REPLACE INTO "BrentOptionData_migration"
+            ("DateAsOf", "FutureExpiryDate", "OptionType", "StrikePrice", "CurrentPrice", "ImpliedVol")
+        SELECT "DateAsOf", "FutureExpiryDate", "OptionType", "StrikePrice", "CurrentPrice", "ImpliedVol"
+        FROM "BrentOptionData"
+        WHERE "DateAsOf" IS NOT NULL AND "FutureExpiryDate" IS NOT NULL
+            AND "OptionType" IS NOT NULL AND "StrikePrice" IS NOT NULL
+        ORDER BY rowid""")
+    connection.exec_driver_sql('DROP TABLE "BrentOptionData"')
+    connection.exec_driver_sql('ALTER TABLE "BrentOptionData_migration" RENAME TO "BrentOptionData"')
+    connection.exec_driver_sql("""
+        CREATE INDEX "ix_BrentOptionData_expiry_history" ON "BrentOptionData"
+            ("FutureExpiryDate", "OptionType", "DateAsOf", "StrikePrice", "CurrentPrice", "ImpliedVol")""")
+
+
+def _add_stored_option_price(connection) -> None:
+    # The existing rows get a NULL OptionPrice, their prices are computed when they are read until the next upload.
+    # The expiry history index is rebuilt with the new column so that it keeps covering the history queries.
+    connection.exec_driver_sql('ALTER TABLE "BrentOptionData" ADD COLUMN "OptionPrice" FLOAT')
+    connection.exec_driver_sql('DROP INDEX IF EXISTS "ix_BrentOptionData_expiry_history"')
+    connection.exec_driver_sql("""
+        CREATE INDEX "ix_BrentOptionData_expiry_history" ON "BrentOptionData"
+            ("FutureExpiryDate", "OptionType", "DateAsOf", "StrikePrice", "CurrentPrice", "ImpliedVol", "OptionPrice")""")
+
+
+def _add_normal_vol(connection) -> None:
+    # The existing rows get a NULL NormalVol, they keep being priced from their ImpliedVol.
+    connection.exec_driver_sql('ALTER TABLE "BrentOptionData" ADD COLUMN "NormalVol" FLOAT')
+    connection.exec_driver_sql('DROP INDEX IF EXISTS "ix_BrentOptionData_expiry_history"')
+    connection.exec_driver_sql("""
+        CREATE INDEX "ix_BrentOptionData_expiry_history" ON "BrentOptionData"
+            ("FutureExpiryDate", "OptionType", "DateAsOf", "StrikePrice", "CurrentPrice", "ImpliedVol", "OptionPrice",
+             "NormalVol")""")
+
+
+MIGRATIONS = [
+    Migration(1, "Cluster BrentOptionData on its primary key and index the expiry history", _cluster_option_data_on_primary_key),
+    Migration(2, "Store the OptionPrice of BrentOptionData", _add_stored_option_price),
+    Migration(3, "Store the NormalVol of BrentOptionData", _add_normal_vol),
+]
+
+
+class SchemaMigrator:
+    """
+    SchemaMigrator class creates the tables of a schema and applies the pending migrations to an existing database.
+
+    Attributes:
+    -----------
+    metadata : MetaData
+        Metadata of the declared tables, e.g. get_optiondata_dbschmea().metadata.
+    migrations : Sequence[Migration]
+        Migrations ordered by version.
+
+    Methods:
+    --------
+    schema_version(connection) -> int
+        Returns the schema version stored in the database.
+    migrate(connection) -> List[int]
+        Brings the database to the latest version and returns the versions of the applied migrations.
+    """
+
+    def __init__(self, metadata: MetaData, migrations: Sequence[Migration] = MIGRATIONS):
+        self.metadata = metadata
+        self.migrations = migrations
+        self.latest_version = max((migration.version for migration in migrations), default=0)
+
+    @staticmethod
+    def schema_version(connection) -> int:
+        return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+    def migrate(self, connection) -> List[int]:
+        version = self.schema_version(connection)
+        if version > self.latest_version:
+            raise ValueError(f"The database schema version {version} is newer than the latest known version {self.latest_version}.")
+
+        existing_tables = set(inspect(connection).get_table_names())
+        applied_versions = []
+        if existing_tables & set(self.metadata.tables):
+            for migration in self.migrations:
+                if migration.version > version:
+                    logger.info(f"Applying schema migration {migration.version}: {migration.description}")
+                    migration.upgrade(connection)
+                    self._set_schema_version(connection, migration.version)
+                    applied_versions.append(migration.version)
+        # New databases get the latest schema directly, existing ones the tables added since their version.
+        self.metadata.create_all(connection)
+        self._set_schema_version(connection, self.latest_version)
+        return applied_versions
+
+    @staticmethod
+    def _set_schema_version(connection, version: int) -> None:
+        connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
@@ -1,12 +1,16 @@
-from sqlalchemy import create_engine, and_, text
+from sqlalchemy import create_engine, and_, text, select, func, case, null, update, delete, bindparam, Integer, Float
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from abc import ABC, abstractmethod
 from sqlalchemy.sql.expression import ClauseElement
 import pandas as pd
+import numpy as np
 import os
 import datetime
-from typing import List
+from typing import List, Optional
+from dbutil.sqlite_profile import SQLitePerformanceProfile
+from dbutil.migrations import SchemaMigrator
 
 
 Base = declarative_base()
@@ -35,6 +39,23 @@ class DataPersistence(ABC):
 
     update_records(table_class: Base, query, update_data) -> None:
         Abstract method to update records in a database table for a given SQLAlchemy model class based on a query and new data.
+
+    fetch_distinct_values(table_class: Base, column_name: str, query, limit, offset) -> list:
+        Returns the sorted distinct values of a column. The default implementation filters the fetched records,
+        implementations should override it with a SELECT DISTINCT.
+
+    upsert_records(table_class: Base, data: pd.DataFrame, chunk_size: int) -> dict:
+        Inserts the records, updating the ones whose primary key already exists, and returns the inserted and
+        updated counts. The default implementation appends the records with add_records.
+
+    update_matching_records(table_class: Base, data: pd.DataFrame, value_columns: List[str], chunk_size: int, only_null_values: bool) -> int:
+        Sets the value columns of the records whose other columns still hold the values of the data, and only of
+        the records whose value columns are NULL with only_null_values, and returns the number of updated records.
+        The default implementation updates the records one at a time.
+
+    replace_records(table_class: Base, query, data: pd.DataFrame, chunk_size: int) -> dict:
+        Deletes the records matching the query and upserts the data in their place, and returns the upsert report.
+        The default implementation runs delete_records and upsert_records, in two transactions.
     """
     
     @abstractmethod
@@ -56,6 +77,30 @@ class DataPersistence(ABC):
     @abstractmethod
     def update_records(self, table_class: Base, query, update_data):
         pass
+
+    def fetch_distinct_values(self, table_class: Base, column_name: str, query=None,
+                              limit: Optional[int] = None, offset: int = 0) -> list:
+        fetched_data = self.fetch_records(table_class, query if query else (getattr(table_class, column_name),))
+        distinct_values = sorted(fetched_data[column_name].unique().tolist())
+        return distinct_values[offset:None if limit is None else offset + limit]
+
+    def upsert_records(self, table_class: Base, data: pd.DataFrame, chunk_size: Optional[int] = None) -> dict:
+        self.add_records(table_class, data)
+        return {"inserted": len(data), "updated": 0}
+
+    def update_matching_records(self, table_class: Base, data: pd.DataFrame, value_columns: List[str],
+                                chunk_size: Optional[int] = None, only_null_values: bool = False) -> int:
+        match_columns = [column_name for column_name in data.columns if column_name not in value_columns]
+        null_conditions = [getattr(table_class, column_name).is_(None) for column_name in value_columns] if only_null_values else []
+        for record in data.to_dict(orient="records"):
+            query = [getattr(table_class, column_name).is_not_distinct_from(record[column_name]) for column_name in match_columns]
+            query += null_conditions
+            self.update_records(table_class, query, {column_name: record[column_name] for column_name in value_columns})
+        return len(data)
+
+    def replace_records(self, table_class: Base, query, data: pd.DataFrame, chunk_size: Optional[int] = None) -> dict:
+        self.delete_records(table_class, query)
+        return self.upsert_records(table_class, data, chunk_size)
         
         
 class DataPersistenceORM(DataPersistence):
@@ -66,6 +111,10 @@ class DataPersistenceORM(DataPersistence):
     -----------
     database_url : str
         The URL of the database to persist data to.
+    upsert_chunk_size : int
+        Default number of rows sent per executemany call by upsert_records.
+    sqlite_profile : SQLitePerformanceProfile
+        Optional pragmas (WAL journal, synchronous, mmap, cache size, busy timeout) and pool settings of the engine.
     engine : sqlalchemy.engine.base.Engine
         The SQLAlchemy engine object used for connecting to the database.
     Session : sqlalchemy.orm.session.sessionmaker
@@ -74,13 +123,17 @@ class DataPersistenceORM(DataPersistence):
     Methods:
     --------
     create_table(table_class: sqlalchemy.ext.declarative.api.Base) -> None
-        Creates a new database table for the given SQLAlchemy Base class.
+        Creates the database tables for the given SQLAlchemy Base class and migrates the tables of an existing database.
 
     add_records(table_class: sqlalchemy.ext.declarative.api.Base, data: pandas.DataFrame) -> None
         Adds records to the database table for the given SQLAlchemy Base class using ORM and a pandas DataFrame.
 
     fetch_records(table_class: sqlalchemy.ext.declarative.api.Base, query: Union[str, List[ClauseElement]]=None) -> pandas.DataFrame
         Fetches records from the database table for the given SQLAlchemy Base class based on the query and returns as a DataFrame.
+        Runs a Core SELECT on the DBAPI cursor and builds the DataFrame with typed dtypes, without creating ORM objects.
+
+    fetch_records_orm(table_class: sqlalchemy.ext.declarative.api.Base, query: Union[str, List[ClauseElement]]=None) -> pandas.DataFrame
+        Same as fetch_records, loading every row as an ORM object. Kept for comparison with the Core path.
 
     delete_records(table_class: sqlalchemy.ext.declarative.api.Base, query: List[ClauseElement]) -> None
         Deletes records from the database table for the given SQLAlchemy Base class based on the query.
@@ -88,14 +141,41 @@ class DataPersistenceORM(DataPersistence):
     update_records(table_class: sqlalchemy.ext.declarative.api.Base, query: List[ClauseElement], update_data: dict) -> None
         Updates records in the database table for the given SQLAlchemy Base class based on the query and update data.
 
+    upsert_records(table_class: sqlalchemy.ext.declarative.api.Base, data: pandas.DataFrame, chunk_size: int=None) -> dict
+        Inserts or updates the records with INSERT ... ON CONFLICT DO UPDATE in chunked executemany calls within
+        one transaction, and returns the inserted and updated counts. The derived columns missing from the data
+        are reset to NULL on the updated records whose values change.
+
+    update_matching_records(table_class: sqlalchemy.ext.declarative.api.Base, data: pandas.DataFrame, value_columns: List[str], chunk_size: int=None, only_null_values: bool=False) -> int
+        Sets the value columns of the records whose primary key and other columns match the data, and whose value
+        columns are NULL with only_null_values, in chunked executemany UPDATE calls within one transaction, and
+        returns the number of updated records.
+
+    replace_records(table_class: sqlalchemy.ext.declarative.api.Base, query: List[ClauseElement], data: pandas.DataFrame, chunk_size: int=None) -> dict
+        Deletes the records matching the query and upserts the data within one transaction, so the readers never
+        see the records deleted without their replacement, and returns the inserted and updated counts.
+
+    fetch_distinct_values(table_class: sqlalchemy.ext.declarative.api.Base, column_name: str, query: List[ClauseElement]=None, limit: int=None, offset: int=0) -> list
+        Returns the sorted distinct values of the column with a loose index scan, paginated in the database.
+
     """
     
-    def __init__(self, database_url: str):
-        self.engine = create_engine(database_url)
+    def __init__(self, database_url: str, upsert_chunk_size: int = 50000,
+                 sqlite_profile: Optional[SQLitePerformanceProfile] = None):
+        self.sqlite_profile = sqlite_profile
+        if sqlite_profile is None:
+            self.engine = create_engine(database_url)
+        else:
+            self.engine = create_engine(database_url, **sqlite_profile.engine_kwargs(database_url))
+            sqlite_profile.apply(self.engine)
         self.Session = sessionmaker(bind=self.engine)
+        self.upsert_chunk_size = upsert_chunk_size
 
     def create_table(self, table_class: Base) -> None:
-        Base.metadata.create_all(self.engine)
+        # Create the tables declared on the given schema, with their primary keys and indexes,
+        # and bring the tables of an existing database to the same schema.
+        with self.engine.begin() as connection:
+            SchemaMigrator(table_class.metadata).migrate(connection)
 
     def add_records(self, table_class: Base, data: pd.DataFrame) -> None:
         session = self.Session()
@@ -108,7 +188,200 @@ class DataPersistenceORM(DataPersistence):
             session.commit()
             session.close()
 
+    def upsert_records(self, table_class: Base, data: pd.DataFrame, chunk_size: Optional[int] = None) -> dict:
+        try:
+            with self.engine.begin() as connection:
+                return self._upsert_dataframe(connection, table_class, data, chunk_size or self.upsert_chunk_size)
+        except Exception as err_msg:
+            raise ValueError(f"Error upserting records: {err_msg}")
+
+    @staticmethod
+    def _upsert_dataframe(connection, table_class: Base, data: pd.DataFrame, chunk_size: int) -> dict:
+        """
+        Upserts the data on the given connection, within the caller's transaction, and returns the inserted
+        and updated counts.
+        """
+        table = table_class.__table__
+        key_columns = [column.name for column in table.primary_key.columns]
+        column_names = list(data.columns)
+        value_columns = [column_name for column_name in column_names if column_name not in key_columns]
+
+        # Derived columns, e.g. the stored OptionPrice, are kept when an update leaves the other values unchanged
+        # and reset to NULL otherwise, so that only the new and changed records are computed again.
+        derived_columns = [column.name for column in table.columns
+                           if column.info.get('derived') and column.name not in column_names]
+
+        statement = sqlite_insert(table)
+        if value_columns:
+            set_values = {column_name: statement.excluded[column_name] for column_name in value_columns}
+            unchanged = and_(*[table.columns[column_name].is_not_distinct_from(statement.excluded[column_name])
+                               for column_name in value_columns])
+            for column_name in derived_columns:
+                set_values[column_name] = case((unchanged, table.columns[column_name]), else_=null())
+            statement = statement.on_conflict_do_update(index_elements=key_columns, set_=set_values)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+        compiled = statement.compile(dialect=connection.dialect, column_keys=column_names)
+        ordered_data = data[list(compiled.positiontup)]
+
+        # Rows inserted are counted on the partition (first key column) values touched by the upload.
+        partition_column = table.columns[key_columns[0]]
+        partition_values = [value.item() if hasattr(value, "item") else value for value in data[partition_column.name].unique()]
+        count_statement = select(func.count()).select_from(table).where(partition_column.in_(partition_values))
+
+        rows_before = connection.execute(count_statement).scalar_one()
+        cursor = connection.connection.cursor()
+        try:
+            for start in range(0, len(ordered_data), chunk_size):
+                chunk = ordered_data.iloc[start:start + chunk_size]
+                cursor.executemany(str(compiled), list(chunk.itertuples(index=False, name=None)))
+        finally:
+            cursor.close()
+        rows_after = connection.execute(count_statement).scalar_one()
+
+        inserted = rows_after - rows_before
+        return {"inserted": inserted, "updated": len(data) - inserted}
+
+    def update_matching_records(self, table_class: Base, data: pd.DataFrame, value_columns: List[str],
+                                chunk_size: Optional[int] = None, only_null_values: bool = False) -> int:
+        try:
+            with self.engine.begin() as connection:
+                return self._update_matching_dataframe(connection, table_class, data, value_columns,
+                                                       chunk_size or self.upsert_chunk_size, only_null_values)
+        except Exception as err_msg:
+            raise ValueError(f"Error updating records: {err_msg}")
+
+    def replace_records(self, table_class: Base, query: List[ClauseElement], data: pd.DataFrame,
+                        chunk_size: Optional[int] = None) -> dict:
+        try:
+            with self.engine.begin() as connection:
+                return self._replace_dataframe(connection, table_class, query, data, chunk_size or self.upsert_chunk_size)
+        except Exception as err_msg:
+            raise ValueError(f"Error replacing records: {err_msg}")
+
+    @staticmethod
+    def _replace_dataframe(connection, table_class: Base, query: List[ClauseElement], data: pd.DataFrame,
+                           chunk_size: int) -> dict:
+        """
+        Deletes the records matching the query and upserts the data on the given connection, within the caller's
+        transaction, and returns the inserted and updated counts.
+        """
+        connection.execute(delete(table_class.__table__).where(and_(*query)))
+        return DataPersistenceORM._upsert_dataframe(connection, table_class, data, chunk_size)
+
+    @staticmethod
+    def _update_matching_dataframe(connection, table_class: Base, data: pd.DataFrame, value_columns: List[str],
+                                   chunk_size: int, only_null_values: bool = False) -> int:
+        """
+        Updates the value columns of the records matching the other columns of the data on the given connection,
+        within the caller's transaction, and returns the number of updated records. The records changed since
+        the data was read no longer match and are left as they are, as are the records whose value columns
+        were set in the meantime with only_null_values.
+        """
+        table = table_class.__table__
+        match_columns = [column_name for column_name in data.columns if column_name not in value_columns]
+        # The primary key columns are compared with = to seek the record, the other ones with IS to match the NULLs.
+        key_columns = {column.name for column in table.primary_key.columns}
+        conditions = [table.columns[column_name] == bindparam("match_" + column_name) if column_name in key_columns
+                      else table.columns[column_name].is_not_distinct_from(bindparam("match_" + column_name))
+                      for column_name in match_columns]
+        if only_null_values:
+            conditions += [table.columns[column_name].is_(None) for column_name in value_columns]
+        statement = update(table).where(*conditions).values(
+            {column_name: bindparam("value_" + column_name) for column_name in value_columns})
+        compiled = statement.compile(dialect=connection.dialect)
+        ordered_data = data[[name.split("_", 1)[1] for name in compiled.positiontup]]
+
+        updated = 0
+        cursor = connection.connection.cursor()
+        try:
+            for start in range(0, len(ordered_data), chunk_size):
+                chunk = ordered_data.iloc[start:start + chunk_size]
+                cursor.executemany(str(compiled), list(chunk.itertuples(index=False, name=None)))
+                updated += cursor.rowcount
+        finally:
+            cursor.close()
+        return updated
+
     def fetch_records(self, table_class: Base, query: ClauseElement = None) -> pd.DataFrame:
+        try:
+            with self.engine.connect() as connection:
+                return self._fetch_dataframe(connection, table_class, query)
+        except Exception as err_msg:
+            raise ValueError(f"Error fetching records: {err_msg}")
+
+    @staticmethod
+    def _fetch_dataframe(connection, table_class: Base, query: ClauseElement = None) -> pd.DataFrame:
+        """
+        Runs the SELECT of the matching records on the DBAPI cursor of the given connection and returns the typed DataFrame.
+        """
+        statement = select(table_class.__table__)
+        if isinstance(query, str):
+            statement = statement.where(text(query))
+        elif query:
+            statement = statement.where(and_(*query))
+
+        # Run the compiled statement on the DBAPI cursor, rows come back as plain tuples.
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        # NumPy scalars are converted, sqlite3 would bind them as BLOBs through the buffer protocol.
+        parameters = [value.item() if isinstance(value, np.generic) else value
+                      for value in (compiled.params[name] for name in compiled.positiontup or ())]
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(str(compiled), parameters)
+            column_names = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return DataPersistenceORM._rows_to_dataframe(table_class, column_names, rows)
+
+    @staticmethod
+    def _rows_to_dataframe(table_class: Base, column_names: List[str], rows: list) -> pd.DataFrame:
+        """
+        Builds the DataFrame from the fetched tuples and sets the dtype of every column from its column type.
+        Integer columns holding NULL values are kept as float64.
+        """
+        columns = table_class.__table__.columns
+        df = pd.DataFrame.from_records(rows, columns=column_names, coerce_float=True)
+        for column_name in column_names:
+            column_type = columns[column_name].type
+            if isinstance(column_type, Integer) and not df[column_name].isna().any():
+                df[column_name] = df[column_name].astype(np.int64)
+            elif isinstance(column_type, (Integer, Float)):
+                df[column_name] = df[column_name].astype(np.float64)
+            else:
+                df[column_name] = df[column_name].astype(object)
+        return df
+
+    def fetch_distinct_values(self, table_class: Base, column_name: str, query: List[ClauseElement] = None,
+                              limit: Optional[int] = None, offset: int = 0) -> list:
+        statement = self._distinct_values_statement(table_class, column_name, query, limit, offset)
+        try:
+            with self.engine.connect() as connection:
+                return list(connection.execute(statement).scalars())
+        except Exception as err_msg:
+            raise ValueError(f"Error fetching distinct values: {err_msg}")
+
+    @staticmethod
+    def _distinct_values_statement(table_class: Base, column_name: str, query: List[ClauseElement] = None,
+                                   limit: Optional[int] = None, offset: int = 0):
+        # Loose index scan: every step jumps to the next value with MIN(column) > previous value through the
+        # index on the column, so the cost grows with the number of distinct values and not with the table size.
+        column = table_class.__table__.columns[column_name]
+        conditions = list(query) if query else []
+        distinct_values = select(func.min(column).label("value")).where(*conditions).cte("distinct_values", recursive=True)
+        next_value = select(func.min(column)).where(column > distinct_values.c.value, *conditions).scalar_subquery()
+        distinct_values = distinct_values.union_all(select(next_value).where(distinct_values.c.value.is_not(None)))
+
+        # Recursive rows come out in ascending order, without ORDER BY the LIMIT also stops the recursion.
+        statement = select(distinct_values.c.value).where(distinct_values.c.value.is_not(None))
+        if limit is not None:
+            statement = statement.limit(limit)
+        if offset:
+            statement = statement.offset(offset)
+        return statement
+
+    def fetch_records_orm(self, table_class: Base, query: ClauseElement = None) -> pd.DataFrame:
         try:
             session = self.Session()
             ct = datetime.datetime.now()
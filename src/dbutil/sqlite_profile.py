@@ -0,0 +1,99 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import List
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+class SQLitePerformanceProfile:
+    """
+    SQLitePerformanceProfile class holds the pragmas and the connection pool settings of the SQLite engines.
+    The pragmas are run on every new DBAPI connection through the engine connect event.
+
+    With the WAL journal mode the readers work on the last committed snapshot and are not blocked by the uploads,
+    and synchronous=NORMAL only syncs the WAL file at checkpoints, which is safe in WAL mode.
+
+    Attributes:
+    -----------
+    journal_mode : str
+        PRAGMA journal_mode, one of DELETE, TRUNCATE, PERSIST, MEMORY, WAL or OFF.
+    synchronous : str
+        PRAGMA synchronous, one of OFF, NORMAL, FULL or EXTRA.
+    mmap_size : int
+        PRAGMA mmap_size, number of bytes of the database file read through memory mapping.
+    cache_size : int
+        PRAGMA cache_size, number of pages or, when negative, KiB of page cache per connection.
+    busy_timeout : int
+        PRAGMA busy_timeout, milliseconds a connection waits for a lock before failing with "database is locked".
+    pool_size : int
+        Number of connections kept open by the engine pool.
+    max_overflow : int
+        Number of connections opened above pool_size under load.
+
+    Methods:
+    --------
+    from_config(database_config) -> SQLitePerformanceProfile
+        Reads the profile from the DATABASE section of config.ini, the missing keys keep their default values.
+    pragma_statements() -> List[str]
+        Returns the PRAGMA statements run on every new connection.
+    engine_kwargs(database_url: str, async_engine: bool) -> dict
+        Returns the pool arguments for create_engine or create_async_engine.
+    apply(engine) -> None
+        Registers the connect event running the pragmas on the given (sync) engine.
+    """
+
+    def __init__(self, journal_mode: str = 'WAL', synchronous: str = 'NORMAL', mmap_size: int = 268435456,
+                 cache_size: int = -65536, busy_timeout: int = 5000, pool_size: int = 8, max_overflow: int = 8):
+        self.journal_mode = journal_mode.upper()
+        self.synchronous = synchronous.upper()
+        if self.journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Invalid journal_mode {journal_mode}. Supported modes: " + ", ".join(JOURNAL_MODES))
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous {synchronous}. Supported modes: " + ", ".join(SYNCHRONOUS_MODES))
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        self.busy_timeout = int(busy_timeout)
+        self.pool_size = int(pool_size)
+        self.max_overflow = int(max_overflow)
+
+    @classmethod
+    def from_config(cls, database_config) -> "SQLitePerformanceProfile":
+        default_profile = cls()
+        return cls(journal_mode=database_config.get('journal_mode', fallback=default_profile.journal_mode),
+                   synchronous=database_config.get('synchronous', fallback=default_profile.synchronous),
+                   mmap_size=database_config.getint('mmap_size', fallback=default_profile.mmap_size),
+                   cache_size=database_config.getint('cache_size', fallback=default_profile.cache_size),
+                   busy_timeout=database_config.getint('busy_timeout', fallback=default_profile.busy_timeout),
+                   pool_size=database_config.getint('pool_size', fallback=default_profile.pool_size),
+                   max_overflow=database_config.getint('max_overflow', fallback=default_profile.max_overflow))
+
+    def pragma_statements(self) -> List[str]:
+        return [f"PRAGMA journal_mode={self.journal_mode}",
+                f"PRAGMA synchronous={self.synchronous}",
+                f"PRAGMA mmap_size={self.mmap_size}",
+                f"PRAGMA cache_size={self.cache_size}",
+                f"PRAGMA busy_timeout={self.busy_timeout}"]
+
+    def engine_kwargs(self, database_url: str, async_engine: bool = False) -> dict:
+        # In-memory databases live in a single connection and keep the default pool of the dialect.
+        if make_url(database_url).database in (None, '', ':memory:'):
+            return {}
+        return {"poolclass": AsyncAdaptedQueuePool if async_engine else QueuePool,
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                # The pooled connections are used by the threads of the TaskDispatcher.
+                "connect_args": {"check_same_thread": False}}
+
+    def apply(self, engine) -> None:
+        pragma_statements = self.pragma_statements()
+
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma_statement in pragma_statements:
+                    cursor.execute(pragma_statement)
+            finally:
+                cursor.close()
+
+        event.listen(engine, "connect", set_sqlite_pragmas)
@@ -10,6 +10,7 @@ from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, Span, Label, Legend
 import base64
 import numpy as np
+import pyarrow as pa
 
 class DataAnalysisPage(IWebPage):
 
@@ -54,14 +55,8 @@ class DataAnalysisPage(IWebPage):
                     url_fetch_unique_dates =  "http://" + host + ":" + port  + config_url_fetch_unique_dates                
                     response_unique_dates = requests.get(url_fetch_unique_dates)
                     if response_unique_dates.status_code == 200:
-                        response_unique_dates_str = response_unique_dates.text
-
-                        # Parse the top-level JSON object
-                        response_unique_dates_obj = json.loads(response_unique_dates_str)
-
-                        # Extract the "success" value as a string
-                        dates_str = response_unique_dates_obj["success"]
-                        dates_arr = json.loads(dates_str)
+                        # The v2 end point returns a plain JSON array of dates, decoded once.
+                        dates_arr = response_unique_dates.json()
                         unique_dates = pd.DataFrame(dates_arr, columns=["date"])
                         # Convert the date column to datetime objects (for formatting)
                         unique_dates["date"] = pd.to_datetime(unique_dates["date"], format="%Y%m%d")
@@ -93,12 +88,11 @@ class DataAnalysisPage(IWebPage):
                             market_data_fetch_api_end_point =  "http://" + host + ":" + port  + "/" + config_url_fetch_data_as_of                              
                             url_option_price_data_fetch_asof =  market_data_fetch_api_end_point + selected_date_yyyymmdd 
                             
-                            response_marekt_data_selected_date = requests.get(url_option_price_data_fetch_asof)
-                            response_selected_market_data = response_marekt_data_selected_date.text
-                            response_selected_dates_obj = json.loads(response_selected_market_data)
-                            response_selected_dates_str = response_selected_dates_obj["success"]
-                            response_selected_dates_str =  json.loads(response_selected_dates_str)
-                            option_price_data_df = self.format_the_data_frame_for_printing(pd.DataFrame(response_selected_dates_str))
+                            # Ask for an Arrow IPC stream, the columns are read directly without parsing JSON text.
+                            response_marekt_data_selected_date = requests.get(url_option_price_data_fetch_asof,
+                                                                              headers={"Accept": "application/vnd.apache.arrow.stream"})
+                            option_price_data = pa.ipc.open_stream(response_marekt_data_selected_date.content).read_pandas()
+                            option_price_data_df = self.format_the_data_frame_for_printing(option_price_data)
 
                             self.write_this_data_in_C1(container_R1, option_price_data_df)
                             self.create_option_pricing_plot(container_R2, option_price_data_df)
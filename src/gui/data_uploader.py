@@ -6,6 +6,7 @@ import requests
 import os
 import io        
 import json
+import time
 from util.file_read_util import DataProcessingUtilities
 
 class DataUploadPage(IWebPage):
@@ -14,7 +15,13 @@ class DataUploadPage(IWebPage):
         to give option to upload the market data from a CSV or Excel. When any other file formatters are 
         provided it shows an error messages. When the data is successfully uploaded, it shows the uploaded data 
         in a data frame.
+        The upload runs as a background job of the API, the page polls its status and shows the rows stored so far.
     """    
+    # Seconds between two polls of the upload job status.
+    JOB_POLL_INTERVAL = 0.5
+    # Seconds the page waits for the upload job before giving up.
+    JOB_TIMEOUT = 600
+
     def __init__(self, config_file, session_state):
         super().__init__(config_file=config_file, session_state=session_state)
         self.file = None      
@@ -55,12 +62,10 @@ class DataUploadPage(IWebPage):
         DataProcessingUtilities.validate_file_type(_self.file.name)
         market_data_df = DataProcessingUtilities.read_file(_self.file.name)
         
-        market_data_df_for_json = market_data_df
-        market_data_df_for_json.reset_index()
-        json_market_data = market_data_df_for_json.to_json(orient='records')
-        #json_market_data = market_data_df.to_json(orient='split')  
-        json_object = json.loads(json_market_data)
-        response = requests.post(url, json={"data": json_object})
+        # The columnar layout is converted straight into typed arrays by the API.
+        response = requests.post(url, json=market_data_df.to_dict(orient='list'))
+        if response.status_code == 202:
+            response = _self.wait_for_job(response.json()["JobId"])
 
         if response.status_code == 200:
             try:
@@ -71,10 +76,39 @@ class DataUploadPage(IWebPage):
                 market_data_df["DateAsOf"] = pd.to_datetime(market_data_df["DateAsOf"], format="%Y%m%d").dt.strftime("%Y-%m-%d")
                 market_data_df["FutureExpiryDate"] = pd.to_datetime(market_data_df["FutureExpiryDate"], format="%Y%m%d").dt.strftime("%Y-%m-%d")
 
-                st.session_state.json_market_data   = json_market_data;
                 st.session_state["recent_uploaded_market_data"] = market_data_df;
 
             except Exception as e:
                 raise ValueError(str(e))
         else:
             raise ValueError(response.text)
+
+    def wait_for_job(self, job_id: str) -> requests.Response:
+        """
+        Polls the status of the job until it is done or failed, showing its progress,
+        and returns the response of its result. The polls failing to connect, e.g. while the API restarts,
+        are retried until JOB_TIMEOUT.
+        """
+        host = self.config.get("API", "host")
+        port = self.config.get("API", "port")
+        job_url = "http://" + host + ":" + port + self.config.get("GUI_URLS", "jobStatusURL") + job_id
+        progress_bar = st.progress(0.0)
+        deadline = time.monotonic() + self.JOB_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                response = requests.get(job_url, timeout=self.JOB_POLL_INTERVAL * 10)
+            except requests.ConnectionError:
+                time.sleep(self.JOB_POLL_INTERVAL)
+                continue
+            if response.status_code != 200:
+                raise ValueError(response.text)
+            job_state = response.json()
+            if job_state["RowsTotal"]:
+                progress_bar.progress(min(job_state["RowsProcessed"] / job_state["RowsTotal"], 1.0),
+                                      text=f"{job_state['RowsProcessed']} of {job_state['RowsTotal']} rows stored")
+            if job_state["Status"] == "failed":
+                raise ValueError(job_state["Error"])
+            if job_state["Status"] == "done":
+                return requests.get(job_url + "/result")
+            time.sleep(self.JOB_POLL_INTERVAL)
+        raise ValueError(f"The upload job {job_id} did not finish within {self.JOB_TIMEOUT} seconds.")
@@ -0,0 +1,115 @@
+import pandas as pd
+import numpy as np
+from scipy.special import ndtr
+from models.b76_model import B76OptionPricer, black_76_d1_d2
+from models.b76_jit import black_76_greeks_jit
+
+GREEK_COLUMNS = ['Delta', 'Gamma', 'Vega', 'Theta', 'Rho', 'Vanna', 'Volga']
+
+def _normal_pdf(x):
+    return np.exp(-0.5 * x ** 2) / np.sqrt(2.0 * np.pi)
+
+def black_76_greeks(F, K, sigma, T, r, is_call) -> dict:
+    """
+    Vectorized first and second order greeks of the Black-76 price used in B76OptionPricer.
+    All greeks are computed in a single pass from the shared d1, d2 and discount factor intermediates.
+
+    The d1 used by the pricer carries the risk-free rate, so F * n(d1) and K * n(d2) differ by the discount
+    factor and the greeks below are the exact derivatives of that price (they reduce to the textbook
+    Black-76 greeks when r = 0). Theta is the decay per year of time to maturity and Rho is per unit of rate.
+
+    Parameters
+    ----------
+    F, K, sigma, T, r : array-like
+        Future price, strike price, implied volatility, time to maturity in years and risk-free rate.
+    is_call : array-like of bool
+        True for call options and False for put options.
+    Returns
+    -------
+    dict
+        OptionPrice and the greeks listed in GREEK_COLUMNS as NumPy arrays.
+    """
+    d1, d2, D = black_76_d1_d2(F, K, sigma, T, r)
+    omega = np.where(is_call, 1.0, -1.0)
+    sqrt_T = np.sqrt(T)
+    v = sigma * sqrt_T
+    pdf_d1 = _normal_pdf(d1)
+    F_pdf_d1 = F * pdf_d1
+
+    price = D * omega * (F * ndtr(omega * d1) - K * ndtr(omega * d2))
+
+    # Derivatives of d1 and d2 with respect to time to maturity.
+    d_common_dT = r / v - (d1 - 0.5 * v) / (2.0 * T)
+    d1_dT = d_common_dT + v / (4.0 * T)
+    d2_dT = d_common_dT - v / (4.0 * T)
+
+    vega, volga = _vega_volga(F_pdf_d1, d1, d2, D, sqrt_T, v)
+    return {
+        'OptionPrice': price,
+        'Delta': D * omega * ndtr(omega * d1) + pdf_d1 * (D - 1.0) / v,
+        'Gamma': pdf_d1 / (F * v) * (D - (D - 1.0) * d1 / v),
+        'Vega': vega,
+        'Theta': r * price - F_pdf_d1 * (D * d1_dT - d2_dT),
+        'Rho': -T * price + F_pdf_d1 * T * (D - 1.0) / v,
+        'Vanna': pdf_d1 * sqrt_T / v * (-D * d2 + (D - 1.0) * (d1 * d2 - 1.0) / v),
+        'Volga': volga,
+    }
+
+def black_76_price_vega_volga(F, K, sigma, T, r, is_call) -> tuple:
+    """
+    Vectorized Black-76 price with its first and second derivatives in volatility only.
+    Used by the implied volatility solver, which does not need the other greeks.
+
+    Returns
+    -------
+    tuple
+        (price, vega, volga) as NumPy arrays.
+    """
+    d1, d2, D = black_76_d1_d2(F, K, sigma, T, r)
+    omega = np.where(is_call, 1.0, -1.0)
+    sqrt_T = np.sqrt(T)
+    price = D * omega * (F * ndtr(omega * d1) - K * ndtr(omega * d2))
+    vega, volga = _vega_volga(F * _normal_pdf(d1), d1, d2, D, sqrt_T, sigma * sqrt_T)
+    return price, vega, volga
+
+def _vega_volga(F_pdf_d1, d1, d2, D, sqrt_T, v) -> tuple:
+    vega = F_pdf_d1 * sqrt_T * (d1 - D * d2) / v
+    volga = F_pdf_d1 * sqrt_T ** 2 * (d1 * d2 * (d1 - D * d2) + (D - 1.0) * (d1 + d2)) / v ** 2
+    return vega, volga
+
+class B76GreeksCalculator(B76OptionPricer):
+    """
+    A class used to calculate the Black-76 option prices together with their greeks. Inherits from B76OptionPricer.
+    Methods
+    -------
+    calculate_option_greeks() -> pd.DataFrame
+        Calculate the option prices and greeks in one vectorized pass, or one numba loop, and return the updated DataFrame.
+    """
+
+    def calculate_option_greeks(self) -> pd.DataFrame:
+        """
+        Calculate the option prices and greeks (Delta, Gamma, Vega, Theta, Rho, Vanna, Volga)
+        using the Black-76 model and return the updated DataFrame.
+
+        Returns
+        -------
+        pd.DataFrame
+            The updated DataFrame containing the calculated option prices and greeks.
+        """
+        option_greeks = self.market_data
+        T, r = self.time_to_maturity_and_rates(option_greeks)
+        model_inputs = (
+            option_greeks['CurrentPrice'].to_numpy(dtype=np.float64),
+            option_greeks['StrikePrice'].to_numpy(dtype=np.float64),
+            option_greeks['ImpliedVol'].to_numpy(dtype=np.float64),
+            T,
+            r,
+            (option_greeks['OptionType'] == 'Call').to_numpy(),
+        )
+        # The numba kernel is used when numba is installed, the NumPy engine otherwise.
+        greeks = black_76_greeks_jit(*model_inputs)
+        if greeks is None:
+            greeks = black_76_greeks(*model_inputs)
+        for column, values in greeks.items():
+            option_greeks[column] = values
+        return option_greeks
@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+from models.b76_model import B76OptionPricer
+from models.b76_greeks import black_76_price_vega_volga
+
+MIN_IMPLIED_VOL = 1e-4
+MAX_IMPLIED_VOL = 5.0
+PRICE_TOLERANCE = 1e-10
+VOL_TOLERANCE = 1e-12
+MAX_ITERATIONS = 100
+
+def black_76_implied_vol(price, F, K, T, r, is_call,
+                         initial_vol: float = 0.3, max_iterations: int = MAX_ITERATIONS) -> np.ndarray:
+    """
+    Vectorized inversion of the Black-76 price into an implied volatility.
+
+    Every element runs Halley iterations (Newton corrected with volga) inside a [low, high] bracket which is
+    tightened after each evaluation. When a step leaves the bracket or vega vanishes, the element falls back
+    to bisecting its bracket. Converged elements are masked out, so each iteration only evaluates the
+    elements that are still active.
+
+    The rate term in the pricer's d1 makes the price decrease with the volatility for deep in or out of the
+    money options at very low volatilities, so the lower end of the bracket starts where vega turns positive
+    and the solver returns the root on the increasing branch of the price.
+
+    Parameters
+    ----------
+    price, F, K, T, r : array-like
+        Option price, future price, strike price, time to maturity in years and risk-free rate.
+    is_call : array-like of bool
+        True for call options and False for put options.
+    Returns
+    -------
+    np.ndarray
+        The implied volatilities, NaN where the price is outside the range reachable by the model.
+    """
+    price, F, K, T, r, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(F, dtype=np.float64), np.asarray(K, dtype=np.float64),
+        np.asarray(T, dtype=np.float64), np.asarray(r, dtype=np.float64), np.asarray(is_call, dtype=bool))
+    price, F, K, T, r, is_call = (array.ravel() for array in (price, F, K, T, r, is_call))
+    number_of_options = price.size
+
+    implied_vol = np.full(number_of_options, np.nan)
+    low = np.maximum(_vega_sign_change_vol(F, K, T, r), MIN_IMPLIED_VOL)
+    high = np.full(number_of_options, MAX_IMPLIED_VOL)
+
+    price_low = black_76_price_vega_volga(F, K, low, T, r, is_call)[0]
+    price_high = black_76_price_vega_volga(F, K, high, T, r, is_call)[0]
+    solvable = np.isfinite(price) & (T > 0) & (price >= price_low) & (price <= price_high)
+
+    active = np.flatnonzero(solvable)
+    sigma = np.clip(initial_vol, low[active], high[active])
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        model_price, vega, volga = black_76_price_vega_volga(F[active], K[active], sigma, T[active], r[active], is_call[active])
+        difference = model_price - price[active]
+
+        # The price increases with the volatility, so the sign of the difference tightens the bracket.
+        above = difference > 0
+        high[active] = np.where(above, sigma, high[active])
+        low[active] = np.where(above, low[active], sigma)
+
+        converged = (np.abs(difference) < PRICE_TOLERANCE) | (high[active] - low[active] < VOL_TOLERANCE)
+        implied_vol[active[converged]] = sigma[converged]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton_step = difference / vega
+            halley_step = newton_step / (1.0 - 0.5 * newton_step * volga / vega)
+            next_sigma = sigma - halley_step
+        bisection = ~np.isfinite(next_sigma) | (next_sigma <= low[active]) | (next_sigma >= high[active])
+        next_sigma = np.where(bisection, 0.5 * (low[active] + high[active]), next_sigma)
+
+        still_active = ~converged
+        active = active[still_active]
+        sigma = next_sigma[still_active]
+
+    return implied_vol
+
+def _vega_sign_change_vol(F, K, T, r) -> np.ndarray:
+    """
+    Volatility above which vega is positive. Vega has the sign of m * (1 - D) + v ** 2 * (1 + D) / 2
+    with m = log(F / K) + r * T, D the discount factor and v = sigma * sqrt(T).
+    """
+    m = np.log(F / K) + r * T
+    D = np.exp(-r * T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(np.maximum(-2.0 * m * (1.0 - D) / (1.0 + D), 0.0) / T)
+
+class B76ImpliedVolSolver(B76OptionPricer):
+    """
+    A class used to derive the implied volatilities from option prices using the Black-76 model.
+    Inherits from B76OptionPricer.
+    Methods
+    -------
+    calculate_implied_vols(price_column: str) -> pd.DataFrame
+        Fill the ImpliedVol column from the prices in price_column and return the updated DataFrame.
+    """
+
+    def calculate_implied_vols(self, price_column: str = 'SettlementPrice') -> pd.DataFrame:
+        """
+        Calculate the implied volatilities for the rows having a price in price_column and no ImpliedVol.
+
+        Parameters
+        ----------
+        price_column : str
+            Name of the column holding the option prices to invert.
+        Returns
+        -------
+        pd.DataFrame
+            The updated DataFrame with the derived implied volatilities.
+        """
+        market_data = self.market_data
+        if 'ImpliedVol' not in market_data.columns:
+            market_data['ImpliedVol'] = np.nan
+        missing_vol = (market_data['ImpliedVol'].isna() & market_data[price_column].notna()).to_numpy()
+        if not missing_vol.any():
+            return market_data
+
+        rows = market_data.loc[missing_vol]
+        T, r = self.time_to_maturity_and_rates(rows)
+        market_data.loc[missing_vol, 'ImpliedVol'] = black_76_implied_vol(
+            rows[price_column].to_numpy(dtype=np.float64),
+            rows['CurrentPrice'].to_numpy(dtype=np.float64),
+            rows['StrikePrice'].to_numpy(dtype=np.float64),
+            T,
+            r,
+            (rows['OptionType'] == 'Call').to_numpy(),
+        )
+        return market_data
@@ -0,0 +1,71 @@
+import importlib.util
+import logging
+import threading
+import numpy as np
+from typing import Optional
+
+"""
+This module provides the optional numba engine of the Black-76 price and greeks.
+
+numba is detected at import time without being imported. The kernels of models.b76_jit_kernels are loaded,
+and compiled or read from the on-disk cache, on the first call, so neither the API startup nor the processes
+which never price pay for it. Without numba, or when the kernels fail to load, the callers keep the NumPy engine.
+"""
+
+logger = logging.getLogger(__name__)
+
+JIT_AVAILABLE = importlib.util.find_spec('numba') is not None
+GREEK_ROWS = ['OptionPrice', 'Delta', 'Gamma', 'Vega', 'Theta', 'Rho', 'Vanna', 'Volga']
+
+_kernels = None
+_kernels_lock = threading.Lock()
+
+def load_kernels():
+    """
+    Returns the models.b76_jit_kernels module, or None when numba is missing or the kernels fail to load.
+    """
+    global _kernels, JIT_AVAILABLE
+    if _kernels is None and JIT_AVAILABLE:
+        with _kernels_lock:
+            if _kernels is None and JIT_AVAILABLE:
+                try:
+                    from models import b76_jit_kernels
+                    _kernels = b76_jit_kernels
+                except Exception as err_msg:
+                    logger.warning(f"numba kernels unavailable, falling back to NumPy: {err_msg}")
+                    JIT_AVAILABLE = False
+    return _kernels
+
+def _kernel_inputs(F, K, sigma, T, r, is_call) -> tuple:
+    arrays = [np.asarray(F, dtype=np.float64), np.asarray(K, dtype=np.float64), np.asarray(sigma, dtype=np.float64),
+              np.asarray(T, dtype=np.float64), np.asarray(r, dtype=np.float64), np.asarray(is_call, dtype=np.bool_)]
+    shape = np.broadcast_shapes(*(array.shape for array in arrays))
+    # Only the scalars and smaller arrays are broadcast and copied, the full columns are passed as they are.
+    return shape, [np.ascontiguousarray(array if array.shape == shape else np.broadcast_to(array, shape)).ravel()
+                   for array in arrays]
+
+def black_76_price_jit(F, K, sigma, T, r, is_call) -> Optional[np.ndarray]:
+    """
+    Black-76 option price computed by the numba kernel, None when the JIT engine is unavailable.
+    Takes the same arguments as black_76_price.
+    """
+    kernels = load_kernels()
+    if kernels is None:
+        return None
+    shape, inputs = _kernel_inputs(F, K, sigma, T, r, is_call)
+    option_price = np.empty(inputs[0].size)
+    kernels.black_76_price_kernel(*inputs, option_price)
+    return option_price.reshape(shape)
+
+def black_76_greeks_jit(F, K, sigma, T, r, is_call) -> Optional[dict]:
+    """
+    Black-76 option price and greeks computed by the numba kernel, None when the JIT engine is unavailable.
+    Takes the same arguments and returns the same columns as black_76_greeks.
+    """
+    kernels = load_kernels()
+    if kernels is None:
+        return None
+    shape, inputs = _kernel_inputs(F, K, sigma, T, r, is_call)
+    greeks = np.empty((len(GREEK_ROWS), inputs[0].size))
+    kernels.black_76_greeks_kernel(*inputs, greeks)
+    return {column: values.reshape(shape) for column, values in zip(GREEK_ROWS, greeks)}
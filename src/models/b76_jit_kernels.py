@@ -0,0 +1,72 @@
+import math
+import os
+from numba import config, njit, prange
+
+# The kernels are launched from the TaskDispatcher threads, so the threading layer must be thread safe. TBB hangs
+# at exit once it has been launched from a thread other than the main one, OpenMP is tried first when the layer
+# is not chosen with NUMBA_THREADING_LAYER or NUMBA_THREADING_LAYER_PRIORITY. Only the numba configuration of
+# this process is changed, the environment inherited by the child processes is left as it is.
+if 'NUMBA_THREADING_LAYER' not in os.environ and 'NUMBA_THREADING_LAYER_PRIORITY' not in os.environ:
+    config.THREADING_LAYER_PRIORITY = ['omp', 'tbb', 'workqueue']
+
+"""
+This module holds the numba kernels of the Black-76 price and greeks. It imports numba and is only imported
+by models.b76_jit on the first call of a JIT function, so the API starts without loading numba.
+
+Every kernel is a single fused loop over the options, split across the cores with prange, writing into
+preallocated output arrays without any temporary array. The kernels are compiled on their first call and
+cached on disk next to this file, so the next processes load the machine code instead of compiling again.
+The formulas are the ones of black_76_price and black_76_greeks, with d1 carrying the risk-free rate.
+"""
+
+SQRT_2 = math.sqrt(2.0)
+SQRT_2_PI = math.sqrt(2.0 * math.pi)
+
+# error_model='numpy' returns inf/NaN on a division by zero like the NumPy engine instead of raising.
+JIT_OPTIONS = dict(nogil=True, cache=True, error_model='numpy')
+
+@njit(inline='always', **JIT_OPTIONS)
+def _normal_cdf(x):
+    # erfc keeps the precision of the left tail, where 1 + erf(x) would cancel.
+    return 0.5 * math.erfc(-x / SQRT_2)
+
+@njit(inline='always', **JIT_OPTIONS)
+def _normal_pdf(x):
+    return math.exp(-0.5 * x * x) / SQRT_2_PI
+
+@njit(parallel=True, **JIT_OPTIONS)
+def black_76_price_kernel(F, K, sigma, T, r, is_call, option_price):
+    for i in prange(F.size):
+        sqrt_T = math.sqrt(T[i])
+        v = sigma[i] * sqrt_T
+        d1 = (math.log(F[i] / K[i]) + (r[i] + 0.5 * sigma[i] * sigma[i]) * T[i]) / v
+        d2 = d1 - v
+        omega = 1.0 if is_call[i] else -1.0
+        option_price[i] = math.exp(-r[i] * T[i]) * omega * (F[i] * _normal_cdf(omega * d1) - K[i] * _normal_cdf(omega * d2))
+
+@njit(parallel=True, **JIT_OPTIONS)
+def black_76_greeks_kernel(F, K, sigma, T, r, is_call, greeks):
+    # greeks rows: OptionPrice, Delta, Gamma, Vega, Theta, Rho, Vanna, Volga.
+    for i in prange(F.size):
+        sqrt_T = math.sqrt(T[i])
+        v = sigma[i] * sqrt_T
+        d1 = (math.log(F[i] / K[i]) + (r[i] + 0.5 * sigma[i] * sigma[i]) * T[i]) / v
+        d2 = d1 - v
+        D = math.exp(-r[i] * T[i])
+        omega = 1.0 if is_call[i] else -1.0
+        pdf_d1 = _normal_pdf(d1)
+        F_pdf_d1 = F[i] * pdf_d1
+        price = D * omega * (F[i] * _normal_cdf(omega * d1) - K[i] * _normal_cdf(omega * d2))
+
+        d_common_dT = r[i] / v - (d1 - 0.5 * v) / (2.0 * T[i])
+        d1_dT = d_common_dT + v / (4.0 * T[i])
+        d2_dT = d_common_dT - v / (4.0 * T[i])
+
+        greeks[0, i] = price
+        greeks[1, i] = D * omega * _normal_cdf(omega * d1) + pdf_d1 * (D - 1.0) / v
+        greeks[2, i] = pdf_d1 / (F[i] * v) * (D - (D - 1.0) * d1 / v)
+        greeks[3, i] = F_pdf_d1 * sqrt_T * (d1 - D * d2) / v
+        greeks[4, i] = r[i] * price - F_pdf_d1 * (D * d1_dT - d2_dT)
+        greeks[5, i] = -T[i] * price + F_pdf_d1 * T[i] * (D - 1.0) / v
+        greeks[6, i] = pdf_d1 * sqrt_T / v * (-D * d2 + (D - 1.0) * (d1 * d2 - 1.0) / v)
+        greeks[7, i] = F_pdf_d1 * T[i] * (d1 * d2 * (d1 - D * d2) + (D - 1.0) * (d1 + d2)) / (v * v)
@@ -1,24 +1,253 @@
 import pandas as pd
 import numpy as np
+import threading
+from abc import abstractmethod
 import scipy.stats as stats
+from scipy.special import ndtr
 from models.option_pricer_interface import IOptionPricer
+from models.discount_curve import DiscountCurve, curve_zero_rates
+from models.b76_jit import black_76_price_jit
+from typing import Mapping, Optional
 
 RISK_FREE_RATE = 0.05
+SETTLEMENT_LAG_MONTHS = 2
+DAYS_IN_YEAR = 365
+# Optional market data column of the normal volatilities, in price units, of the options quoted with one.
+NORMAL_VOL_COLUMN = 'NormalVol'
 
-class B76OptionPricer(IOptionPricer):
+# Number of distinct (DateAsOf, FutureExpiryDate) pairs kept by the time to maturity lookup table.
+MAX_CACHED_DATE_PAIRS = 100_000
+
+class TimeToMaturityTable:
+    """
+    Memoized time to maturity of every distinct (DateAsOf, FutureExpiryDate) pair, kept across requests.
+    An option chain has only a handful of distinct date pairs, so the dates are parsed once per new pair and
+    the year fractions are broadcast to the rows through the factorized pair keys. The table is shared by the
+    threads of the pricing pool, the lookups and clears hold a lock.
+
+    Attributes
+    ----------
+    max_entries : int
+        Number of date pairs kept per settlement lag, the table is emptied when it is exceeded.
+
+    Methods
+    -------
+    lookup(date_as_of, future_expiry_date, settlement_lag_months) -> np.ndarray
+        Time to maturity in years of every row.
+    clear() -> None
+        Empties the table.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_DATE_PAIRS):
+        self.max_entries = max_entries
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, date_as_of, future_expiry_date, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS) -> np.ndarray:
+        # YYYYMMDD dates have 8 digits, both dates fit in one int64 key.
+        pair_keys = np.asarray(date_as_of, dtype=np.int64) * 100_000_000 + np.asarray(future_expiry_date, dtype=np.int64)
+        pair_codes, unique_keys = pd.factorize(pair_keys.ravel())
+        # The check, the update and the read of the table are done under the lock, a concurrent clear or
+        # overflow cannot drop the pairs between them.
+        with self._lock:
+            table = self._tables.setdefault(settlement_lag_months, {})
+            missing_keys = [key for key in unique_keys.tolist() if key not in table]
+            if missing_keys:
+                if len(table) + len(missing_keys) > self.max_entries:
+                    table.clear()
+                missing_keys = np.array(missing_keys, dtype=np.int64)
+                missing_T = _year_fractions(missing_keys // 100_000_000, missing_keys % 100_000_000, settlement_lag_months)
+                table.update(zip(missing_keys.tolist(), missing_T.tolist()))
+            unique_T = np.array([table[key] for key in unique_keys.tolist()], dtype=np.float64)
+        return unique_T[pair_codes].reshape(pair_keys.shape)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+TIME_TO_MATURITY_TABLE = TimeToMaturityTable()
+
+def _year_fractions(date_as_of, future_expiry_date, settlement_lag_months: int) -> np.ndarray:
+    date_as_of = pd.to_datetime(pd.Series(date_as_of).astype(str), format='%Y%m%d')
+    future_expiry_date = pd.to_datetime(pd.Series(future_expiry_date).astype(str), format='%Y%m%d')
+    settlement_date = future_expiry_date - pd.DateOffset(months=settlement_lag_months)
+    return (settlement_date - date_as_of).dt.days.to_numpy(dtype=np.float64) / DAYS_IN_YEAR
+
+def time_to_maturity(date_as_of, future_expiry_date, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS) -> np.ndarray:
+    """
+    Vectorized conversion of the YYYYMMDD integer dates into year fractions.
+    The settlement date is taken settlement_lag_months (2 months as mentioned in the assignment document)
+    before the future expiry date. The year fractions are looked up once per distinct date pair in
+    TIME_TO_MATURITY_TABLE, without parsing the dates of every row.
+
+    Parameters
+    ----------
+    date_as_of : array-like
+        Market data dates in YYYYMMDD format.
+    future_expiry_date : array-like
+        Future expiry dates in YYYYMMDD format.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date.
+    Returns
+    -------
+    np.ndarray
+        Time to maturity in years for every element.
+    """
+    return TIME_TO_MATURITY_TABLE.lookup(date_as_of, future_expiry_date, settlement_lag_months)
+
+def black_76_d1_d2(F, K, sigma, T, r):
+    """
+    Shared Black-76 intermediates used by the pricing, greeks and implied vol calculations.
+
+    Returns
+    -------
+    tuple
+        (d1, d2, discount_factor) as NumPy arrays broadcast against the inputs.
+    """
+    sqrt_T = np.sqrt(T)
+    sigma_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(F / K) + (r + 0.5 * sigma ** 2) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+    discount_factor = np.exp(-r * T)
+    return d1, d2, discount_factor
+
+def black_76_price(F, K, sigma, T, r, is_call) -> np.ndarray:
+    """
+    Vectorized Black-76 option price for whole columns at once.
+    A single call/put sign (+1 for calls, -1 for puts) is used instead of evaluating both formulas.
+
+    Parameters
+    ----------
+    F, K, sigma, T, r : array-like
+        Future price, strike price, implied volatility, time to maturity in years and risk-free rate.
+    is_call : array-like of bool
+        True for call options and False for put options.
+    Returns
+    -------
+    np.ndarray
+        The calculated option prices.
+    """
+    d1, d2, discount_factor = black_76_d1_d2(F, K, sigma, T, r)
+    omega = np.where(is_call, 1.0, -1.0)
+    return discount_factor * omega * (F * ndtr(omega * d1) - K * ndtr(omega * d2))
+
+def black_76_option_price(F, K, sigma, T, r, is_call) -> np.ndarray:
+    """
+    Black-76 option price from the numba kernel when numba is installed, from black_76_price otherwise.
+    """
+    option_price = black_76_price_jit(F, K, sigma, T, r, is_call)
+    return option_price if option_price is not None else black_76_price(F, K, sigma, T, r, is_call)
+
+class CurveDiscountedOptionPricer(IOptionPricer):
     """
-    A class used to represent the Black-76 option pricing model. Inherits from the IOptionPricer interface.
+    Base class of the vectorized pricing models discounting with the curve of every DateAsOf. Inherits from the
+    IOptionPricer interface. The subclasses only provide the price of whole columns in option_price.
     Attributes
     ----------
     market_data : pd.DataFrame
         A DataFrame containing the market data for option pricing.
+    discount_curves : Mapping[int, DiscountCurve]
+        Discount curves keyed by DateAsOf. The rate of every option is the zero rate of its date's curve at its maturity.
+    default_curve : DiscountCurve
+        Curve of the dates without a discount curve, flat at RISK_FREE_RATE by default.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date.
+    Methods
+    -------
+    time_to_maturity_and_rates(market_data: pd.DataFrame) -> tuple
+        Returns the time to maturity in years and the zero rate of every row.
+    market_vols(market_data: pd.DataFrame) -> tuple
+        Returns the ImpliedVol and the NormalVol of every row.
+    model_vol(F, K, implied_vol, normal_vol, T) -> np.ndarray
+        Volatility of every row in the units of the model, the implied_vol by default.
+    option_price(F, K, sigma, T, r, is_call) -> np.ndarray
+        Vectorized option price of the model.
+    calculate_option_prices() -> pd.DataFrame
+        Calculate option prices with the model and return the updated DataFrame.
+    """
+
+    def __init__(self, model_name: str, market_data: pd.DataFrame,
+                 discount_curves: Optional[Mapping[int, DiscountCurve]] = None,
+                 default_curve: Optional[DiscountCurve] = None, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS):
+        super().__init__(model_name, market_data=market_data)
+        self.discount_curves = discount_curves or {}
+        self.default_curve = default_curve if default_curve is not None else DiscountCurve.flat(RISK_FREE_RATE)
+        self.settlement_lag_months = settlement_lag_months
+
+    def time_to_maturity_and_rates(self, market_data: pd.DataFrame) -> tuple:
+        """
+        Returns the time to maturity in years and the zero rate from the discount curve of every row.
+        """
+        T = time_to_maturity(market_data['DateAsOf'], market_data['FutureExpiryDate'], self.settlement_lag_months)
+        return T, curve_zero_rates(market_data['DateAsOf'].to_numpy(), T, self.discount_curves, self.default_curve)
+
+    @staticmethod
+    def market_vols(market_data: pd.DataFrame) -> tuple:
+        """
+        Returns the ImpliedVol and the NormalVol of every row, NaN for the rows without one.
+        """
+        implied_vol = market_data['ImpliedVol'].to_numpy(dtype=np.float64)
+        if NORMAL_VOL_COLUMN not in market_data.columns:
+            return implied_vol, np.full(len(market_data), np.nan)
+        return implied_vol, market_data[NORMAL_VOL_COLUMN].to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def model_vol(F, K, implied_vol, normal_vol, T) -> np.ndarray:
+        return implied_vol
+
+    @staticmethod
+    @abstractmethod
+    def option_price(F, K, sigma, T, r, is_call) -> np.ndarray:
+        pass
+
+    def calculate_option_prices(self) -> pd.DataFrame:
+        """
+        Calculate option prices with the vectorized model and return the updated DataFrame.
+
+        Returns
+        -------
+        pd.DataFrame
+            The updated DataFrame containing the calculated option prices.
+        """
+        option_prices = self.market_data
+        T, r = self.time_to_maturity_and_rates(option_prices)
+        F = option_prices['CurrentPrice'].to_numpy(dtype=np.float64)
+        K = option_prices['StrikePrice'].to_numpy(dtype=np.float64)
+        option_prices['OptionPrice'] = self.option_price(
+            F,
+            K,
+            self.model_vol(F, K, *self.market_vols(option_prices), T),
+            T,
+            r,
+            (option_prices['OptionType'] == 'Call').to_numpy(),
+        )
+        return option_prices
+
+class B76OptionPricer(CurveDiscountedOptionPricer):
+    """
+    A class used to represent the Black-76 option pricing model. Inherits from CurveDiscountedOptionPricer.
+    Attributes
+    ----------
+    market_data : pd.DataFrame
+        A DataFrame containing the market data for option pricing.
+    discount_curves : Mapping[int, DiscountCurve]
+        Discount curves keyed by DateAsOf. The rate of every option is the zero rate of its date's curve at its maturity.
+    default_curve : DiscountCurve
+        Curve of the dates without a discount curve, flat at RISK_FREE_RATE by default.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date.
     Methods
     -------
     calculate_option_prices() -> pd.DataFrame
         Calculate option prices using the Black-76 model and return the updated DataFrame.
+    calculate_option_prices_rowwise() -> pd.DataFrame
+        Reference scalar implementation pricing one row at a time.
     """
 
-    def __init__(self, market_data: pd.DataFrame):
+    option_price = staticmethod(black_76_option_price)
+
+    def __init__(self, market_data: pd.DataFrame, discount_curves: Optional[Mapping[int, DiscountCurve]] = None,
+                 default_curve: Optional[DiscountCurve] = None, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS):
         """
         Initialize the B76OptionPricer with given market data.
 
@@ -26,13 +255,20 @@ class B76OptionPricer(IOptionPricer):
         ----------
         market_data : pd.DataFrame
             A DataFrame containing the market data for option pricing.
+        discount_curves : Mapping[int, DiscountCurve]
+            Optional discount curves keyed by DateAsOf.
+        default_curve : DiscountCurve
+            Optional curve of the dates without a discount curve, flat at RISK_FREE_RATE when not given.
+        settlement_lag_months : int
+            Number of months between the settlement date and the future expiry date.
         """
         model_name = 'Black76'
-        super().__init__(model_name, market_data=market_data)
+        super().__init__(model_name, market_data, discount_curves, default_curve, settlement_lag_months)
 
-    def calculate_option_prices(self) -> pd.DataFrame:
+    def calculate_option_prices_rowwise(self) -> pd.DataFrame:
         """
-        Calculate option prices using the Black-76 model and return the updated DataFrame.
+        Calculate option prices one row at a time. Kept as the reference implementation for the vectorized path,
+        with the flat RISK_FREE_RATE and the 2 months settlement lag.
 
         Returns
         -------
@@ -62,8 +298,8 @@ class B76OptionPricer(IOptionPricer):
         date_as_of = pd.to_datetime(row['DateAsOf'], format='%Y%m%d')
         future_expiry_date = pd.to_datetime(row['FutureExpiryDate'], format='%Y%m%d')
         # 2 months before expiry as mentioned in the assignment document.
-        settlement_date = future_expiry_date - pd.DateOffset(months=2)
-        T = (settlement_date - date_as_of).days / 365  # time to maturity in years
+        settlement_date = future_expiry_date - pd.DateOffset(months=SETTLEMENT_LAG_MONTHS)
+        T = (settlement_date - date_as_of).days / DAYS_IN_YEAR  # time to maturity in years
 
         r = RISK_FREE_RATE  # risk-free interest rate (Hard coded to  5% at the top of the file)
 
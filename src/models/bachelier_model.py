@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.special import ndtr
+from models.b76_model import CurveDiscountedOptionPricer, SETTLEMENT_LAG_MONTHS
+from models.discount_curve import DiscountCurve
+from typing import Mapping, Optional
+import pandas as pd
+
+def bachelier_price(F, K, sigma, T, r, is_call) -> np.ndarray:
+    """
+    Vectorized Bachelier (normal) option price on a future. The future follows an arithmetic Brownian motion,
+    so the price stays defined for negative or low forwards and strikes where the Black-76 log-moneyness is not.
+
+    Parameters
+    ----------
+    F, K, sigma, T, r : array-like
+        Future price, strike price, normal volatility in price units per square root of year, time to maturity
+        in years and risk-free rate.
+    is_call : array-like of bool
+        True for call options and False for put options.
+    Returns
+    -------
+    np.ndarray
+        The calculated option prices.
+    """
+    sigma_sqrt_T = sigma * np.sqrt(T)
+    d = (F - K) / sigma_sqrt_T
+    omega = np.where(is_call, 1.0, -1.0)
+    normal_pdf = np.exp(-0.5 * d ** 2) / np.sqrt(2.0 * np.pi)
+    return np.exp(-r * T) * (omega * (F - K) * ndtr(omega * d) + sigma_sqrt_T * normal_pdf)
+
+def normal_vol_from_lognormal_vol(F, K, sigma, T) -> np.ndarray:
+    """
+    Converts a lognormal (Black-76) volatility to the normal volatility giving about the same option price,
+    with the approximation of Hagan et al. (2002):
+    sigma_N = sigma * (F - K) / ln(F / K) / (1 + (1 - ln(F / K) ** 2 / 120) * sigma ** 2 * T / 24 + sigma ** 4 * T ** 2 / 5760).
+
+    Parameters
+    ----------
+    F, K, sigma, T : array-like
+        Future price, strike price, lognormal volatility and time to maturity in years.
+    Returns
+    -------
+    np.ndarray
+        The normal volatilities in price units per square root of year, NaN where the future or the strike price
+        is not positive, a lognormal volatility has no meaning there.
+    """
+    F, K, sigma, T = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (F, K, sigma, T)))
+    positive = (F > 0.0) & (K > 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_moneyness = np.log(F / K)
+        # (F - K) / ln(F / K) tends to sqrt(F * K) at the money.
+        moneyness_factor = np.where(np.abs(log_moneyness) > 1e-8, (F - K) / log_moneyness, np.sqrt(F * K))
+    variance = sigma ** 2 * T
+    normal_vol = sigma * moneyness_factor / (1.0 + (1.0 - log_moneyness ** 2 / 120.0) * variance / 24.0 + variance ** 2 / 5760.0)
+    return np.where(positive, normal_vol, np.nan)
+
+def bachelier_vol(F, K, implied_vol, normal_vol, T) -> np.ndarray:
+    """
+    Returns the normal volatility of every option, its NormalVol when given, otherwise its lognormal ImpliedVol
+    converted by normal_vol_from_lognormal_vol.
+
+    Parameters
+    ----------
+    F, K, implied_vol, normal_vol, T : array-like
+        Future price, strike price, lognormal volatility, normal volatility, NaN for the options without one,
+        and time to maturity in years.
+    Returns
+    -------
+    np.ndarray
+        The normal volatilities in price units per square root of year.
+    Raises
+    ------
+    ValueError
+        If an option with a future or strike price at or below zero has no normal volatility, its lognormal
+        volatility cannot be converted.
+    """
+    F, K, implied_vol, normal_vol = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64)
+                                                          for value in (F, K, implied_vol, normal_vol)))
+    missing_normal_vol = np.isnan(normal_vol)
+    unconvertible = missing_normal_vol & ((F <= 0.0) | (K <= 0.0))
+    if unconvertible.any():
+        raise ValueError(f"{np.count_nonzero(unconvertible)} options priced with Bachelier have a future or strike "
+                         f"price at or below zero and no NormalVol, their ImpliedVol cannot be converted to a normal vol.")
+    return np.where(missing_normal_vol, normal_vol_from_lognormal_vol(F, K, implied_vol, T), normal_vol)
+
+class BachelierOptionPricer(CurveDiscountedOptionPricer):
+    """
+    A class used to represent the Bachelier (normal) option pricing model. Inherits from CurveDiscountedOptionPricer.
+    The rows are priced with their NormalVol when given, otherwise with their lognormal (Black-76) ImpliedVol
+    converted to a normal volatility, so a row with a future or strike price at or below zero needs a NormalVol.
+    Attributes
+    ----------
+    market_data : pd.DataFrame
+        A DataFrame containing the market data for option pricing.
+    discount_curves : Mapping[int, DiscountCurve]
+        Discount curves keyed by DateAsOf.
+    default_curve : DiscountCurve
+        Curve of the dates without a discount curve, flat at RISK_FREE_RATE by default.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date.
+    Methods
+    -------
+    calculate_option_prices() -> pd.DataFrame
+        Calculate option prices using the Bachelier model and return the updated DataFrame.
+    """
+
+    model_vol = staticmethod(bachelier_vol)
+    option_price = staticmethod(bachelier_price)
+
+    def __init__(self, market_data: pd.DataFrame, discount_curves: Optional[Mapping[int, DiscountCurve]] = None,
+                 default_curve: Optional[DiscountCurve] = None, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS):
+        super().__init__('Bachelier', market_data, discount_curves, default_curve, settlement_lag_months)
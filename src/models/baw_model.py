@@ -0,0 +1,116 @@
+import numpy as np
+from scipy.special import ndtr
+from models.b76_model import CurveDiscountedOptionPricer, SETTLEMENT_LAG_MONTHS
+from models.discount_curve import DiscountCurve
+from typing import Mapping, Optional
+import pandas as pd
+
+CRITICAL_PRICE_TOLERANCE = 1e-10
+MAX_ITERATIONS = 100
+
+def _european_futures_price(F, K, sigma, T, D, omega) -> tuple:
+    """
+    Textbook Black-76 price, with a d1 without the rate term, and its d1.
+    """
+    sigma_sqrt_T = sigma * np.sqrt(T)
+    d1 = np.log(F / K) / sigma_sqrt_T + 0.5 * sigma_sqrt_T
+    return D * omega * (F * ndtr(omega * d1) - K * ndtr(omega * (d1 - sigma_sqrt_T))), d1
+
+def barone_adesi_whaley_price(F, K, sigma, T, r, is_call, max_iterations: int = MAX_ITERATIONS) -> np.ndarray:
+    """
+    Vectorized Barone-Adesi and Whaley (1987) approximation of the American option price on a future.
+
+    The early exercise premium is A * (F / S*) ** q while the future has not crossed the critical price S*,
+    beyond it the option is exercised and worth its intrinsic value. The critical prices are found with
+    Newton iterations started from the Barone-Adesi and Whaley seeds, converged elements are masked out.
+    With a zero cost of carry the European part is the textbook Black-76 price, whose d1 has no rate term,
+    and without a positive rate there is no early exercise premium.
+
+    Parameters
+    ----------
+    F, K, sigma, T, r : array-like
+        Future price, strike price, implied volatility, time to maturity in years and risk-free rate.
+    is_call : array-like of bool
+        True for call options and False for put options.
+    Returns
+    -------
+    np.ndarray
+        The calculated option prices.
+    """
+    F, K, sigma, T, r, is_call = np.broadcast_arrays(
+        np.asarray(F, dtype=np.float64), np.asarray(K, dtype=np.float64), np.asarray(sigma, dtype=np.float64),
+        np.asarray(T, dtype=np.float64), np.asarray(r, dtype=np.float64), np.asarray(is_call, dtype=bool))
+    shape = F.shape
+    F, K, sigma, T, r, is_call = (array.ravel() for array in (F, K, sigma, T, r, is_call))
+    omega = np.where(is_call, 1.0, -1.0)
+    D = np.exp(-r * T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        european_price = _european_futures_price(F, K, sigma, T, D, omega)[0]
+    option_price = european_price.copy()
+
+    american = np.flatnonzero((r > 0) & (T > 0) & (sigma > 0) & (F > 0) & (K > 0))
+    if american.size == 0:
+        return option_price.reshape(shape)
+    F, K, sigma, T, r, D, omega = (array[american] for array in (F, K, sigma, T, r, D, omega))
+    sigma_sqrt_T = sigma * np.sqrt(T)
+    M = 2.0 * r / sigma ** 2
+    # q2 > 1 for the calls and q1 < 0 for the puts, omega picks the root.
+    q = 0.5 * (1.0 + omega * np.sqrt(1.0 + 4.0 * M / (1.0 - D)))
+
+    # Seed from the critical price of the perpetual option, q at an infinite maturity.
+    q_infinite = 0.5 * (1.0 + omega * np.sqrt(1.0 + 4.0 * M))
+    S_infinite = K / (1.0 - 1.0 / q_infinite)
+    h = -2.0 * sigma_sqrt_T * K / (omega * (S_infinite - K))
+    critical_price = np.where(omega > 0, K + (S_infinite - K) * (1.0 - np.exp(h)), S_infinite + (K - S_infinite) * np.exp(h))
+
+    # Newton iterations on omega * (S - K) = European(S) + omega * (1 - D * N(omega * d1(S))) * S / q.
+    active = np.arange(american.size)
+    S = critical_price
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        S_active, K_active, D_active, omega_active, q_active = S[active], K[active], D[active], omega[active], q[active]
+        european, d1 = _european_futures_price(S_active, K_active, sigma[active], T[active], D_active, omega_active)
+        N_d1 = ndtr(omega_active * d1)
+        right_hand_side = european + omega_active * (1.0 - D_active * N_d1) * S_active / q_active
+        difference = omega_active * (S_active - K_active) - right_hand_side
+        slope = omega_active * D_active * N_d1 * (1.0 - 1.0 / q_active) \
+            + (omega_active - D_active * np.exp(-0.5 * d1 ** 2) / (np.sqrt(2.0 * np.pi) * sigma_sqrt_T[active])) / q_active
+        S[active] = S_active - difference / (omega_active - slope)
+
+        still_active = np.abs(difference) > CRITICAL_PRICE_TOLERANCE * K_active
+        active = active[still_active]
+
+    d1_critical = _european_futures_price(S, K, sigma, T, D, omega)[1]
+    A = omega * S / q * (1.0 - D * ndtr(omega * d1_critical))
+    early_exercise = omega * (F - S) >= 0
+    with np.errstate(invalid='ignore'):
+        american_price = np.where(early_exercise, omega * (F - K), european_price[american] + A * (F / S) ** q)
+    option_price[american] = american_price
+    return option_price.reshape(shape)
+
+class BAWOptionPricer(CurveDiscountedOptionPricer):
+    """
+    A class used to represent the Barone-Adesi and Whaley approximation of the American options on futures.
+    Inherits from CurveDiscountedOptionPricer.
+    Attributes
+    ----------
+    market_data : pd.DataFrame
+        A DataFrame containing the market data for option pricing.
+    discount_curves : Mapping[int, DiscountCurve]
+        Discount curves keyed by DateAsOf.
+    default_curve : DiscountCurve
+        Curve of the dates without a discount curve, flat at RISK_FREE_RATE by default.
+    settlement_lag_months : int
+        Number of months between the settlement date and the future expiry date.
+    Methods
+    -------
+    calculate_option_prices() -> pd.DataFrame
+        Calculate the American option prices and return the updated DataFrame.
+    """
+
+    option_price = staticmethod(barone_adesi_whaley_price)
+
+    def __init__(self, market_data: pd.DataFrame, discount_curves: Optional[Mapping[int, DiscountCurve]] = None,
+                 default_curve: Optional[DiscountCurve] = None, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS):
+        super().__init__('BAW', market_data, discount_curves, default_curve, settlement_lag_months)
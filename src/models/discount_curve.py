@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Mapping, Optional
+
+class DiscountCurve:
+    """
+    A discount curve of one DateAsOf, defined by discount factors at pillar times (year fractions).
+    The discount factors are interpolated linearly in log, i.e. with piecewise flat forward rates, from a
+    discount factor of 1 at time 0. Beyond the last pillar the last forward rate is extended.
+
+    Attributes
+    ----------
+    times : np.ndarray
+        Pillar times in years, strictly increasing and positive.
+    discount_factors : np.ndarray
+        Positive discount factors at the pillar times.
+
+    Methods
+    -------
+    flat(rate: float) -> DiscountCurve
+        Curve with the same continuously compounded zero rate for every maturity.
+    discount_factor(T) -> np.ndarray
+        Vectorized discount factors at the times T.
+    zero_rates(T) -> np.ndarray
+        Vectorized continuously compounded zero rates at the times T, used as the rate of the Black-76 formulas.
+    """
+
+    def __init__(self, times, discount_factors):
+        times = np.asarray(times, dtype=np.float64)
+        discount_factors = np.asarray(discount_factors, dtype=np.float64)
+        if times.ndim != 1 or times.shape != discount_factors.shape or len(times) == 0:
+            raise ValueError("A discount curve needs the same number of pillar times and discount factors.")
+        if not (times[0] > 0 and np.all(np.diff(times) > 0)):
+            raise ValueError("The pillar times of a discount curve must be positive and strictly increasing.")
+        if not np.all(discount_factors > 0):
+            raise ValueError("The discount factors of a discount curve must be positive.")
+        self.times = times
+        self.discount_factors = discount_factors
+        self._node_times = np.r_[0.0, times]
+        self._node_log_discount_factors = np.r_[0.0, np.log(discount_factors)]
+        self._last_forward_rate = -(self._node_log_discount_factors[-1] - self._node_log_discount_factors[-2]) \
+            / (self._node_times[-1] - self._node_times[-2])
+
+    @classmethod
+    def flat(cls, rate: float) -> "DiscountCurve":
+        return cls([1.0], [np.exp(-rate)])
+
+    def discount_factor(self, T) -> np.ndarray:
+        return np.exp(self._log_discount_factor(np.asarray(T, dtype=np.float64)))
+
+    def zero_rates(self, T) -> np.ndarray:
+        T = np.asarray(T, dtype=np.float64)
+        # At T = 0 the zero rate is the limit, the forward rate of the first segment.
+        first_forward_rate = -self._node_log_discount_factors[1] / self._node_times[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zero_rates = -self._log_discount_factor(T) / T
+        return np.where(T > 0, zero_rates, first_forward_rate)
+
+    def _log_discount_factor(self, T: np.ndarray) -> np.ndarray:
+        log_discount_factor = np.interp(T, self._node_times, self._node_log_discount_factors)
+        beyond_last_pillar = T > self._node_times[-1]
+        if np.any(beyond_last_pillar):
+            extrapolated = self._node_log_discount_factors[-1] - self._last_forward_rate * (T - self._node_times[-1])
+            log_discount_factor = np.where(beyond_last_pillar, extrapolated, log_discount_factor)
+        return np.where(T > 0, log_discount_factor, 0.0)
+
+
+def curve_zero_rates(date_as_of, T, discount_curves: Optional[Mapping[int, DiscountCurve]],
+                     default_curve: DiscountCurve) -> np.ndarray:
+    """
+    Vectorized zero rates of every option at its time to maturity T, from the curve of its DateAsOf.
+    The options of the dates without a curve use the default curve.
+
+    Parameters
+    ----------
+    date_as_of : array-like
+        Market data dates in YYYYMMDD format.
+    T : array-like
+        Time to maturity in years of every option.
+    discount_curves : Mapping[int, DiscountCurve]
+        Curves keyed by DateAsOf.
+    default_curve : DiscountCurve
+        Curve of the dates missing from discount_curves.
+    Returns
+    -------
+    np.ndarray
+        Zero rates for every element.
+    """
+    T = np.asarray(T, dtype=np.float64)
+    if not discount_curves:
+        return default_curve.zero_rates(T)
+    unique_dates, date_positions = np.unique(np.asarray(date_as_of), return_inverse=True)
+    # Rows of the same date are gathered with one sort, each curve is evaluated on its rows only.
+    rows_by_date = np.argsort(date_positions, kind='stable')
+    date_ends = np.cumsum(np.bincount(date_positions, minlength=len(unique_dates)))
+    date_starts = np.r_[0, date_ends[:-1]]
+    zero_rates = np.empty(len(T))
+    for date, date_start, date_end in zip(unique_dates, date_starts, date_ends):
+        rows = rows_by_date[date_start:date_end]
+        zero_rates[rows] = discount_curves.get(int(date), default_curve).zero_rates(T[rows])
+    return zero_rates
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from models.b76_model import B76OptionPricer, CurveDiscountedOptionPricer
+from models.bachelier_model import BachelierOptionPricer
+from models.baw_model import BAWOptionPricer
+from typing import Dict, Type
+
+"""
+This module holds the registry of the vectorized pricing models and prices the option chains with one or
+several models. A mixed-model chain is grouped by model and every group is priced in one vectorized pass.
+"""
+
+PRICING_MODELS: Dict[str, Type[CurveDiscountedOptionPricer]] = {
+    'Black76': B76OptionPricer,
+    'Bachelier': BachelierOptionPricer,
+    'BAW': BAWOptionPricer,
+}
+DEFAULT_MODEL = 'Black76'
+# Picks Bachelier for the options with a future or strike price at or below the normal forward threshold, Black76 otherwise.
+AUTO_MODEL = 'auto'
+MODEL_COLUMN = 'PricingModel'
+NORMAL_FORWARD_THRESHOLD = 0.0
+# Model of the OptionPrice stored in BrentOptionData at upload time.
+STORED_PRICE_MODEL = DEFAULT_MODEL
+
+def validate_model(model: str) -> None:
+    if model != AUTO_MODEL and model not in PRICING_MODELS:
+        raise ValueError(f"Invalid model {model}. Supported models: " + ", ".join([*PRICING_MODELS, AUTO_MODEL]))
+
+def select_models(market_data: pd.DataFrame, model: str = DEFAULT_MODEL,
+                  normal_forward_threshold: float = NORMAL_FORWARD_THRESHOLD) -> np.ndarray:
+    """
+    Returns the name of the pricing model of every row.
+    """
+    validate_model(model)
+    if model != AUTO_MODEL:
+        return np.full(len(market_data), model, dtype=object)
+    low_forward = (market_data['CurrentPrice'].to_numpy(dtype=np.float64) <= normal_forward_threshold) \
+        | (market_data['StrikePrice'].to_numpy(dtype=np.float64) <= normal_forward_threshold)
+    return np.where(low_forward, 'Bachelier', DEFAULT_MODEL).astype(object)
+
+def calculate_option_prices(market_data: pd.DataFrame, model: str = DEFAULT_MODEL,
+                            normal_forward_threshold: float = NORMAL_FORWARD_THRESHOLD, **pricing_environment) -> pd.DataFrame:
+    """
+    Prices the option chain with the given model, or with the model picked per row for the auto model.
+
+    Parameters
+    ----------
+    market_data : pd.DataFrame
+        A DataFrame containing the market data for option pricing.
+    model : str
+        Name of a model of PRICING_MODELS, or AUTO_MODEL.
+    normal_forward_threshold : float
+        Future or strike price at or below which the auto model prices with Bachelier.
+    pricing_environment : dict
+        discount_curves, default_curve and settlement_lag_months arguments of the pricers.
+    Returns
+    -------
+    pd.DataFrame
+        The market data with the OptionPrice column, and the PricingModel column of every row for the auto model.
+    """
+    row_models = select_models(market_data, model, normal_forward_threshold)
+    model_codes, model_names = pd.factorize(row_models)
+    if len(model_names) <= 1:
+        pricer_class = PRICING_MODELS[model_names[0] if len(model_names) else DEFAULT_MODEL]
+        option_prices = pricer_class(market_data, **pricing_environment).calculate_option_prices()
+    else:
+        option_price = np.empty(len(market_data))
+        for model_code, model_name in enumerate(model_names):
+            rows = np.flatnonzero(model_codes == model_code)
+            model_data = market_data.iloc[rows].reset_index(drop=True)
+            option_price[rows] = PRICING_MODELS[model_name](model_data, **pricing_environment) \
+                .calculate_option_prices()['OptionPrice'].to_numpy()
+        option_prices = market_data
+        option_prices['OptionPrice'] = option_price
+    if model == AUTO_MODEL:
+        option_prices[MODEL_COLUMN] = row_models
+    return option_prices
+
+def missing_option_prices(market_data: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the mask of the rows without a stored OptionPrice.
+    """
+    if 'OptionPrice' not in market_data.columns:
+        return np.ones(len(market_data), dtype=bool)
+    return np.isnan(market_data['OptionPrice'].to_numpy(dtype=np.float64))
+
+def calculate_missing_option_prices(market_data: pd.DataFrame, **pricing_environment) -> pd.DataFrame:
+    """
+    Prices with the STORED_PRICE_MODEL the rows of the option chain without a stored OptionPrice
+    and keeps the stored prices of the other rows.
+
+    Parameters
+    ----------
+    market_data : pd.DataFrame
+        A DataFrame containing the market data for option pricing and the stored OptionPrice column, if any.
+    pricing_environment : dict
+        discount_curves, default_curve and settlement_lag_months arguments of the pricer.
+    Returns
+    -------
+    pd.DataFrame
+        The market data with the OptionPrice of every row.
+    """
+    missing = missing_option_prices(market_data)
+    if not missing.any():
+        return market_data
+    if missing.all():
+        return calculate_option_prices(market_data, STORED_PRICE_MODEL, **pricing_environment)
+    rows = np.flatnonzero(missing)
+    option_price = market_data['OptionPrice'].to_numpy(dtype=np.float64, copy=True)
+    option_price[rows] = PRICING_MODELS[STORED_PRICE_MODEL](market_data.iloc[rows].reset_index(drop=True), **pricing_environment) \
+        .calculate_option_prices()['OptionPrice'].to_numpy()
+    market_data['OptionPrice'] = option_price
+    return market_data
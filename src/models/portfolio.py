@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from models.b76_greeks import B76GreeksCalculator
+
+POSITION_KEY_COLUMNS = ['FutureExpiryDate', 'OptionType', 'StrikePrice']
+EXPOSURE_COLUMNS = ['MTM', 'DeltaExposure', 'VegaExposure']
+
+def calculate_portfolio_exposures(positions: pd.DataFrame, option_chain: pd.DataFrame, **pricing_environment) -> dict:
+    """
+    Prices the option chain with its greeks, joins the positions to it on the contract columns and sums the
+    mark to market, delta and vega exposures per future expiry and for the whole portfolio.
+    The join and the sums are single vectorized operations over all the positions.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        FutureExpiryDate, OptionType, StrikePrice and Quantity of every position.
+    option_chain : pd.DataFrame
+        The BrentOptionData rows of the valuation date.
+    pricing_environment : dict
+        discount_curves, default_curve and settlement_lag_months arguments of the pricer.
+    Returns
+    -------
+    dict
+        PerExpiry, a DataFrame of the Positions count and the exposures per FutureExpiryDate, Total, the
+        exposures of the portfolio, Unmatched, the positions without a contract in the chain, and Unpriced, the
+        number of matched positions without a price, e.g. expired, which are left out of the sums.
+    """
+    option_greeks = B76GreeksCalculator(option_chain, **pricing_environment).calculate_option_greeks()
+    priced_positions = positions.merge(option_greeks[POSITION_KEY_COLUMNS + ['OptionPrice', 'Delta', 'Vega']],
+                                       on=POSITION_KEY_COLUMNS, how='left', validate='one_to_one', indicator=True)
+    matched = (priced_positions.pop('_merge') == 'both').to_numpy()
+    priced_positions = priced_positions[matched]
+    quantity = priced_positions['Quantity'].to_numpy()
+    exposures = pd.DataFrame({'FutureExpiryDate': priced_positions['FutureExpiryDate'].to_numpy(),
+                              'Positions': np.ones(len(priced_positions), dtype=np.int64),
+                              'MTM': quantity * priced_positions['OptionPrice'].to_numpy(),
+                              'DeltaExposure': quantity * priced_positions['Delta'].to_numpy(),
+                              'VegaExposure': quantity * priced_positions['Vega'].to_numpy()})
+    per_expiry = exposures.groupby('FutureExpiryDate', sort=True, as_index=False).sum()
+    total = {'Positions': int(len(exposures)), **{column: float(exposures[column].sum()) for column in EXPOSURE_COLUMNS}}
+    return {"PerExpiry": per_expiry, "Total": total, "Unmatched": positions.loc[~matched, POSITION_KEY_COLUMNS],
+            "Unpriced": int(np.isnan(exposures['MTM'].to_numpy()).sum())}
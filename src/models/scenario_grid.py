@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from models.b76_model import B76OptionPricer
+from models.model_registry import DEFAULT_MODEL, NORMAL_FORWARD_THRESHOLD, PRICING_MODELS, select_models
+from typing import Sequence
+
+"""
+This module revalues an option chain under a grid of future price and volatility shocks.
+
+The chain columns are broadcast against the shock vectors, (price shocks, 1, options) and (1, vol shocks, options),
+so the chain is never copied per scenario. The options are priced in chunks sized so that the temporaries of a
+chunk stay under the memory bound, and the P&L of every chunk is summed per scenario as it is computed.
+"""
+
+# Estimate of the float64 temporaries per grid point allocated by the vectorized pricing functions, BAW included.
+TEMPORARIES_PER_GRID_POINT = 24
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+
+def scenario_chunk_rows(number_of_scenarios: int, max_memory_bytes: int = MAX_MEMORY_BYTES) -> int:
+    """
+    Returns the number of options priced at once under all the scenarios within the memory bound,
+    0 when a single option does not fit.
+    """
+    return max_memory_bytes // (number_of_scenarios * TEMPORARIES_PER_GRID_POINT * 8)
+
+def calculate_scenario_pnl(option_chain: pd.DataFrame, price_shocks: Sequence[float], vol_shocks: Sequence[float],
+                           model: str = DEFAULT_MODEL, normal_forward_threshold: float = NORMAL_FORWARD_THRESHOLD,
+                           per_option: bool = False, max_memory_bytes: int = MAX_MEMORY_BYTES, **pricing_environment) -> dict:
+    """
+    Prices the option chain under every pair of shocks and returns the P&L against the unshocked prices.
+
+    Parameters
+    ----------
+    option_chain : pd.DataFrame
+        A DataFrame containing the market data for option pricing.
+    price_shocks : Sequence[float]
+        Relative shocks of the future price, the shocked price is CurrentPrice * (1 + shock).
+    vol_shocks : Sequence[float]
+        Absolute shocks of the volatility, the shocked volatility is ImpliedVol + shock, or NormalVol + shock for
+        the options priced with Bachelier from their NormalVol.
+    model : str
+        Name of a model of the model registry, or auto.
+    normal_forward_threshold : float
+        Future or strike price at or below which the auto model prices with Bachelier.
+    per_option : bool
+        Also return the P&L of every option, as a float32 (price shocks, vol shocks, options) cube.
+    max_memory_bytes : int
+        Bound of the temporaries allocated at once by the pricing.
+    pricing_environment : dict
+        discount_curves, default_curve and settlement_lag_months arguments of the pricers.
+    Returns
+    -------
+    dict
+        BaseValue, the sum of the unshocked prices, TotalPnL, the (price shocks, vol shocks) P&L of the chain,
+        Unpriced, the (price shocks, vol shocks) count of the options without a price under the scenario, which are
+        left out of TotalPnL, and PnL, the per option cube or None.
+    """
+    price_shocks = np.asarray(price_shocks, dtype=np.float64)[:, None, None]
+    vol_shocks = np.asarray(vol_shocks, dtype=np.float64)[None, :, None]
+    number_of_scenarios = price_shocks.size * vol_shocks.size
+    chunk_rows = scenario_chunk_rows(number_of_scenarios, max_memory_bytes)
+    if chunk_rows < 1:
+        raise ValueError(f"The {price_shocks.size} x {vol_shocks.size} scenario grid needs more than max_memory_bytes "
+                         f"{max_memory_bytes} per option.")
+
+    T, r = B76OptionPricer(option_chain, **pricing_environment).time_to_maturity_and_rates(option_chain)
+    F = option_chain['CurrentPrice'].to_numpy(dtype=np.float64)
+    K = option_chain['StrikePrice'].to_numpy(dtype=np.float64)
+    implied_vol, normal_vol = B76OptionPricer.market_vols(option_chain)
+    if len(option_chain) and np.nanmin(np.concatenate([implied_vol, normal_vol])) + vol_shocks.min() <= 0.0:
+        raise ValueError(f"The vol shock {vol_shocks.min()} makes the volatility of some options zero or negative.")
+    is_call = (option_chain['OptionType'] == 'Call').to_numpy()
+    model_codes, model_names = pd.factorize(select_models(option_chain, model, normal_forward_threshold))
+
+    base_value = 0.0
+    total_pnl = np.zeros((price_shocks.size, vol_shocks.size))
+    unpriced = np.zeros((price_shocks.size, vol_shocks.size), dtype=np.int64)
+    pnl = np.empty((price_shocks.size, vol_shocks.size, len(option_chain)), dtype=np.float32) if per_option else None
+    for chunk_start in range(0, len(option_chain), chunk_rows):
+        chunk = slice(chunk_start, chunk_start + chunk_rows)
+        for model_code, model_name in enumerate(model_names):
+            rows = chunk_start + np.flatnonzero(model_codes[chunk] == model_code)
+            if rows.size == 0:
+                continue
+            pricer_class = PRICING_MODELS[model_name]
+            base_sigma = pricer_class.model_vol(F[rows], K[rows], implied_vol[rows], normal_vol[rows], T[rows])
+            base_price = pricer_class.option_price(F[rows], K[rows], base_sigma, T[rows], r[rows], is_call[rows])
+            shocked_F = F[rows] * (1.0 + price_shocks)
+            shocked_sigma = pricer_class.model_vol(shocked_F, K[rows], implied_vol[rows] + vol_shocks,
+                                                   normal_vol[rows] + vol_shocks, T[rows])
+            shocked_price = pricer_class.option_price(shocked_F, K[rows], shocked_sigma, T[rows], r[rows], is_call[rows])
+            rows_pnl = shocked_price - base_price
+            base_value += np.nansum(base_price)
+            total_pnl += np.nansum(rows_pnl, axis=2)
+            unpriced += np.isnan(rows_pnl).sum(axis=2)
+            if per_option:
+                pnl[:, :, rows] = rows_pnl
+    return {"BaseValue": base_value, "TotalPnL": total_pnl, "Unpriced": unpriced, "PnL": pnl}
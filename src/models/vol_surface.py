@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicSpline
+from models.b76_model import SETTLEMENT_LAG_MONTHS, time_to_maturity
+
+class VolSurface:
+    """
+    Implied volatility surface of one DateAsOf, built from the stored ImpliedVol points of its option chain.
+
+    Every future expiry is a smile, a natural cubic spline of the volatility in log-moneyness log(K / F),
+    flat beyond the first and last strikes. Between the expiries the total variance sigma ** 2 * T is
+    interpolated linearly in time at constant log-moneyness, before the first expiry and after the last
+    one the volatility of the nearest smile is kept. The forward of an off-grid maturity is interpolated
+    linearly between the futures.
+
+    Attributes
+    ----------
+    times : np.ndarray
+        Time to maturity in years of the smiles, strictly increasing.
+    forwards : np.ndarray
+        Future price of every smile.
+    smiles : list
+        Volatility of every smile as a function of the log-moneyness.
+
+    Methods
+    -------
+    from_option_chain(option_chain: pd.DataFrame, settlement_lag_months: int) -> VolSurface
+        Builds the surface from the DateAsOf, FutureExpiryDate, StrikePrice, CurrentPrice and ImpliedVol columns.
+    implied_vols(K, T) -> np.ndarray
+        Vectorized implied volatilities at the strikes K and times to maturity T.
+    """
+
+    def __init__(self, times, forwards, smiles):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.forwards = np.asarray(forwards, dtype=np.float64)
+        self.smiles = list(smiles)
+        if len(self.times) == 0 or len(self.times) != len(self.forwards) or len(self.times) != len(self.smiles):
+            raise ValueError("A volatility surface needs one forward and one smile per expiry.")
+        if not (self.times[0] > 0 and np.all(np.diff(self.times) > 0)):
+            raise ValueError("The expiries of a volatility surface must have positive and increasing maturities.")
+
+    @classmethod
+    def from_option_chain(cls, option_chain: pd.DataFrame, settlement_lag_months: int = SETTLEMENT_LAG_MONTHS) -> "VolSurface":
+        T = time_to_maturity(option_chain['DateAsOf'], option_chain['FutureExpiryDate'], settlement_lag_months)
+        points = pd.DataFrame({'T': T,
+                               'Forward': option_chain['CurrentPrice'].to_numpy(dtype=np.float64),
+                               'StrikePrice': option_chain['StrikePrice'].to_numpy(dtype=np.float64),
+                               'ImpliedVol': option_chain['ImpliedVol'].to_numpy(dtype=np.float64)})
+        points = points[(points['T'] > 0) & (points['Forward'] > 0) & (points['StrikePrice'] > 0)
+                        & (points['ImpliedVol'] > 0)]
+        if points.empty:
+            raise ValueError("No option with a positive maturity, price and implied volatility to build the surface from.")
+
+        times, forwards, smiles = [], [], []
+        for T_expiry, expiry_points in points.groupby('T', sort=True):
+            forward = expiry_points['Forward'].median()
+            # The calls and puts of a strike carry their own volatility, the smile goes through their average.
+            smile_points = expiry_points.groupby('StrikePrice', sort=True)['ImpliedVol'].mean()
+            log_moneyness = np.log(smile_points.index.to_numpy() / forward)
+            times.append(T_expiry)
+            forwards.append(forward)
+            smiles.append(_Smile(log_moneyness, smile_points.to_numpy()))
+        return cls(times, forwards, smiles)
+
+    def implied_vols(self, K, T) -> np.ndarray:
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        forward = np.interp(T, self.times, self.forwards)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_moneyness = np.log(K / forward)
+
+        # Total variance of every smile at the log-moneyness of every point, linear in time between the smiles.
+        upper = np.clip(np.searchsorted(self.times, T), 1, len(self.times) - 1) if len(self.times) > 1 else np.zeros(T.shape, dtype=int)
+        lower = np.maximum(upper - 1, 0)
+        lower_variance = self._smile_variances(lower, log_moneyness)
+        if len(self.times) == 1:
+            return np.sqrt(lower_variance / self.times[0])
+        upper_variance = self._smile_variances(upper, log_moneyness)
+        weight = (T - self.times[lower]) / (self.times[upper] - self.times[lower])
+        total_variance = lower_variance + (upper_variance - lower_variance) * weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            implied_vols = np.sqrt(total_variance / T)
+        # Outside of the expiries the volatility of the first or last smile is kept.
+        implied_vols = np.where(T <= self.times[0], np.sqrt(lower_variance / self.times[0]), implied_vols)
+        implied_vols = np.where(T >= self.times[-1], np.sqrt(upper_variance / self.times[-1]), implied_vols)
+        return np.where((T > 0) & np.isfinite(log_moneyness), implied_vols, np.nan)
+
+    def _smile_variances(self, smile_positions: np.ndarray, log_moneyness: np.ndarray) -> np.ndarray:
+        # Each smile is evaluated once on the points which use it.
+        total_variance = np.empty(log_moneyness.shape)
+        for smile_position in np.unique(smile_positions):
+            points = smile_positions == smile_position
+            total_variance[points] = self.smiles[smile_position](log_moneyness[points]) ** 2 * self.times[smile_position]
+        return total_variance
+
+
+class _Smile:
+    """
+    Natural cubic spline of the volatility in log-moneyness, flat beyond the first and last strikes.
+    """
+
+    def __init__(self, log_moneyness: np.ndarray, implied_vols: np.ndarray):
+        self.bounds = (log_moneyness[0], log_moneyness[-1])
+        self.flat_vol = implied_vols[0]
+        self.spline = CubicSpline(log_moneyness, implied_vols, bc_type='natural') if len(log_moneyness) > 1 else None
+
+    def __call__(self, log_moneyness: np.ndarray) -> np.ndarray:
+        if self.spline is None:
+            return np.full(log_moneyness.shape, self.flat_vol)
+        # NaN log-moneyness stays NaN through the clip and the spline.
+        return self.spline(np.clip(log_moneyness, *self.bounds))
@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from models.b76_model import B76OptionPricer, TIME_TO_MATURITY_TABLE, _year_fractions, time_to_maturity
+from models.b76_implied_vol import B76ImpliedVolSolver
+from models.b76_greeks import black_76_greeks
+from models.b76_jit import JIT_AVAILABLE, black_76_greeks_jit, black_76_price_jit
+from models.b76_model import black_76_price
+from tests.helpers import generate_option_chain
+
+"""
+This module benchmarks the vectorized Black-76 pricing path against the row-wise reference implementation
+and times the batched implied volatility solver on a 100k rows chain.
+It is not collected by pytest, run it from the src folder:
+
+    python -m tests.benchmark_b76_option_model
+"""
+
+NUMBER_OF_ROWS = 200_000
+ROWWISE_SAMPLE_ROWS = 5_000
+IMPLIED_VOL_ROWS = 100_000
+
+def time_it(function) -> float:
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    option_chain = generate_option_chain(NUMBER_OF_ROWS)
+
+    # Warm up, the numba kernels are loaded on the first call when numba is installed.
+    B76OptionPricer(option_chain.head(10).copy()).calculate_option_prices()
+    vectorized_seconds = time_it(lambda: B76OptionPricer(option_chain.copy()).calculate_option_prices())
+    print(f"Vectorized path : {NUMBER_OF_ROWS} rows in {vectorized_seconds:.3f} s")
+
+    # The row-wise path is timed on a sample and extrapolated, pricing all rows takes minutes.
+    sample_chain = option_chain.head(ROWWISE_SAMPLE_ROWS).copy()
+    rowwise_seconds = time_it(lambda: B76OptionPricer(sample_chain).calculate_option_prices_rowwise())
+    extrapolated_seconds = rowwise_seconds * NUMBER_OF_ROWS / ROWWISE_SAMPLE_ROWS
+    print(f"Row-wise path   : {ROWWISE_SAMPLE_ROWS} rows in {rowwise_seconds:.3f} s "
+          f"(~{extrapolated_seconds:.1f} s extrapolated to {NUMBER_OF_ROWS} rows)")
+    print(f"Speed up        : ~{extrapolated_seconds / vectorized_seconds:.0f}x")
+
+    date_as_of, future_expiry_date = option_chain['DateAsOf'], option_chain['FutureExpiryDate']
+    parsing_seconds = time_it(lambda: _year_fractions(date_as_of, future_expiry_date, 2))
+    TIME_TO_MATURITY_TABLE.clear()
+    first_lookup_seconds = time_it(lambda: time_to_maturity(date_as_of, future_expiry_date))
+    memoized_seconds = time_it(lambda: time_to_maturity(date_as_of, future_expiry_date))
+    print(f"Time to maturity: per-row parsing {parsing_seconds:.3f} s, first lookup {first_lookup_seconds:.3f} s, "
+          f"memoized {memoized_seconds:.3f} s")
+
+    if JIT_AVAILABLE:
+        model_inputs = (option_chain['CurrentPrice'].to_numpy(), option_chain['StrikePrice'].to_numpy(),
+                        option_chain['ImpliedVol'].to_numpy(), time_to_maturity(date_as_of, future_expiry_date), 0.05,
+                        (option_chain['OptionType'] == 'Call').to_numpy())
+        compile_seconds = time_it(lambda: (black_76_price_jit(*model_inputs), black_76_greeks_jit(*model_inputs)))
+        for name, numpy_engine, jit_engine in (('Prices', black_76_price, black_76_price_jit),
+                                               ('Greeks', black_76_greeks, black_76_greeks_jit)):
+            numpy_seconds = min(time_it(lambda: numpy_engine(*model_inputs)) for _ in range(5))
+            jit_seconds = min(time_it(lambda: jit_engine(*model_inputs)) for _ in range(5))
+            print(f"{name} engines  : NumPy {numpy_seconds * 1000:.1f} ms, numba {jit_seconds * 1000:.1f} ms "
+                  f"(first call incl. compile or cache load {compile_seconds:.2f} s)")
+
+    priced_chain = B76OptionPricer(option_chain.head(IMPLIED_VOL_ROWS).copy()).calculate_option_prices()
+    settlement_chain = priced_chain.rename(columns={'OptionPrice': 'SettlementPrice'}).assign(ImpliedVol=np.nan)
+    implied_vol_seconds = time_it(lambda: B76ImpliedVolSolver(settlement_chain).calculate_implied_vols())
+    print(f"Implied vols    : {IMPLIED_VOL_ROWS} rows in {implied_vol_seconds:.3f} s")
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from dbutil.dbschema import BrentOptionData, get_optiondata_dbschmea
+from dbutil.optiondata_dao import DataPersistenceORM
+
+"""
+This module benchmarks the Core SELECT read path of DataPersistenceORM.fetch_records against the ORM
+object hydration path (fetch_records_orm) on a table of 1M rows.
+It is not collected by pytest, run it from the src folder:
+
+    python -m tests.benchmark_fetch_records
+"""
+
+NUMBER_OF_ROWS = 1_000_000
+ROWS_PER_DATE = 4_000
+
+def generate_market_data(number_of_rows: int, seed: int = 7) -> pd.DataFrame:
+    """
+    Generates option chains with unique (DateAsOf, FutureExpiryDate, OptionType, StrikePrice) keys.
+    """
+    rng = np.random.default_rng(seed)
+    row_numbers = np.arange(number_of_rows)
+    dates = pd.bdate_range('2000-01-03', periods=number_of_rows // ROWS_PER_DATE + 1).strftime('%Y%m%d').astype(int)
+    return pd.DataFrame({
+        'DateAsOf': dates[row_numbers // ROWS_PER_DATE],
+        'FutureExpiryDate': 20300131,
+        'OptionType': np.where(row_numbers % 2 == 0, 'Call', 'Put'),
+        'StrikePrice': (row_numbers % ROWS_PER_DATE) // 2 * 0.5,
+        'CurrentPrice': rng.uniform(60.0, 90.0, number_of_rows),
+        'ImpliedVol': rng.uniform(0.1, 0.9, number_of_rows)
+    })
+
+def time_it(function) -> float:
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temp_dir:
+        persistence = DataPersistenceORM('sqlite:///' + os.path.join(temp_dir, 'benchmark.db'))
+        persistence.create_table(get_optiondata_dbschmea())
+        persistence.add_records(BrentOptionData, generate_market_data(NUMBER_OF_ROWS))
+
+        all_rows = (BrentOptionData.DateAsOf > 0,)
+        core_seconds = time_it(lambda: persistence.fetch_records(BrentOptionData, all_rows))
+        print(f"Core SELECT path : {NUMBER_OF_ROWS} rows in {core_seconds:.2f} s")
+        orm_seconds = time_it(lambda: persistence.fetch_records_orm(BrentOptionData, all_rows))
+        print(f"ORM path         : {NUMBER_OF_ROWS} rows in {orm_seconds:.2f} s")
+        print(f"Speed up         : ~{orm_seconds / core_seconds:.1f}x")
+        persistence.engine.dispose()
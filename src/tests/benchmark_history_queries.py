@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from dbutil.dbschema import BrentOptionData, get_optiondata_dbschmea
+from dbutil.optiondata_dao import DataPersistenceORM
+
+"""
+This module benchmarks the history queries on 5 years of daily option chains (1M rows) stored with the
+clustered primary key and the expiry history covering index of BrentOptionData.
+It is not collected by pytest, run it from the src folder:
+
+    python -m tests.benchmark_history_queries
+"""
+
+YEARS = 5
+EXPIRY_DATES = [20300131, 20300228, 20300331, 20300430]
+STRIKES_PER_EXPIRY = 100
+
+def generate_history(seed: int = 7) -> pd.DataFrame:
+    """
+    Generates daily chains of calls and puts over EXPIRY_DATES for YEARS years of business days.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2018-01-01', periods=YEARS * 250).strftime('%Y%m%d').astype(int)
+    keys = pd.MultiIndex.from_product([dates, EXPIRY_DATES, ['Call', 'Put'], np.arange(STRIKES_PER_EXPIRY) * 0.5 + 50.0],
+                                      names=['DateAsOf', 'FutureExpiryDate', 'OptionType', 'StrikePrice'])
+    history = keys.to_frame(index=False)
+    history['CurrentPrice'] = rng.uniform(60.0, 90.0, len(history))
+    history['ImpliedVol'] = rng.uniform(0.1, 0.9, len(history))
+    return history
+
+def time_it(function, repeat: int = 5) -> float:
+    # Best of repeat runs, in milliseconds.
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings) * 1000
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temp_dir:
+        persistence = DataPersistenceORM('sqlite:///' + os.path.join(temp_dir, 'benchmark.db'))
+        persistence.create_table(get_optiondata_dbschmea())
+        history = generate_history()
+        persistence.upsert_records(BrentOptionData, history)
+        dates = sorted(history['DateAsOf'].unique())
+
+        queries = {
+            "one date": (BrentOptionData.DateAsOf == dates[-1],),
+            "one expiry and type, 1 year": (BrentOptionData.FutureExpiryDate == EXPIRY_DATES[0], BrentOptionData.OptionType == 'Call',
+                                            BrentOptionData.DateAsOf.between(dates[-250], dates[-1])),
+            "one strike, 5 years": (BrentOptionData.FutureExpiryDate == EXPIRY_DATES[0], BrentOptionData.OptionType == 'Call',
+                                    BrentOptionData.DateAsOf.between(dates[0], dates[-1]), BrentOptionData.StrikePrice == 75.0),
+        }
+        print(f"{len(history)} rows, {len(dates)} dates")
+        for name, query in queries.items():
+            rows = len(persistence.fetch_records(BrentOptionData, query))
+            print(f"{name:30}: {rows:7} rows in {time_it(lambda: persistence.fetch_records(BrentOptionData, query)):8.2f} ms")
+        with persistence.engine.connect() as connection:
+            latest_date = select(func.max(BrentOptionData.DateAsOf))
+            print(f"{'latest DateAsOf':30}: {time_it(lambda: connection.execute(latest_date).scalar()):8.2f} ms")
+        print(f"{'distinct dates':30}: {time_it(lambda: persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf')):8.2f} ms")
+        persistence.engine.dispose()
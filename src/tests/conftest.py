@@ -0,0 +1,16 @@
+import pytest
+from dbutil.dbschema import get_optiondata_dbschmea
+from dbutil.optiondata_dao import DataPersistenceORM
+
+"""
+This module holds the fixtures shared by the test modules. The shared helpers are in tests.helpers.
+"""
+
+@pytest.fixture
+def persistence(tmp_path):
+    """
+    Pytest fixture returning a DataPersistenceORM on an empty temporary database with the tables of the application.
+    """
+    persistence = DataPersistenceORM('sqlite:///' + str(tmp_path / 'optiondata.db'))
+    persistence.create_table(get_optiondata_dbschmea())
+    return persistence
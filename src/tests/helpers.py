@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from typing import Callable, Dict
+
+"""
+This module holds the helpers shared by the test modules and the benchmarks: the random option chain and the
+TestClient of a set of endpoints.
+"""
+
+def generate_option_chain(number_of_rows: int, seed: int = 76) -> pd.DataFrame:
+    """
+    Generates a random end-of-day option chain of 20230331 with the same columns as the BrentOptionData table.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'DateAsOf': np.full(number_of_rows, 20230331),
+        'FutureExpiryDate': rng.choice([20230630, 20230930, 20231231, 20240131, 20240630], number_of_rows),
+        'OptionType': rng.choice(['Call', 'Put'], number_of_rows),
+        'StrikePrice': rng.uniform(20.0, 140.0, number_of_rows),
+        'CurrentPrice': rng.uniform(60.0, 90.0, number_of_rows),
+        'ImpliedVol': rng.uniform(0.1, 0.9, number_of_rows)
+    })
+
+def create_client(routes: Dict[str, Callable]) -> TestClient:
+    """
+    Returns a TestClient of an app serving the given endpoints, keyed by "METHOD /path", e.g. "GET /jobs/{job_id}".
+    """
+    app = FastAPI()
+    for route, endpoint in routes.items():
+        method, path = route.split(" ", 1)
+        app.add_api_route(path, endpoint, methods=[method])
+    return TestClient(app)
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+from models.b76_model import black_76_price
+from models.b76_greeks import B76GreeksCalculator, black_76_greeks, GREEK_COLUMNS
+
+"""
+This module contains test cases for the B76GreeksCalculator class in the b76_greeks module.
+The analytical greeks are validated against central finite differences of the vectorized Black-76 price.
+"""
+
+F = np.array([40.0, 40.0, 75.0, 75.0, 120.0])
+K = np.array([50.0, 50.0, 75.0, 60.0, 100.0])
+SIGMA = np.array([0.15, 0.15, 0.71, 0.4, 0.25])
+T = np.array([0.9, 0.9, 0.67, 0.25, 2.0])
+R = 0.05
+IS_CALL = np.array([True, False, True, False, True])
+
+def price(F=F, K=K, sigma=SIGMA, T=T, r=R):
+    return black_76_price(F, K, sigma, T, r, IS_CALL)
+
+def central_difference(function, bump):
+    return (function(+bump) - function(-bump)) / (2.0 * bump)
+
+@pytest.fixture
+def greeks():
+    return black_76_greeks(F, K, SIGMA, T, R, IS_CALL)
+
+def test_first_order_greeks_match_finite_differences(greeks):
+    """
+    Test case checking Delta, Vega, Theta and Rho against finite differences of the price.
+    """
+    np.testing.assert_allclose(greeks['Delta'], central_difference(lambda h: price(F=F + h), 1e-4), rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(greeks['Vega'], central_difference(lambda h: price(sigma=SIGMA + h), 1e-5), rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(greeks['Theta'], -central_difference(lambda h: price(T=T + h), 1e-6), rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(greeks['Rho'], central_difference(lambda h: price(r=R + h), 1e-6), rtol=1e-6, atol=1e-8)
+
+def test_second_order_greeks_match_finite_differences(greeks):
+    """
+    Test case checking Gamma, Vanna and Volga against finite differences of the first order greeks.
+    """
+    def greek(name, **bumped):
+        inputs = dict(F=F, K=K, sigma=SIGMA, T=T, r=R, is_call=IS_CALL)
+        inputs.update(bumped)
+        return black_76_greeks(**inputs)[name]
+
+    np.testing.assert_allclose(greeks['Gamma'], central_difference(lambda h: greek('Delta', F=F + h), 1e-4), rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(greeks['Vanna'], central_difference(lambda h: greek('Delta', sigma=SIGMA + h), 1e-5), rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(greeks['Volga'], central_difference(lambda h: greek('Vega', sigma=SIGMA + h), 1e-5), rtol=1e-6, atol=1e-8)
+
+def test_b76_greeks_calculator_adds_columns():
+    """
+    Test case checking that the calculator adds the price and every greek column to the market data.
+    """
+    market_data = pd.DataFrame({
+        'DateAsOf': [20220101, 20220101],
+        'FutureExpiryDate': [20230130, 20230130],
+        'OptionType': ['Call', 'Put'],
+        'StrikePrice': [50.0, 50.0],
+        'CurrentPrice': [40, 40],
+        'ImpliedVol': [0.15, 0.15]
+    })
+    option_greeks = B76GreeksCalculator(market_data).calculate_option_greeks()
+
+    assert set(GREEK_COLUMNS + ['OptionPrice']).issubset(option_greeks.columns)
+    assert option_greeks['OptionPrice'].tolist() == pytest.approx([0.1068075255, 9.66089102470656], abs=1e-6)
+    # Gamma and Vega do not depend on the option type.
+    assert option_greeks['Gamma'][0] == pytest.approx(option_greeks['Gamma'][1])
+    assert option_greeks['Vega'][0] == pytest.approx(option_greeks['Vega'][1])
+
+def test_jit_kernels_match_numpy_engine():
+    """
+    Test case checking that the numba kernels return the NumPy engine's prices and greeks, inf/NaN included.
+    Skipped when numba is not installed.
+    """
+    pytest.importorskip('numba')
+    from models.b76_jit import black_76_greeks_jit, black_76_price_jit
+    rng = np.random.default_rng(20)
+    F = np.r_[rng.uniform(20.0, 120.0, 1000), 50.0]
+    K = np.r_[rng.uniform(20.0, 120.0, 1000), 50.0]
+    sigma = np.r_[rng.uniform(0.05, 0.9, 1000), 0.0]
+    T = np.r_[rng.uniform(0.01, 3.0, 1000), 1.0]
+    r = np.r_[rng.uniform(-0.01, 0.1, 1000), 0.05]
+    is_call = rng.random(1001) < 0.5
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        numpy_price = black_76_price(F, K, sigma, T, r, is_call)
+        numpy_greeks = black_76_greeks(F, K, sigma, T, r, is_call)
+    np.testing.assert_allclose(black_76_price_jit(F, K, sigma, T, r, is_call), numpy_price, rtol=1e-12, atol=1e-12)
+    jit_greeks = black_76_greeks_jit(F, K, sigma, T, r, is_call)
+    for column, values in numpy_greeks.items():
+        np.testing.assert_allclose(jit_greeks[column], values, rtol=1e-9, atol=1e-9, err_msg=column)
@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+import pandas as pd
+from models.b76_model import B76OptionPricer
+from models.b76_greeks import B76GreeksCalculator
+from models.b76_implied_vol import B76ImpliedVolSolver, black_76_implied_vol
+from tests.helpers import generate_option_chain
+
+"""
+This module contains test cases for the B76ImpliedVolSolver class in the b76_implied_vol module.
+Prices are generated with B76OptionPricer and inverted back into the implied volatilities.
+"""
+
+def test_implied_vol_round_trip():
+    """
+    Test case checking that the solver recovers the volatilities used to generate the prices.
+    """
+    option_chain = B76OptionPricer(generate_option_chain(2000)).calculate_option_prices()
+    expected_vols = option_chain['ImpliedVol'].to_numpy()
+
+    market_data = option_chain.rename(columns={'OptionPrice': 'SettlementPrice'})
+    market_data['ImpliedVol'] = np.nan
+    solved = B76ImpliedVolSolver(market_data).calculate_implied_vols()
+
+    # Deep in or out of the money options carry almost no vega, their price does not pin down the volatility.
+    informative = B76GreeksCalculator(option_chain.copy()).calculate_option_greeks()['Vega'].to_numpy() > 1e-2
+    np.testing.assert_allclose(solved['ImpliedVol'].to_numpy()[informative], expected_vols[informative], rtol=1e-6)
+
+def test_implied_vol_keeps_given_vols_and_rejects_unreachable_prices():
+    """
+    Test case checking that provided vols are untouched and prices outside the model range give NaN.
+    """
+    market_data = pd.DataFrame({
+        'DateAsOf': [20220101, 20220101, 20220101],
+        'FutureExpiryDate': [20230130, 20230130, 20230130],
+        'OptionType': ['Call', 'Put', 'Call'],
+        'StrikePrice': [50.0, 50.0, 50.0],
+        'CurrentPrice': [40, 40, 40],
+        'ImpliedVol': [np.nan, 0.25, np.nan],
+        'SettlementPrice': [0.1068075255, 1.0, 45.0]
+    })
+    solved = B76ImpliedVolSolver(market_data).calculate_implied_vols()
+
+    assert solved['ImpliedVol'][0] == pytest.approx(0.15, abs=1e-8)
+    assert solved['ImpliedVol'][1] == 0.25
+    assert np.isnan(solved['ImpliedVol'][2])
+
+def test_implied_vol_scalar_inputs():
+    assert black_76_implied_vol(9.66089102470656, 40.0, 50.0, 0.9123287671232877, 0.05, False)[0] == pytest.approx(0.15, abs=1e-8)
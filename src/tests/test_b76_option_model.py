@@ -1,6 +1,8 @@
 import pytest
 import pandas as pd
-from models.b76_model import B76OptionPricer
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from models.b76_model import B76OptionPricer, TimeToMaturityTable, time_to_maturity
 
 """
 This module contains test cases for the B76OptionPricer class in the b76_model module.
@@ -41,3 +43,77 @@ def test_b76_option_pricer(b76_option_pricer):
     
     for index, row in calculated_option_prices.iterrows():
         assert row['OptionPrice'] == pytest.approx(expected_option_prices[index], abs=1e-6)
+
+def test_b76_vectorized_matches_rowwise():
+    """
+    Test case checking that the vectorized calculate_option_prices returns the same prices as the
+    row-wise reference implementation on a randomly generated option chain.
+    """
+    rng = np.random.default_rng(76)
+    number_of_rows = 500
+    # Every DateAsOf is before the settlement date, two months before the expiry, of its FutureExpiryDate.
+    date_pairs = np.array([(20220101, 20230130), (20220315, 20231231), (20230331, 20240131), (20220101, 20240131)])
+    date_pair_rows = date_pairs[rng.integers(len(date_pairs), size=number_of_rows)]
+    market_data = pd.DataFrame({
+        'DateAsOf': date_pair_rows[:, 0],
+        'FutureExpiryDate': date_pair_rows[:, 1],
+        'OptionType': rng.choice(['Call', 'Put'], number_of_rows),
+        'StrikePrice': rng.uniform(20.0, 120.0, number_of_rows),
+        'CurrentPrice': rng.uniform(30.0, 110.0, number_of_rows),
+        'ImpliedVol': rng.uniform(0.05, 0.9, number_of_rows)
+    })
+
+    vectorized_prices = B76OptionPricer(market_data.copy()).calculate_option_prices()['OptionPrice']
+    rowwise_prices = B76OptionPricer(market_data.copy()).calculate_option_prices_rowwise()['OptionPrice']
+
+    assert not vectorized_prices.isna().any()
+    np.testing.assert_allclose(vectorized_prices.to_numpy(), rowwise_prices.to_numpy(), rtol=1e-10, atol=1e-12)
+
+def test_expired_options_have_no_price():
+    """
+    Test case checking that an option whose settlement date is before its DateAsOf, i.e. with a negative time
+    to maturity, is priced NaN while the other options of the chain are priced.
+    """
+    market_data = sample_market_data.assign(DateAsOf=[20220101, 20221215])
+    assert time_to_maturity(market_data['DateAsOf'], market_data['FutureExpiryDate'])[1] < 0
+
+    with np.errstate(invalid='ignore'):
+        option_prices = B76OptionPricer(market_data.copy()).calculate_option_prices()['OptionPrice']
+    assert option_prices[0] == pytest.approx(expected_option_prices[0], abs=1e-6)
+    assert np.isnan(option_prices[1])
+
+def test_time_to_maturity_table_parses_each_date_pair_once():
+    """
+    Test case checking that the memoized year fractions match the per-row date parsing, and that a second
+    lookup of the same date pairs is served from the table.
+    """
+    date_as_of = pd.Series([20220101, 20220315, 20220101, 20230331, 20220315])
+    future_expiry_date = pd.Series([20230130, 20231231, 20230130, 20240131, 20231231])
+    settlement_date = pd.to_datetime(future_expiry_date.astype(str), format='%Y%m%d') - pd.DateOffset(months=2)
+    expected_T = (settlement_date - pd.to_datetime(date_as_of.astype(str), format='%Y%m%d')).dt.days / 365
+
+    np.testing.assert_allclose(time_to_maturity(date_as_of, future_expiry_date), expected_T.to_numpy())
+
+    table = TimeToMaturityTable(max_entries=10)
+    np.testing.assert_allclose(table.lookup(date_as_of, future_expiry_date, 2), expected_T.to_numpy())
+    assert len(table._tables[2]) == 3
+    table._tables[2][20220101 * 100_000_000 + 20230130] = -1.0
+    assert table.lookup(date_as_of, future_expiry_date, 2)[[0, 2]].tolist() == [-1.0, -1.0]
+
+def test_time_to_maturity_table_under_concurrent_lookups_and_clears():
+    """
+    Test case checking that the lookups of several threads stay correct while the table is cleared and overflows.
+    """
+    date_as_of = np.full(50, 20230331)
+    future_expiry_date = pd.date_range('2023-06-30', periods=50).strftime('%Y%m%d').astype(np.int64).to_numpy()
+    expected_T = time_to_maturity(date_as_of, future_expiry_date)
+    table = TimeToMaturityTable(max_entries=60)
+
+    def lookup_and_clear(thread_index):
+        for iteration in range(200):
+            np.testing.assert_allclose(table.lookup(date_as_of, future_expiry_date, 2), expected_T)
+            if iteration % 10 == thread_index:
+                table.clear()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lookup_and_clear, range(4)))
@@ -0,0 +1,51 @@
+import gzip
+import pandas as pd
+import pytest
+from util.csv_stream_reader import CsvChunkStreamReader
+
+"""
+This module contains test cases for the CsvChunkStreamReader class in the util.csv_stream_reader module.
+The CSV bytes are fed in small pieces cutting through lines to mimic a streamed request body.
+"""
+
+market_data = pd.DataFrame({
+    'DateAsOf': [20230331] * 25,
+    'FutureExpiryDate': [20240131] * 25,
+    'OptionType': ['Call', 'Put'] * 12 + ['Call'],
+    'StrikePrice': [float(strike) for strike in range(50, 75)],
+    'CurrentPrice': [75.0] * 25,
+    'ImpliedVol': [0.7] * 25
+})
+
+def feed_in_pieces(stream_reader: CsvChunkStreamReader, data: bytes, piece_size: int) -> list:
+    chunks = []
+    for start in range(0, len(data), piece_size):
+        chunks.extend(stream_reader.feed(data[start:start + piece_size]))
+    return chunks + stream_reader.close()
+
+@pytest.mark.parametrize("gzip_compressed", [False, True])
+def test_stream_is_parsed_in_bounded_chunks(gzip_compressed):
+    """
+    Test case checking that the chunks hold every row once, with the header, and never more than chunk_rows rows.
+    """
+    csv_bytes = market_data.to_csv(index=False).encode()
+    if gzip_compressed:
+        csv_bytes = gzip.compress(csv_bytes)
+
+    stream_reader = CsvChunkStreamReader(chunk_rows=10, gzip_compressed=gzip_compressed)
+    chunks = feed_in_pieces(stream_reader, csv_bytes, piece_size=37)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) == 10 for chunk in chunks[:-1])
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), market_data)
+
+def test_stream_without_trailing_newline_and_invalid_gzip():
+    """
+    Test case checking that the last line is parsed without a trailing newline and that a bad gzip stream raises a ValueError.
+    """
+    csv_bytes = market_data.to_csv(index=False).encode().rstrip(b"\n")
+    chunks = feed_in_pieces(CsvChunkStreamReader(chunk_rows=1000), csv_bytes, piece_size=64)
+    assert len(chunks) == 1 and len(chunks[0]) == len(market_data)
+
+    with pytest.raises(ValueError):
+        feed_in_pieces(CsvChunkStreamReader(gzip_compressed=True), b"not a gzip stream", piece_size=64)
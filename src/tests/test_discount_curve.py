@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from api.discount_curves import DiscountCurveManager
+from api.option_price_store import OptionPriceStore
+from api.option_pricer import OptionPricer
+from dbutil.dbschema import BrentOptionData
+from models.b76_model import black_76_price, time_to_maturity
+from models.discount_curve import DiscountCurve, curve_zero_rates
+from tests.helpers import create_client
+
+"""
+This module contains test cases for the DiscountCurve class in the models.discount_curve module and for the
+DiscountCurveManager class in the api.discount_curves module.
+"""
+
+def test_discount_factors_are_log_linear_between_pillars():
+    """
+    Test case checking the pillar values, the flat forward interpolation and extrapolation and the zero rates.
+    """
+    curve = DiscountCurve([0.5, 1.0, 2.0], np.exp(-np.array([0.02 * 0.5, 0.03 * 1.0, 0.04 * 2.0])))
+
+    np.testing.assert_allclose(curve.zero_rates([0.5, 1.0, 2.0]), [0.02, 0.03, 0.04])
+    # Forward rate of 4% between 0.5 and 1 year, and of 5% after the last pillar.
+    np.testing.assert_allclose(curve.discount_factor([0.75, 3.0]), [np.exp(-0.01 - 0.04 * 0.25), np.exp(-0.08 - 0.05)])
+    np.testing.assert_allclose(curve.zero_rates([0.0, 0.25]), [0.02, 0.02])
+    np.testing.assert_allclose(DiscountCurve.flat(0.05).zero_rates([0.1, 1.0, 7.0]), 0.05)
+
+    with pytest.raises(ValueError):
+        DiscountCurve([1.0, 0.5], [0.99, 0.98])
+
+def test_curve_zero_rates_use_the_curve_of_each_date():
+    """
+    Test case checking that every option gets the rate of its own date's curve, or of the default curve.
+    """
+    curves = {20230331: DiscountCurve.flat(0.01), 20230428: DiscountCurve.flat(0.02)}
+    zero_rates = curve_zero_rates([20230428, 20230331, 20230501, 20230331], [1.0, 1.0, 1.0, 2.0], curves, DiscountCurve.flat(0.05))
+    np.testing.assert_allclose(zero_rates, [0.02, 0.01, 0.05, 0.01])
+
+@pytest.fixture
+def persistence(persistence):
+    """
+    Pytest fixture returning the temporary database with one option.
+    """
+    persistence.add_records(BrentOptionData, pd.DataFrame({
+        'DateAsOf': [20230331], 'FutureExpiryDate': [20240131], 'OptionType': ['Call'],
+        'StrikePrice': [80.0], 'CurrentPrice': [75.0], 'ImpliedVol': [0.3]}))
+    return persistence
+
+@pytest.fixture
+def client(persistence):
+    """
+    Pytest fixture returning a TestClient of the curve and pricing endpoints.
+    """
+    option_pricer = OptionPricer(persistence)
+    curve_manager = DiscountCurveManager(persistence, caches=[option_pricer.result_cache])
+    option_pricer.curve_manager = curve_manager
+    return create_client({"POST /loaddiscountcurves": curve_manager.load_discount_curves,
+                          "GET /fetchdiscountcurve/{date_as_of}": curve_manager.fetch_discount_curve,
+                          "GET /v2/calculateoptionprices/{date_as_of}/": option_pricer.calculate_market_prices_v2})
+
+def test_loaded_curve_reprices_the_cached_chain(client, persistence):
+    """
+    Test case checking that loading a curve invalidates the cached prices and that the new prices, returned and
+    stored, use the curve rate.
+    """
+    T = time_to_maturity([20230331], [20240131])
+    flat_price = client.get("/v2/calculateoptionprices/20230331/").json()[0]['OptionPrice']
+    assert flat_price == pytest.approx(black_76_price(75.0, 80.0, 0.3, T, 0.05, True)[0])
+    assert client.get("/fetchdiscountcurve/20230331").status_code == 404
+
+    response = client.post("/loaddiscountcurves", json={"data": [
+        {"DateAsOf": 20230331, "MaturityDate": 20230630, "ZeroRate": 0.03},
+        {"DateAsOf": 20230331, "MaturityDate": 20240331, "DiscountFactor": float(np.exp(-0.035 * 366 / 365))}]})
+    assert response.status_code == 200 and response.json()["dates"] == [20230331]
+    assert response.json()["priced"] == 1
+
+    curve = client.get("/fetchdiscountcurve/20230331").json()
+    np.testing.assert_allclose(curve["ZeroRate"], [0.03, 0.035])
+    expected_rate = DiscountCurveManager._build_curves(pd.DataFrame({
+        'DateAsOf': [20230331, 20230331], 'MaturityDate': curve["MaturityDate"], 'DiscountFactor': curve["DiscountFactor"]
+    }))[20230331].zero_rates(T)
+    curve_price = client.get("/v2/calculateoptionprices/20230331/").json()[0]['OptionPrice']
+    assert curve_price == pytest.approx(black_76_price(75.0, 80.0, 0.3, T, expected_rate, True)[0])
+    assert curve_price != pytest.approx(flat_price)
+    stored_price = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))['OptionPrice']
+    assert stored_price.tolist() == pytest.approx([curve_price])
+
+def test_invalid_curve_is_rejected(client):
+    response = client.post("/loaddiscountcurves", json={"data": [
+        {"DateAsOf": 20230331, "MaturityDate": 20230630, "DiscountFactor": -1.0}]})
+    assert response.status_code == 400
+    response = client.post("/loaddiscountcurves", json={"data": [{"DateAsOf": 20230331, "MaturityDate": 20230630}]})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_prices_stored_during_a_curve_load_use_the_new_curve(persistence):
+    """
+    Test case checking that the prices computed with the previous curve of a date and stored after a curve load
+    reset them are computed again with the new curve.
+    """
+    curve_manager = DiscountCurveManager(persistence)
+    pricing_environments = [{}, {"discount_curves": {20230331: DiscountCurve.flat(0.02)}}]
+
+    async def get_pricing_environment(dates):
+        pricing_environment = pricing_environments.pop(0)
+        if pricing_environments:
+            # A curve is loaded for the date while the prices of the previous curve are computed.
+            curve_manager.curve_cache.invalidate(dates)
+        return pricing_environment
+
+    price_store = OptionPriceStore(persistence, get_pricing_environment=get_pricing_environment,
+                                   get_curve_generations=curve_manager.curve_generations)
+    await price_store.store_option_prices([20230331])
+
+    T = time_to_maturity([20230331], [20240131])
+    stored_price = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))['OptionPrice']
+    assert stored_price.tolist() == pytest.approx(black_76_price(75.0, 80.0, 0.3, T, 0.02, True).tolist())
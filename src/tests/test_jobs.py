@@ -0,0 +1,130 @@
+import asyncio
+import time
+import pytest
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from api.jobs import JobManager
+from api.option_pricer import OptionPricer
+from api.optionadata_uploader import OptionDataUploader
+from dbutil.dbschema import JobData
+from dbutil.optiondata_dao import DataPersistence
+from tests.helpers import create_client
+from util.job_queue import JobQueue
+
+"""
+This module contains test cases for the JobManager class in the api.jobs module and the JobQueue class in the
+util.job_queue module. The jobs run on the event loop of the TestClient, against a temporary SQLite database.
+"""
+
+columnar_market_data = {
+    'DateAsOf': [20230331, 20230331, 20230331],
+    'FutureExpiryDate': [20240131, 20240131, 20240131],
+    'OptionType': ['Call', 'Put', 'Call'],
+    'StrikePrice': [100.0, 90.0, 80.0],
+    'CurrentPrice': [75.0, 75.0, 75.0],
+    'ImpliedVol': [0.78, 0.76, 0.74]
+}
+
+def create_job_client(persistence: DataPersistence) -> TestClient:
+    """
+    Returns a TestClient of the job endpoints, the upload chunks are of 2 rows to report the progress of every chunk.
+    """
+    job_queue = JobQueue(persistence, worker_count=1)
+    option_pricer = OptionPricer(persistence)
+    job_manager = JobManager(job_queue, OptionDataUploader(persistence, caches=[option_pricer.result_cache], stream_chunk_rows=2),
+                             option_pricer)
+    client = create_client({"POST /jobs/loadmarketdatafile": job_manager.submit_market_data_file,
+                            "POST /jobs/loadmarketdatajsoncolumnar": job_manager.submit_market_data_json_columnar,
+                            "POST /jobs/calculateoptionprices/{date_as_of}/": job_manager.submit_option_pricing,
+                            "GET /jobs/{job_id}": job_manager.fetch_job_status,
+                            "GET /jobs/{job_id}/result": job_manager.fetch_job_result})
+    client.app.add_event_handler("startup", job_queue.start)
+    client.app.add_event_handler("shutdown", job_queue.stop)
+    return client
+
+def wait_for_job(client: TestClient, job_id: str) -> dict:
+    for _ in range(200):
+        job_state = client.get(f"/jobs/{job_id}").json()
+        if job_state["Status"] in ("done", "failed"):
+            return job_state
+        time.sleep(0.05)
+    raise TimeoutError(f"The job {job_id} did not finish.")
+
+def test_upload_and_pricing_jobs(persistence):
+    """
+    Test case checking that the upload and pricing requests return a JobId at once and that the status reports
+    the rows processed and the result of the finished jobs.
+    """
+    with create_job_client(persistence) as client:
+        response = client.post("/jobs/loadmarketdatajsoncolumnar", json=columnar_market_data)
+        assert response.status_code == 202
+        job_state = wait_for_job(client, response.json()["JobId"])
+        assert (job_state["Status"], job_state["JobType"]) == ("done", "loadmarketdatajsoncolumnar")
+        assert (job_state["RowsProcessed"], job_state["RowsTotal"]) == (3, 3)
+        assert client.get(f"/jobs/{job_state['JobId']}/result").json()["inserted"] == 3
+
+        csv_content = pd.DataFrame(columnar_market_data).assign(ImpliedVol=0.5).to_csv(index=False).encode()
+        response = client.post("/jobs/loadmarketdatafile", files={"file": ("optionchain.csv", csv_content)})
+        job_state = wait_for_job(client, response.json()["JobId"])
+        assert (job_state["RowsProcessed"], job_state["RowsTotal"]) == (3, 3)
+        assert client.get(f"/jobs/{job_state['JobId']}/result").json()["updated"] == 3
+
+        response = client.post("/jobs/calculateoptionprices/20230331/")
+        job_state = wait_for_job(client, response.json()["JobId"])
+        option_prices = client.get(f"/jobs/{job_state['JobId']}/result").json()
+        assert job_state["RowsProcessed"] == len(option_prices) == 3
+        assert all(option_price["ImpliedVol"] == 0.5 and option_price["OptionPrice"] > 0 for option_price in option_prices)
+
+def test_failed_and_unknown_jobs(persistence):
+    """
+    Test case checking that an invalid upload fails its job with the error message, and the 404, 409 and 400 responses.
+    """
+    with create_job_client(persistence) as client:
+        response = client.post("/jobs/loadmarketdatajsoncolumnar", json={**columnar_market_data, 'StrikePrice': [100.0]})
+        job_state = wait_for_job(client, response.json()["JobId"])
+        assert job_state["Status"] == "failed" and "same number of values" in job_state["Error"]
+        assert client.get(f"/jobs/{job_state['JobId']}/result").status_code == 409
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.post("/jobs/calculateoptionprices/20230331/", params={"model": "Heston"}).status_code == 400
+        assert client.post("/jobs/loadmarketdatafile", files={"file": ("optionchain.txt", b"")}).status_code == 400
+
+def test_unfinished_jobs_are_failed_on_start(persistence):
+    """
+    Test case checking that the jobs left queued by a previous process are failed when the queue starts.
+    """
+    persistence.upsert_records(JobData, pd.DataFrame([{'JobId': 'interrupted', 'JobType': 'loadmarketdatafile',
+                                                       'Status': 'queued', 'RowsProcessed': 0, 'SubmittedAt': time.time(),
+                                                       'UpdatedAt': time.time()}]))
+    with create_job_client(persistence) as client:
+        job_state = client.get("/jobs/interrupted").json()
+    assert job_state["Status"] == "failed" and job_state["RowsTotal"] is None
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_the_submissions(persistence):
+    """
+    Test case checking that the submissions beyond max_queued_jobs waiting jobs are rejected with a 503 and not stored.
+    """
+    job_queue = JobQueue(persistence, worker_count=1, max_queued_jobs=1)
+    release_jobs = asyncio.Event()
+
+    async def blocked_job(report_progress):
+        await release_jobs.wait()
+        return "{}"
+
+    await job_queue.start()
+    try:
+        running_job_id = await job_queue.submit("blocked", blocked_job)
+        while (await job_queue.fetch_job(running_job_id))["Status"] != "running":
+            await asyncio.sleep(0.01)
+        queued_job_id = await job_queue.submit("blocked", blocked_job)
+        with pytest.raises(HTTPException) as http_error:
+            await job_queue.submit("blocked", blocked_job)
+        assert http_error.value.status_code == 503
+        assert len(persistence.fetch_records(JobData, (JobData.JobId.is_not(None),))) == 2
+
+        release_jobs.set()
+        while (await job_queue.fetch_job(queued_job_id))["Status"] != "done":
+            await asyncio.sleep(0.01)
+    finally:
+        await job_queue.stop()
@@ -0,0 +1,75 @@
+import sqlite3
+import pytest
+import pandas as pd
+from sqlalchemy import inspect, text
+from dbutil.dbschema import BrentOptionData, get_optiondata_dbschmea
+from dbutil.optiondata_dao import DataPersistenceORM
+from dbutil.migrations import SchemaMigrator
+
+"""
+This module contains test cases for the SchemaMigrator class in the dbutil.migrations module.
+The legacy database is the table created by pandas.to_sql before the primary key was declared.
+"""
+
+legacy_market_data = pd.DataFrame({
+    'DateAsOf': [20230331, 20230331, 20230331, 20230428, None],
+    'FutureExpiryDate': [20240131, 20240131, 20240131, 20240131, 20240131],
+    'OptionType': ['Call', 'Put', 'Call', 'Call', 'Call'],
+    'StrikePrice': [100.0, 90.0, 100.0, 100.0, 80.0],
+    'CurrentPrice': [75.0, 75.0, 75.0, 78.0, 75.0],
+    'ImpliedVol': [0.78, 0.76, 0.5, 0.7, 0.7]
+})
+
+def describe_schema(persistence: DataPersistenceORM) -> tuple:
+    with persistence.engine.connect() as connection:
+        inspector = inspect(connection)
+        table_sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'BrentOptionData'")).scalar()
+        return ([(column['name'], str(column['type']), column['nullable']) for column in inspector.get_columns('BrentOptionData')],
+                inspector.get_pk_constraint('BrentOptionData')['constrained_columns'],
+                [(index['name'], index['column_names']) for index in inspector.get_indexes('BrentOptionData')],
+                table_sql.rstrip().endswith('WITHOUT ROWID'),
+                SchemaMigrator.schema_version(connection))
+
+def test_legacy_table_is_migrated_to_the_declared_schema(persistence, tmp_path):
+    """
+    Test case checking that the legacy table is rebuilt with the schema of a new database, keeping the last
+    uploaded row of the duplicated keys and dropping the rows without key.
+    """
+    legacy_database = tmp_path / 'legacy.db'
+    with sqlite3.connect(legacy_database) as connection:
+        legacy_market_data.to_sql('BrentOptionData', connection, index=False)
+
+    migrated_persistence = DataPersistenceORM('sqlite:///' + str(legacy_database))
+    migrated_persistence.create_table(get_optiondata_dbschmea())
+
+    assert describe_schema(migrated_persistence) == describe_schema(persistence)
+    assert describe_schema(persistence)[3:] == (True, 3)
+    migrated_data = migrated_persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))
+    assert sorted(migrated_data['ImpliedVol'].tolist()) == [0.5, 0.76]
+    assert migrated_persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf') == [20230331, 20230428]
+
+    # Running the migrations again is a no-op.
+    migrated_persistence.create_table(get_optiondata_dbschmea())
+    assert len(migrated_persistence.fetch_records(BrentOptionData, "DateAsOf > 0")) == 3
+
+def test_queries_use_the_clustered_key_and_covering_index(persistence):
+    """
+    Test case checking the query plans of the single date, the expiry history and the latest date queries.
+    """
+    query_plans = {
+        "SELECT * FROM BrentOptionData WHERE DateAsOf = 20230331": "USING PRIMARY KEY (DateAsOf=?)",
+        "SELECT * FROM BrentOptionData WHERE FutureExpiryDate = 20240131 AND OptionType = 'Call' "
+        "AND DateAsOf BETWEEN 20220101 AND 20221231": "USING COVERING INDEX ix_BrentOptionData_expiry_history",
+        "SELECT MAX(DateAsOf) FROM BrentOptionData": "USING PRIMARY KEY",
+    }
+    with persistence.engine.connect() as connection:
+        for query, expected_plan in query_plans.items():
+            plan = " ".join(row[-1] for row in connection.execute(text("EXPLAIN QUERY PLAN " + query)))
+            assert expected_plan in plan, plan
+
+def test_database_newer_than_the_migrations_is_rejected(tmp_path):
+    persistence = DataPersistenceORM('sqlite:///' + str(tmp_path / 'optiondata.db'))
+    with persistence.engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA user_version = 99")
+    with pytest.raises(ValueError):
+        persistence.create_table(get_optiondata_dbschmea())
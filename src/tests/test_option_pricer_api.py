@@ -1,8 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from api.option_pricer import OptionPricer
+from dbutil.dbschema import BrentOptionData
 from dbutil.optiondata_dao import DataPersistence
+from tests.helpers import create_client
 import pandas as pd
 import json
 
@@ -145,4 +147,92 @@ async def test_validate_put_prices(option_pricer_put):
     option_price = success_data[0]["OptionPrice"]
     
     tolerance_value = 1e-6
-    assert option_price == pytest.approx(PUT_OPTION_VALUE, abs=tolerance_value)
\ No newline at end of file
+    assert option_price == pytest.approx(PUT_OPTION_VALUE, abs=tolerance_value)
+
+def test_range_prices_are_streamed_by_date(persistence):
+    """
+        Test case for the calculate_market_prices_range method: the rows of the dates in the range are priced in one
+        call and streamed as one NDJSON line per DateAsOf, with the same prices as the single date endpoint.
+    """
+    persistence.add_records(BrentOptionData, pd.DataFrame({
+        "DateAsOf": [20220101, 20220101, 20220102, 20220103, 20220104],
+        "FutureExpiryDate": [20230130, 20230228, 20230130, 20230130, 20230130],
+        "OptionType": ["Call", "Put", "Put", "Call", "Call"],
+        "StrikePrice": [50.0, 50.0, 50.0, 55.0, 55.0],
+        "CurrentPrice": [40.0, 40.0, 41.0, 42.0, 43.0],
+        "ImpliedVol": [0.15, 0.2, 0.15, 0.15, 0.15]
+    }))
+    option_pricer = OptionPricer(persistence)
+    client = create_client({"GET /v2/calculateoptionprices_range/": option_pricer.calculate_market_prices_range,
+                            "GET /v2/calculateoptionprices/{date_as_of}/": option_pricer.calculate_market_prices_v2})
+
+    response = client.get("/v2/calculateoptionprices_range/", params={"start_date": 20220101, "end_date": 20220103})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    date_groups = [json.loads(line) for line in response.text.splitlines()]
+    assert [date_group["DateAsOf"] for date_group in date_groups] == [20220101, 20220102, 20220103]
+    assert date_groups[0]["records"] == client.get("/v2/calculateoptionprices/20220101/").json()
+
+    response = client.get("/v2/calculateoptionprices_range/",
+                          params={"start_date": 20220101, "end_date": 20220104, "future_expiry_date": 20230130, "option_type": "Call"})
+    assert [json.loads(line)["DateAsOf"] for line in response.text.splitlines()] == [20220101, 20220103, 20220104]
+    assert client.get("/v2/calculateoptionprices_range/", params={"start_date": 20200101, "end_date": 20200102}).text == ""
+    assert client.get("/v2/calculateoptionprices_range/", params={"start_date": 20220102, "end_date": 20220101}).status_code == 400
+
+@pytest.mark.asyncio
+async def test_model_parameter(option_pricer_put):
+    """
+        Test case for the model parameter: the chains of every model are cached separately and an unknown model is rejected.
+    """
+    black_76_prices = await option_pricer_put.get_option_prices(20220101)
+    american_prices = await option_pricer_put.get_option_prices(20220101, 'BAW')
+
+    assert black_76_prices['OptionPrice'][0] == pytest.approx(19.11287473, abs=1e-6)
+    assert american_prices['OptionPrice'][0] == pytest.approx(20.0)
+    assert await option_pricer_put.get_option_prices(20220101) is black_76_prices
+    with pytest.raises(HTTPException) as http_error:
+        await option_pricer_put.calculate_market_prices(20220101, model='Heston')
+    assert http_error.value.status_code == 400
+
+def test_bachelier_prices_need_a_normal_vol_below_a_zero_forward(persistence):
+    """
+        Test case for the Bachelier pricing of a negative forward: it is priced from its NormalVol, and rejected with
+        a 400 rather than returned without a price when it only has a lognormal ImpliedVol.
+    """
+    persistence.add_records(BrentOptionData, pd.DataFrame({
+        "DateAsOf": [20220101, 20220101, 20220102],
+        "FutureExpiryDate": [20230130, 20230130, 20230130],
+        "OptionType": ["Call", "Put", "Put"],
+        "StrikePrice": [50.0, 0.5, 0.5],
+        "CurrentPrice": [40.0, -0.5, -0.5],
+        "ImpliedVol": [0.15, None, 0.5],
+        "NormalVol": [None, 0.4, None]
+    }))
+    client = create_client({"GET /v2/calculateoptionprices/{date_as_of}/": OptionPricer(persistence).calculate_market_prices_v2})
+
+    option_prices = client.get("/v2/calculateoptionprices/20220101/", params={"model": "auto"}).json()
+    assert [option_price["PricingModel"] for option_price in option_prices] == ["Black76", "Bachelier"]
+    assert all(option_price["OptionPrice"] > 0 for option_price in option_prices)
+    response = client.get("/v2/calculateoptionprices/20220102/", params={"model": "auto"})
+    assert response.status_code == 400
+    assert "no NormalVol" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_chain_read_before_an_invalidation_is_not_cached(option_pricer_put):
+    """
+        Test case for the result cache generation: a chain priced from data read before an upload invalidated its date
+        is returned but not cached.
+    """
+    fetch_records = option_pricer_put.persistence.fetch_records
+
+    def fetch_records_then_upload(*args, **kwargs):
+        fetched_data = fetch_records(*args, **kwargs)
+        option_pricer_put.result_cache.invalidate([20220101])
+        return fetched_data
+
+    option_pricer_put.persistence.fetch_records = fetch_records_then_upload
+    assert len(await option_pricer_put.get_option_prices(20220101)) == 1
+    assert option_pricer_put.result_cache.get(20220101) is None
+
+    option_pricer_put.persistence.fetch_records = fetch_records
+    black_76_prices = await option_pricer_put.get_option_prices(20220101)
+    assert option_pricer_put.result_cache.get(20220101)['Black76'] is black_76_prices
@@ -0,0 +1,141 @@
+import pytest
+import numpy as np
+import pandas as pd
+from dbutil.dbschema import BrentOptionData
+from dbutil.async_optiondata_dao import AsyncDataPersistence
+
+"""
+This module contains test cases for the DataPersistenceORM class in the dbutil.optiondata_dao module.
+Every test runs against a temporary SQLite database file.
+"""
+
+sample_market_data = pd.DataFrame({
+    'DateAsOf': [20230331, 20230331, 20230331, 20230428],
+    'FutureExpiryDate': [20240131, 20240131, 20240131, 20240131],
+    'OptionType': ['Call', 'Call', 'Put', 'Call'],
+    'StrikePrice': [100.0, 90.0, 80.0, 100.0],
+    'CurrentPrice': [75.0, 75.0, 75.0, 78.0],
+    'ImpliedVol': [0.78, 0.76, 0.74, 0.7]
+})
+
+@pytest.fixture
+def persistence(persistence):
+    """
+    Pytest fixture returning the temporary database loaded with sample_market_data.
+    """
+    persistence.add_records(BrentOptionData, sample_market_data)
+    return persistence
+
+def sort_records(data: pd.DataFrame) -> pd.DataFrame:
+    return data[sample_market_data.columns].sort_values(['DateAsOf', 'StrikePrice']).reset_index(drop=True)
+
+def test_fetch_records_matches_orm_path(persistence):
+    """
+    Test case checking that the Core SELECT path returns the same typed records as the ORM path.
+    """
+    query = (BrentOptionData.DateAsOf == 20230331,)
+    fetched_data = persistence.fetch_records(BrentOptionData, query)
+
+    pd.testing.assert_frame_equal(sort_records(fetched_data), sort_records(persistence.fetch_records_orm(BrentOptionData, query)))
+    assert fetched_data['DateAsOf'].dtype == np.int64
+    assert fetched_data['StrikePrice'].dtype == np.float64
+    assert len(persistence.fetch_records(BrentOptionData, "DateAsOf = 20230428")) == 1
+    assert len(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == np.int64(20230428),))) == 1
+
+def test_fetch_records_without_matches_keeps_columns(persistence):
+    """
+    Test case checking that an empty result still has the table columns.
+    """
+    fetched_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 19990101,))
+    assert fetched_data.empty
+    assert set(fetched_data.columns) == set(sample_market_data.columns) | {'OptionPrice', 'NormalVol'}
+
+def test_fetch_distinct_values_with_range_and_pagination(persistence):
+    """
+    Test case checking the SELECT DISTINCT path with a date range filter and pagination.
+    """
+    assert persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf') == [20230331, 20230428]
+    assert persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf', (BrentOptionData.DateAsOf >= 20230401,)) == [20230428]
+    assert persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf', limit=1, offset=1) == [20230428]
+
+def test_upsert_records_reports_inserted_and_updated(persistence):
+    """
+    Test case checking that re-sending a corrected chain updates the existing keys and inserts the new ones.
+    """
+    corrected_data = sample_market_data[sample_market_data['DateAsOf'] == 20230331].copy()
+    corrected_data['ImpliedVol'] = [0.5, 0.51, 0.52]
+    new_row = pd.DataFrame({'DateAsOf': [20230331], 'FutureExpiryDate': [20240131], 'OptionType': ['Put'],
+                            'StrikePrice': [70.0], 'CurrentPrice': [75.0], 'ImpliedVol': [0.6]})
+
+    report = persistence.upsert_records(BrentOptionData, pd.concat([corrected_data, new_row]), chunk_size=2)
+
+    assert report == {"inserted": 1, "updated": 3}
+    fetched_data = sort_records(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,)))
+    assert fetched_data['ImpliedVol'].tolist() == [0.6, 0.52, 0.51, 0.5]
+    assert len(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230428,))) == 1
+
+def test_replace_records_is_one_transaction(persistence):
+    """
+    Test case checking that replace_records deletes the matching records and stores the data in their place,
+    and keeps the records as they were when the data cannot be stored.
+    """
+    query = (BrentOptionData.DateAsOf == 20230331,)
+    replacement = sample_market_data.head(1).assign(ImpliedVol=0.5)
+    assert persistence.replace_records(BrentOptionData, query, replacement) == {"inserted": 1, "updated": 0}
+    assert persistence.fetch_records(BrentOptionData, query)['ImpliedVol'].tolist() == [0.5]
+    assert len(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230428,))) == 1
+
+    # The list of the ImpliedVol cannot be bound, the delete is rolled back with the failed upsert.
+    with pytest.raises(ValueError):
+        persistence.replace_records(BrentOptionData, query, replacement.assign(ImpliedVol=[[0.6]]))
+    assert persistence.fetch_records(BrentOptionData, query)['ImpliedVol'].tolist() == [0.5]
+
+@pytest.mark.asyncio
+async def test_async_persistence_matches_sync_persistence(persistence):
+    """
+    Test case checking that the aiosqlite implementation reads, upserts, deletes and replaces like DataPersistenceORM.
+    """
+    async_persistence = AsyncDataPersistence('sqlite+aiosqlite:///' + persistence.engine.url.database)
+    query = (BrentOptionData.DateAsOf == 20230331,)
+    try:
+        pd.testing.assert_frame_equal(await async_persistence.fetch_records(BrentOptionData, query),
+                                      persistence.fetch_records(BrentOptionData, query))
+        assert await async_persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf', limit=1) == [20230331]
+
+        report = await async_persistence.upsert_records(BrentOptionData, sample_market_data.tail(2).assign(ImpliedVol=0.5))
+        assert report == {"inserted": 0, "updated": 2}
+        await async_persistence.delete_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230428,))
+        assert persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf') == [20230331]
+        report = await async_persistence.replace_records(BrentOptionData, (BrentOptionData.StrikePrice == 100.0,),
+                                                         sample_market_data.tail(1))
+        assert report == {"inserted": 1, "updated": 0}
+        assert persistence.fetch_distinct_values(BrentOptionData, 'DateAsOf') == [20230331, 20230428]
+        assert persistence.fetch_records(BrentOptionData, (BrentOptionData.StrikePrice == 80.0,))['ImpliedVol'].tolist() == [0.5]
+    finally:
+        await async_persistence.engine.dispose()
+
+def test_upsert_resets_the_derived_columns_of_the_changed_records(persistence):
+    """
+    Test case checking that the upserts keep the stored OptionPrice of the unchanged records only, and that
+    update_matching_records skips the records changed since they were read, and the records priced since then
+    with only_null_values.
+    """
+    stored_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))
+    assert persistence.update_matching_records(BrentOptionData, stored_data.assign(OptionPrice=1.0), ['OptionPrice']) == 3
+
+    changed_data = sample_market_data[sample_market_data['DateAsOf'] == 20230331].copy()
+    changed_data.loc[changed_data['StrikePrice'] == 80.0, 'ImpliedVol'] = 0.5
+    persistence.upsert_records(BrentOptionData, changed_data)
+    fetched_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,)).sort_values('StrikePrice')
+    assert fetched_data['OptionPrice'].tolist() == pytest.approx([np.nan, 1.0, 1.0], nan_ok=True)
+
+    # The price computed from the values read before the change is not stored.
+    assert persistence.update_matching_records(BrentOptionData, stored_data.assign(OptionPrice=2.0), ['OptionPrice']) == 2
+
+    # With only_null_values the prices stored since the data was read are kept, only the unpriced record is updated.
+    assert persistence.update_matching_records(BrentOptionData, stored_data.assign(OptionPrice=3.0), ['OptionPrice'],
+                                               only_null_values=True) == 0
+    unpriced_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,
+                                                                BrentOptionData.OptionPrice.is_(None)))
+    assert persistence.update_matching_records(BrentOptionData, unpriced_data.assign(OptionPrice=3.0), ['OptionPrice'],
+                                               only_null_values=True) == 1
@@ -0,0 +1,86 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from api.option_pricer import OptionPricer
+from api.optionadata_uploader import OptionDataUploader
+from dbutil.dbschema import BrentOptionData
+from models.b76_model import B76OptionPricer
+from tests.helpers import create_client
+
+"""
+This module contains test cases for the columnar JSON upload of the OptionDataUploader class in the api.optionadata_uploader module.
+The uploads are stored in a temporary SQLite database.
+"""
+
+columnar_market_data = {
+    'DateAsOf': [20230331, 20230331, 20230331],
+    'FutureExpiryDate': [20240131, 20240131, 20240131],
+    'OptionType': ['Call', 'Put', 'Call'],
+    'StrikePrice': [100.0, 90.0, 80.0],
+    'CurrentPrice': [75.0, 75.0, 75.0],
+    'ImpliedVol': [0.78, 0.76, 0.74]
+}
+
+@pytest.fixture
+def client(persistence):
+    """
+    Pytest fixture returning a TestClient posting to the columnar upload endpoint backed by the temporary database.
+    """
+    return create_client({"POST /loadmarketdatajsoncolumnar": OptionDataUploader(persistence).load_market_data_json_columnar})
+
+def test_columnar_upload_is_stored_with_typed_columns(client, persistence):
+    """
+    Test case checking that a columnar upload is stored and that re-sending it updates the same keys.
+    """
+    response = client.post("/loadmarketdatajsoncolumnar", json=columnar_market_data)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+    assert client.post("/loadmarketdatajsoncolumnar", json=columnar_market_data).json()["updated"] == 3
+
+    stored_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))
+    expected_data = pd.DataFrame(columnar_market_data)
+    pd.testing.assert_frame_equal(stored_data.sort_values('StrikePrice').reset_index(drop=True)[expected_data.columns],
+                                  expected_data.sort_values('StrikePrice').reset_index(drop=True))
+
+@pytest.mark.parametrize("invalid_body", [
+    {**columnar_market_data, 'StrikePrice': [100.0, 90.0]},
+    {**columnar_market_data, 'OptionType': ['Call', 'Straddle', 'Put']},
+    {**columnar_market_data, 'DateAsOf': ['yesterday', 20230331, 20230331]},
+    {**columnar_market_data, 'DateAsOf': [20230331.7, 20230331, 20230331]},
+    {**columnar_market_data, 'Volume': [1, 2, 3]},
+    [columnar_market_data],
+])
+def test_invalid_columnar_upload_is_rejected(client, invalid_body):
+    """
+    Test case checking that mismatched lengths, unknown option types or columns and wrongly typed values return a 400.
+    """
+    response = client.post("/loadmarketdatajsoncolumnar", content=json.dumps(invalid_body))
+    assert response.status_code == 400
+
+def test_upload_prices_only_the_new_and_changed_rows(persistence):
+    """
+    Test case checking that the uploads store the Black-76 price of the new and changed rows only, and that the
+    pricer serves the stored prices, computing the rows without a stored price.
+    """
+    option_pricer = OptionPricer(persistence)
+    uploader = OptionDataUploader(persistence, caches=[option_pricer.result_cache])
+    client = create_client({"POST /loadmarketdatajsoncolumnar": uploader.load_market_data_json_columnar,
+                            "GET /v2/calculateoptionprices/{date_as_of}/": option_pricer.calculate_market_prices_v2})
+
+    assert client.post("/loadmarketdatajsoncolumnar", json=columnar_market_data).json()["priced"] == 3
+    assert client.post("/loadmarketdatajsoncolumnar", json=columnar_market_data).json()["priced"] == 0
+    changed_row = {column: values[:1] for column, values in columnar_market_data.items()}
+    changed_row['ImpliedVol'] = [0.5]
+    assert client.post("/loadmarketdatajsoncolumnar", json=changed_row).json()["priced"] == 1
+
+    stored_data = persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))
+    expected_prices = B76OptionPricer(stored_data.copy()).calculate_option_prices()['OptionPrice']
+    np.testing.assert_allclose(stored_data['OptionPrice'], expected_prices)
+
+    # A stored price is served as it is, a missing one is computed.
+    persistence.update_records(BrentOptionData, (BrentOptionData.StrikePrice == 90.0,), {'OptionPrice': 1.0})
+    persistence.update_records(BrentOptionData, (BrentOptionData.StrikePrice == 80.0,), {'OptionPrice': None})
+    option_prices = {record['StrikePrice']: record['OptionPrice'] for record in client.get("/v2/calculateoptionprices/20230331/").json()}
+    assert option_prices[90.0] == 1.0
+    assert option_prices[80.0] == pytest.approx(expected_prices[stored_data['StrikePrice'] == 80.0].item())
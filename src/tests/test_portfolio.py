@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+import pandas as pd
+from api.portfolio import PortfolioAggregator
+from dbutil.dbschema import BrentOptionData
+from models.b76_greeks import B76GreeksCalculator
+from tests.helpers import create_client
+
+"""
+This module contains test cases for the PortfolioAggregator API class and the portfolio exposures.
+"""
+
+def test_portfolio_exposures(persistence):
+    """
+    Test case checking that the positions are joined to the priced chain and their exposures summed per expiry
+    and in total, with the contracts missing from the chain reported.
+    """
+    option_chain = pd.DataFrame({
+        "DateAsOf": [20220101] * 4,
+        "FutureExpiryDate": [20230130, 20230130, 20230228, 20230228],
+        "OptionType": ["Call", "Put", "Call", "Put"],
+        "StrikePrice": [50.0, 50.0, 55.0, 45.0],
+        "CurrentPrice": [48.0, 48.0, 50.0, 50.0],
+        "ImpliedVol": [0.3, 0.3, 0.25, 0.25]
+    })
+    persistence.add_records(BrentOptionData, option_chain)
+    aggregator = PortfolioAggregator(persistence)
+    client = create_client({"POST /loadpositions": aggregator.load_positions,
+                            "GET /portfolioexposure/{portfolio}/{date_as_of}": aggregator.calculate_portfolio_exposures})
+
+    positions = {"Portfolio": "Desk1", "FutureExpiryDate": [20230130, 20230228, 20230130, 20230228, 20230331],
+                 "OptionType": ["Call", "Put", "Call", "Call", "Put"], "StrikePrice": [50.0, 45.0, 50.0, 55.0, 60.0],
+                 "Quantity": [10.0, -5.0, 5.0, 2.0, 1.0]}
+    assert client.post("/loadpositions", json=positions).json()["inserted"] == 4
+    response = client.get("/portfolioexposure/Desk1/20220101").json()
+
+    greeks = B76GreeksCalculator(option_chain.copy()).calculate_option_greeks()
+    quantity = np.array([15.0, 0.0, 2.0, -5.0])
+    assert response["PerExpiry"]["FutureExpiryDate"] == [20230130, 20230228]
+    assert response["PerExpiry"]["Positions"] == [1, 2]
+    assert response["PerExpiry"]["MTM"][0] == pytest.approx(15.0 * greeks["OptionPrice"][0])
+    assert response["PerExpiry"]["DeltaExposure"][1] == pytest.approx(2.0 * greeks["Delta"][2] - 5.0 * greeks["Delta"][3])
+    assert response["Total"]["VegaExposure"] == pytest.approx((quantity * greeks["Vega"]).sum())
+    assert response["UnmatchedPositions"] == 1
+    assert response["UnpricedPositions"] == 0
+    assert response["Unmatched"]["FutureExpiryDate"] == [20230331]
+
+    # Loading a portfolio replaces its positions.
+    client.post("/loadpositions", json={**positions, "FutureExpiryDate": [20230130], "OptionType": ["Put"],
+                                        "StrikePrice": [50.0], "Quantity": [1.0]})
+    assert client.get("/portfolioexposure/Desk1/20220101").json()["Total"]["Positions"] == 1
+    assert client.get("/portfolioexposure/Desk2/20220101").status_code == 404
+    assert client.post("/loadpositions", json={**positions, "OptionType": ["Call"]}).status_code == 400
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import pandas as pd
+from models.b76_model import B76OptionPricer
+from models.bachelier_model import bachelier_price, bachelier_vol, normal_vol_from_lognormal_vol
+from models.baw_model import barone_adesi_whaley_price, _european_futures_price
+from models.model_registry import MODEL_COLUMN, calculate_option_prices, validate_model
+
+"""
+This module contains test cases for the Bachelier and Barone-Adesi and Whaley models and for the model registry
+in the models package.
+"""
+
+def test_bachelier_put_call_parity_and_negative_forwards():
+    """
+    Test case checking the Bachelier put-call parity, including negative futures and strikes, and the
+    at-the-money price D * sigma * sqrt(T / (2 * pi)).
+    """
+    F = np.array([-5.0, -1.0, 0.5, 40.0])
+    K = np.array([-4.0, 1.0, 0.5, 35.0])
+    sigma, T, r = 8.0, 0.75, 0.03
+    call_price = bachelier_price(F, K, sigma, T, r, True)
+    put_price = bachelier_price(F, K, sigma, T, r, False)
+
+    np.testing.assert_allclose(call_price - put_price, np.exp(-r * T) * (F - K), atol=1e-12)
+    assert call_price[2] == pytest.approx(np.exp(-r * T) * sigma * np.sqrt(T / (2.0 * np.pi)), rel=1e-12)
+
+def test_barone_adesi_whaley_bounds():
+    """
+    Test case checking that the American price is above the European and intrinsic values, equals the European
+    price without a positive rate, and is the intrinsic value for a deep in the money put.
+    """
+    F = np.array([100.0, 100.0, 90.0, 110.0, 50.0])
+    K = np.full(5, 100.0)
+    sigma, T = 0.3, 1.0
+    is_call = np.array([True, False, True, False, False])
+    american_price = barone_adesi_whaley_price(F, K, sigma, T, 0.08, is_call)
+    omega = np.where(is_call, 1.0, -1.0)
+    european_price = _european_futures_price(F, K, sigma, T, np.exp(-0.08 * T), omega)[0]
+
+    assert np.all(american_price >= european_price)
+    assert np.all(american_price >= np.maximum(omega * (F - K), 0.0))
+    assert american_price[4] == pytest.approx(50.0)
+    # Reference value of a 2000 steps binomial tree on the future is 11.2277, BAW is within 1%.
+    assert american_price[1] == pytest.approx(11.2277, rel=1e-2)
+    np.testing.assert_allclose(barone_adesi_whaley_price(F, K, sigma, T, 0.0, is_call),
+                               _european_futures_price(F, K, sigma, T, 1.0, omega)[0], rtol=1e-12)
+
+def test_bachelier_matches_black_76_near_the_money():
+    """
+    Test case checking that the Bachelier prices of the stored lognormal vols, converted to normal vols, are within
+    0.5% of the Black-76 prices near the money, and that the lognormal vols without a positive forward are not converted.
+    """
+    market_data = pd.DataFrame({
+        'DateAsOf': [20230331, 20230331, 20230331, 20230131, 20230131, 20221231],
+        'FutureExpiryDate': [20240131] * 6,
+        'OptionType': ['Call', 'Call', 'Put', 'Call', 'Put', 'Put'],
+        'StrikePrice': [80.0, 75.0, 70.0, 65.0, 60.0, 80.0],
+        'CurrentPrice': [75.0, 75.0, 75.0, 65.0, 65.0, 75.0],
+        'ImpliedVol': [0.74, 0.71, 0.76, 0.75, 0.74, 0.78]
+    })
+    black_76_price = calculate_option_prices(market_data.copy(), 'Black76')['OptionPrice'].to_numpy()
+    bachelier_price = calculate_option_prices(market_data.copy(), 'Bachelier')['OptionPrice'].to_numpy()
+
+    np.testing.assert_allclose(bachelier_price, black_76_price, rtol=5e-3)
+    assert np.isnan(normal_vol_from_lognormal_vol(np.array([-1.0, 1.0]), np.array([1.0, 0.0]), 0.5, 1.0)).all()
+
+def test_mixed_model_chain_is_priced_per_model():
+    """
+    Test case checking that the auto model prices the low forward rows with Bachelier and the other rows with
+    Black76, with the same prices as pricing each group on its own, and the negative forward with its NormalVol.
+    """
+    market_data = pd.DataFrame({
+        'DateAsOf': [20220101] * 4,
+        'FutureExpiryDate': [20230130] * 4,
+        'OptionType': ['Call', 'Put', 'Call', 'Put'],
+        'StrikePrice': [50.0, 1.0, 45.0, 0.5],
+        'CurrentPrice': [40.0, 0.8, 42.0, -0.5],
+        'ImpliedVol': [0.15, 0.6, 0.2, np.nan],
+        'NormalVol': [np.nan, np.nan, np.nan, 0.4]
+    })
+    option_prices = calculate_option_prices(market_data.copy(), 'auto', normal_forward_threshold=1.0)
+
+    assert option_prices[MODEL_COLUMN].tolist() == ['Black76', 'Bachelier', 'Black76', 'Bachelier']
+    black_76_rows = market_data.iloc[[0, 2]].reset_index(drop=True)
+    np.testing.assert_allclose(option_prices['OptionPrice'].to_numpy()[[0, 2]],
+                               B76OptionPricer(black_76_rows).calculate_option_prices()['OptionPrice'].to_numpy())
+    bachelier_rows = calculate_option_prices(market_data.iloc[[1, 3]].reset_index(drop=True), 'Bachelier')
+    np.testing.assert_allclose(option_prices['OptionPrice'].to_numpy()[[1, 3]], bachelier_rows['OptionPrice'].to_numpy())
+    assert (option_prices['OptionPrice'] > 0).all()
+    with pytest.raises(ValueError):
+        validate_model('Heston')
+
+def test_bachelier_needs_a_normal_vol_at_or_below_a_zero_price():
+    """
+    Test case checking that the NormalVol is priced as given, and that an option with a negative forward and
+    only a lognormal vol is rejected rather than left without a price.
+    """
+    normal_vol = bachelier_vol([-0.5, 40.0, 40.0], [0.5, 45.0, 45.0], [np.nan, 0.2, 0.2], [0.4, 7.0, np.nan], 0.75)
+
+    np.testing.assert_allclose(normal_vol[:2], [0.4, 7.0])
+    np.testing.assert_allclose(normal_vol[2], normal_vol_from_lognormal_vol(40.0, 45.0, 0.2, 0.75))
+    with pytest.raises(ValueError, match="no NormalVol"):
+        bachelier_vol([-0.5, 40.0], [0.5, 45.0], [0.5, 0.2], [np.nan, np.nan], 0.75)
@@ -0,0 +1,45 @@
+import io
+import json
+import pandas as pd
+import pyarrow as pa
+from api.response_formatter import DataFrameResponseFormatter
+
+"""
+This module contains test cases for the DataFrameResponseFormatter class in the api.response_formatter module.
+It checks that the JSON layouts are encoded once and that the Arrow and Parquet bodies round trip the DataFrame.
+"""
+
+sample_option_prices = pd.DataFrame({
+    'DateAsOf': [20230331, 20230331, 20230331],
+    'FutureExpiryDate': [20240131, 20240131, 20240131],
+    'OptionType': ['Call', 'Put', 'Call'],
+    'StrikePrice': [100.0, 90.0, 80.0],
+    'CurrentPrice': [75.0, 75.0, 75.0],
+    'ImpliedVol': [0.78, 0.76, 0.74],
+    'OptionPrice': [11.08, 20.5, 17.2]
+})
+
+def test_json_layouts_are_encoded_once():
+    """
+    Test case checking that chunked records and columnar bodies decode into the DataFrame in a single json.loads.
+    """
+    records = json.loads("".join(DataFrameResponseFormatter.iter_json_records(sample_option_prices, chunk_rows=2)))
+    columns = json.loads("".join(DataFrameResponseFormatter.iter_json_columns(sample_option_prices)))
+
+    pd.testing.assert_frame_equal(pd.DataFrame(records), sample_option_prices)
+    pd.testing.assert_frame_equal(pd.DataFrame(columns), sample_option_prices)
+
+def test_binary_responses_follow_the_accept_header():
+    """
+    Test case checking the content negotiation between JSON, Arrow IPC stream and Parquet.
+    """
+    assert DataFrameResponseFormatter.to_binary_response(sample_option_prices, None) is None
+    assert DataFrameResponseFormatter.to_binary_response(sample_option_prices, "application/json") is None
+
+    arrow_response = DataFrameResponseFormatter.to_binary_response(
+        sample_option_prices, "application/json;q=0.5, application/vnd.apache.arrow.stream")
+    assert arrow_response.media_type == "application/vnd.apache.arrow.stream"
+    pd.testing.assert_frame_equal(pa.ipc.open_stream(arrow_response.body).read_pandas(), sample_option_prices)
+
+    parquet_response = DataFrameResponseFormatter.to_binary_response(sample_option_prices, "application/vnd.apache.parquet")
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(parquet_response.body)), sample_option_prices)
@@ -0,0 +1,70 @@
+import pytest
+from util.result_cache import ResultCache
+
+"""
+This module contains test cases for the ResultCache class in the util.result_cache module.
+A fake clock is used to test the time to live without sleeping.
+"""
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_and_counters():
+    """
+    Test case checking that the least recently used entry is evicted and the counters are updated.
+    """
+    cache = ResultCache(max_entries=2, ttl_seconds=0)
+    cache.put(20230331, "a")
+    cache.put(20230401, "b")
+    assert cache.get(20230331) == "a"
+    cache.put(20230402, "c")
+
+    assert cache.get(20230401) is None
+    assert cache.get(20230331) == "a"
+    assert cache.get(20230402) == "c"
+    assert cache.stats() == {"size": 2, "max_entries": 2, "ttl_seconds": 0, "hits": 3, "misses": 1,
+                             "evictions": 1, "expirations": 0, "invalidations": 0}
+
+def test_ttl_expiry_and_invalidation():
+    """
+    Test case checking that entries expire after the time to live and that invalidated keys are removed.
+    """
+    clock = FakeClock()
+    cache = ResultCache(max_entries=8, ttl_seconds=10, clock=clock)
+    cache.put(20230331, "a")
+    cache.put(20230401, "b")
+
+    clock.now = 5.0
+    cache.invalidate([20230401, 20230402])
+    assert cache.get(20230331) == "a"
+    assert cache.get(20230401) is None
+
+    clock.now = 11.0
+    assert cache.get(20230331) is None
+    stats = cache.stats()
+    assert (stats["expirations"], stats["invalidations"], stats["size"]) == (1, 1, 0)
+
+def test_values_computed_before_an_invalidation_are_not_cached():
+    """
+    Test case checking that put drops the value when the key was invalidated or the cache cleared since the
+    generation was read, and keeps it otherwise.
+    """
+    cache = ResultCache(max_entries=8, ttl_seconds=0)
+    generation = cache.generation(20230331)
+    cache.invalidate([20230331])
+    cache.put(20230331, "stale", generation)
+    assert cache.get(20230331) is None
+
+    generation = cache.generation(20230331)
+    cache.invalidate([20230401])
+    cache.put(20230331, "a", generation)
+    assert cache.get(20230331) == "a"
+
+    generation = cache.generation(20230402)
+    cache.clear()
+    cache.put(20230402, "stale", generation)
+    assert cache.get(20230402) is None
@@ -0,0 +1,91 @@
+import json
+import pytest
+import numpy as np
+from api.scenario_pricer import ScenarioPricer
+from dbutil.dbschema import BrentOptionData
+from models.b76_model import B76OptionPricer
+from models.scenario_grid import TEMPORARIES_PER_GRID_POINT, calculate_scenario_pnl
+from tests.helpers import create_client, generate_option_chain
+
+"""
+This module contains test cases for the scenario grid revaluation and the ScenarioPricer API class.
+"""
+
+def test_chunked_scenario_pnl_matches_repricing():
+    """
+    Test case checking that the chunked broadcast revaluation gives the P&L of repricing shocked copies of the chain.
+    """
+    option_chain = generate_option_chain(300)
+    price_shocks, vol_shocks = [-0.1, 0.0, 0.2], [-0.05, 0.0, 0.1, 0.2]
+    # A bound of 7 options per chunk for the 12 scenarios.
+    max_memory_bytes = 7 * 12 * TEMPORARIES_PER_GRID_POINT * 8
+    scenario_pnl = calculate_scenario_pnl(option_chain, price_shocks, vol_shocks, per_option=True, max_memory_bytes=max_memory_bytes)
+
+    base_prices = B76OptionPricer(option_chain.copy()).calculate_option_prices()['OptionPrice']
+    assert scenario_pnl["BaseValue"] == pytest.approx(base_prices.sum())
+    for i, price_shock in enumerate(price_shocks):
+        for j, vol_shock in enumerate(vol_shocks):
+            shocked_chain = option_chain.assign(CurrentPrice=option_chain['CurrentPrice'] * (1.0 + price_shock),
+                                                ImpliedVol=option_chain['ImpliedVol'] + vol_shock)
+            option_pnl = B76OptionPricer(shocked_chain).calculate_option_prices()['OptionPrice'] - base_prices
+            np.testing.assert_allclose(scenario_pnl["PnL"][i, j], option_pnl, rtol=1e-5, atol=1e-5)
+            assert scenario_pnl["TotalPnL"][i, j] == pytest.approx(option_pnl.sum())
+    assert np.all(scenario_pnl["TotalPnL"][1, 1] == 0.0)
+    assert np.all(scenario_pnl["Unpriced"] == 0)
+
+    with pytest.raises(ValueError):
+        calculate_scenario_pnl(option_chain, price_shocks, vol_shocks, max_memory_bytes=1024)
+    with pytest.raises(ValueError):
+        calculate_scenario_pnl(option_chain, price_shocks, [-0.5, 0.0])
+
+def test_unpriced_options_are_counted_per_scenario():
+    """
+    Test case checking that the options without a price under a scenario are left out of its total P&L and counted.
+    """
+    option_chain = generate_option_chain(10)
+    # The settlement date of the first 3 options is before the DateAsOf, the expired options have no price.
+    option_chain.loc[:2, 'FutureExpiryDate'] = 20230430
+    with np.errstate(invalid='ignore'):
+        scenario_pnl = calculate_scenario_pnl(option_chain, [-0.1, 0.1], [0.0, 0.05])
+    priced_pnl = calculate_scenario_pnl(option_chain.iloc[3:], [-0.1, 0.1], [0.0, 0.05])
+
+    assert scenario_pnl["Unpriced"].tolist() == [[3, 3], [3, 3]]
+    np.testing.assert_allclose(scenario_pnl["TotalPnL"], priced_pnl["TotalPnL"])
+
+def test_scenario_endpoint(persistence):
+    """
+    Test case for the calculate_scenario_pnl endpoint, with and without the per option cube, and the 404 of a date
+    without option data.
+    """
+    persistence.add_records(BrentOptionData, generate_option_chain(20))
+    scenario_pricer = ScenarioPricer(persistence, max_memory_bytes=1 << 20)
+    client = create_client({"POST /scenariopnl/{date_as_of}": scenario_pricer.calculate_scenario_pnl})
+
+    grid = {"PriceShocks": [-0.1, 0.0, 0.1], "VolShocks": [0.0, 0.05]}
+    response = client.post("/scenariopnl/20230331", json=grid, params={"per_option": True}).json()
+    assert np.shape(response["TotalPnL"]) == (3, 2)
+    assert response["Unpriced"] == [[0, 0]] * 3
+    assert np.shape(response["PnL"]) == (3, 2, 20)
+    assert len(response["StrikePrice"]) == 20
+    assert "PnL" not in client.post("/scenariopnl/20230331", json=grid).json()
+    assert client.post("/scenariopnl/20230331", json={"PriceShocks": [], "VolShocks": [0.0]}).status_code == 400
+    assert client.post("/scenariopnl/20230331", json=grid, params={"model": "Heston"}).status_code == 400
+    assert client.post("/scenariopnl/20230401", json=grid).status_code == 404
+    big_grid = {"PriceShocks": list(np.linspace(-0.5, 0.5, 200)), "VolShocks": list(np.linspace(0.0, 0.5, 100))}
+    assert client.post("/scenariopnl/20230331", json=big_grid, params={"per_option": True}).status_code == 400
+
+def test_streamed_pnl_cube_is_the_whole_json_document():
+    """
+    Test case checking that the PnL cube streamed one scenario at a time parses to the rounded cube, with null for
+    the unpriced options.
+    """
+    pnl = np.arange(12, dtype=np.float32).reshape(2, 3, 2) / 3.0
+    pnl[1, 2, 0] = np.nan
+    chunks = list(ScenarioPricer.iter_pnl_cube_json({"DateAsOf": 20230331, "BaseValue": 1.5}, pnl))
+
+    document = json.loads("".join(chunks))
+    assert len(chunks) == 2 + pnl.shape[0] * (pnl.shape[1] + 1)
+    assert (document["DateAsOf"], document["BaseValue"]) == (20230331, 1.5)
+    assert document["PnL"][1][2][0] is None
+    expected_pnl = pnl.astype(np.float64).round(6)
+    np.testing.assert_array_equal(np.array(document["PnL"], dtype=np.float64), expected_pnl)
@@ -0,0 +1,54 @@
+import pytest
+import pandas as pd
+from sqlalchemy import text
+from dbutil.dbschema import BrentOptionData, get_optiondata_dbschmea
+from dbutil.optiondata_dao import DataPersistenceORM
+from dbutil.async_optiondata_dao import AsyncDataPersistence
+from dbutil.sqlite_profile import SQLitePerformanceProfile
+
+"""
+This module contains test cases for the SQLitePerformanceProfile class in the dbutil.sqlite_profile module.
+"""
+
+sample_market_data = pd.DataFrame({
+    'DateAsOf': [20230331, 20230331],
+    'FutureExpiryDate': [20240131, 20240131],
+    'OptionType': ['Call', 'Put'],
+    'StrikePrice': [100.0, 90.0],
+    'CurrentPrice': [75.0, 75.0],
+    'ImpliedVol': [0.78, 0.76]
+})
+
+expected_pragmas = {'journal_mode': 'wal', 'synchronous': 1, 'cache_size': -2048, 'busy_timeout': 1500}
+sqlite_profile = SQLitePerformanceProfile(cache_size=-2048, busy_timeout=1500, pool_size=2)
+
+def test_pragmas_are_set_and_readers_see_the_committed_snapshot(tmp_path):
+    """
+    Test case checking the pragmas of the pooled connections and that a read during an open upload
+    transaction returns the last committed rows without waiting for the lock.
+    """
+    persistence = DataPersistenceORM('sqlite:///' + str(tmp_path / 'optiondata.db'), sqlite_profile=sqlite_profile)
+    persistence.create_table(get_optiondata_dbschmea())
+    persistence.add_records(BrentOptionData, sample_market_data.head(1))
+    with persistence.engine.connect() as connection:
+        assert {pragma: connection.execute(text(f"PRAGMA {pragma}")).scalar() for pragma in expected_pragmas} == expected_pragmas
+
+    with persistence.engine.begin() as connection:
+        DataPersistenceORM._upsert_dataframe(connection, BrentOptionData, sample_market_data, chunk_size=10)
+        assert len(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))) == 1
+    assert len(persistence.fetch_records(BrentOptionData, (BrentOptionData.DateAsOf == 20230331,))) == 2
+    persistence.engine.dispose()
+
+@pytest.mark.asyncio
+async def test_pragmas_are_set_on_async_connections(tmp_path):
+    """
+    Test case checking the pragmas of the aiosqlite connections.
+    """
+    persistence = AsyncDataPersistence('sqlite+aiosqlite:///' + str(tmp_path / 'optiondata.db'), sqlite_profile=sqlite_profile)
+    async with persistence.engine.connect() as connection:
+        assert {pragma: (await connection.execute(text(f"PRAGMA {pragma}"))).scalar() for pragma in expected_pragmas} == expected_pragmas
+    await persistence.engine.dispose()
+
+def test_invalid_journal_mode_is_rejected():
+    with pytest.raises(ValueError):
+        SQLitePerformanceProfile(journal_mode='WAL; DROP TABLE brent_option_data')
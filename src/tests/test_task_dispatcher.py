@@ -0,0 +1,43 @@
+import os
+import asyncio
+import threading
+import pytest
+from util.task_dispatcher import TaskDispatcher
+
+"""
+This module contains test cases for the TaskDispatcher class in the util.task_dispatcher module.
+"""
+
+def current_thread_and_process(offset: int = 0) -> tuple:
+    return threading.get_ident(), os.getpid() + offset
+
+@pytest.mark.asyncio
+async def test_calls_run_inline_without_pools():
+    """
+    Test case checking that the calls run on the event loop thread when both pool sizes are 0.
+    """
+    dispatcher = TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+    assert await dispatcher.run_io(current_thread_and_process) == (threading.get_ident(), os.getpid())
+    assert await dispatcher.run_cpu(current_thread_and_process, offset=1) == (threading.get_ident(), os.getpid() + 1)
+
+@pytest.mark.asyncio
+async def test_calls_run_on_the_thread_and_process_pools():
+    """
+    Test case checking that run_io uses a worker thread, run_cpu a worker process, and that the event loop
+    stays free while a blocking call is running.
+    """
+    dispatcher = TaskDispatcher(io_pool_size=2, cpu_pool_size=1)
+    try:
+        io_thread, io_process = await dispatcher.run_io(current_thread_and_process)
+        assert io_thread != threading.get_ident() and io_process == os.getpid()
+        _, cpu_process = await dispatcher.run_cpu(current_thread_and_process)
+        assert cpu_process != os.getpid()
+
+        release_event = threading.Event()
+        blocked_call = asyncio.ensure_future(dispatcher.run_io(release_event.wait, 5))
+        await asyncio.sleep(0.01)
+        assert not blocked_call.done()
+        release_event.set()
+        assert await blocked_call is True
+    finally:
+        dispatcher.shutdown()
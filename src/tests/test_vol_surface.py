@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+import pandas as pd
+from api.vol_surface import VolSurfaceEvaluator
+from dbutil.dbschema import BrentOptionData
+from models.b76_model import time_to_maturity
+from models.vol_surface import VolSurface
+from tests.helpers import create_client
+
+"""
+This module contains test cases for the VolSurface model and the VolSurfaceEvaluator API class.
+"""
+
+def generate_smile_chain() -> pd.DataFrame:
+    """
+    Generates the calls and puts of two expiries with a smile in strike.
+    """
+    strikes = np.array([60.0, 70.0, 80.0, 90.0, 100.0])
+    option_chain = []
+    for expiry, forward, atm_vol in ((20230331, 80.0, 0.3), (20231231, 82.0, 0.25)):
+        for option_type in ('Call', 'Put'):
+            option_chain.append(pd.DataFrame({
+                'DateAsOf': 20230101, 'FutureExpiryDate': expiry, 'OptionType': option_type, 'StrikePrice': strikes,
+                'CurrentPrice': forward, 'ImpliedVol': atm_vol + 0.5 * np.log(strikes / forward) ** 2}))
+    return pd.concat(option_chain, ignore_index=True)
+
+def test_vol_surface_interpolation():
+    """
+    Test case checking that the surface goes through the stored points, interpolates the total variance
+    linearly in time at constant log-moneyness and keeps the nearest smile outside of the expiries.
+    """
+    option_chain = generate_smile_chain()
+    vol_surface = VolSurface.from_option_chain(option_chain)
+    T = time_to_maturity(option_chain['DateAsOf'], option_chain['FutureExpiryDate'])
+
+    np.testing.assert_allclose(vol_surface.implied_vols(option_chain['StrikePrice'], T), option_chain['ImpliedVol'], atol=1e-12)
+
+    T_short, T_long = vol_surface.times
+    T_middle = 0.5 * (T_short + T_long)
+    forward_middle = 81.0
+    K = forward_middle * np.exp(np.array([-0.1, 0.0, 0.1]))
+    short_vols = vol_surface.implied_vols(80.0 * K / forward_middle, T_short)
+    long_vols = vol_surface.implied_vols(82.0 * K / forward_middle, T_long)
+    expected_vols = np.sqrt((short_vols ** 2 * T_short + long_vols ** 2 * T_long) / 2.0 / T_middle)
+    np.testing.assert_allclose(vol_surface.implied_vols(K, T_middle), expected_vols, rtol=1e-12)
+
+    np.testing.assert_allclose(vol_surface.implied_vols(80.0, [T_short / 2.0, T_short]), [0.3, 0.3], atol=1e-12)
+    assert vol_surface.implied_vols(1000.0, T_long * 2.0) == pytest.approx(0.25 + 0.5 * np.log(100.0 / 82.0) ** 2)
+    assert np.isnan(vol_surface.implied_vols(80.0, 0.0))
+
+def test_vol_surface_endpoint_is_cached(persistence):
+    """
+    Test case for the evaluate_vol_surface endpoint: the surface is fitted once per date and unknown dates give 404.
+    """
+    persistence.add_records(BrentOptionData, generate_smile_chain())
+    evaluator = VolSurfaceEvaluator(persistence)
+    client = create_client({"POST /volsurface/{date_as_of}": evaluator.evaluate_vol_surface})
+
+    points = {"StrikePrice": [80.0, 80.0, -1.0], "TimeToMaturity": [0.05, 0.5, 0.5]}
+    response = client.post("/volsurface/20230101", json=points)
+    assert response.status_code == 200
+    assert response.json()["ImpliedVol"][0] == pytest.approx(0.3)
+    assert response.json()["ImpliedVol"][2] is None
+    client.post("/volsurface/20230101", json=points)
+    assert evaluator.surface_cache.stats()["hits"] == 1
+
+    assert client.post("/volsurface/20230102", json=points).status_code == 404
+    assert client.post("/volsurface/20230101", json={"StrikePrice": [80.0], "TimeToMaturity": []}).status_code == 400
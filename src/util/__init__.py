@@ -11,5 +11,7 @@ frequently used across all modules and packages. The following utility functions
 4. Converting a generic exception to HTTP exception to be used in API responses.
 
 5. A logger decarator functions for logging the info during various function executions. 
+
+6. A bounded LRU cache with a time to live for keeping calculated results per DateAsOf between requests.
     
 """
\ No newline at end of file
@@ -0,0 +1,102 @@
+import io
+import zlib
+import pandas as pd
+from typing import Iterator, List, Optional
+
+MAX_DECOMPRESSED_BYTES = 1 << 20
+
+class CsvChunkStreamReader:
+    """
+    Incremental CSV parser for request bodies received in pieces of arbitrary size.
+    The bytes are decompressed on the fly when the stream is gzip encoded, split on line boundaries and parsed
+    into DataFrames of at most chunk_rows rows, so the memory used does not depend on the size of the upload.
+    Quoted fields spanning several lines are not supported.
+
+    Attributes:
+    -----------
+    chunk_rows : int
+        Number of rows of every parsed chunk, except the last one.
+    gzip_compressed : bool
+        True when the fed bytes are gzip compressed.
+    dtype : dict
+        Optional column dtypes passed to pandas.read_csv, so every chunk gets the same column types.
+
+    Methods:
+    --------
+    feed(data: bytes) -> Iterator[pd.DataFrame]
+        Consumes the next piece of the stream and yields the chunks completed by it.
+    close() -> List[pd.DataFrame]
+        Flushes the remaining rows at the end of the stream.
+    """
+
+    def __init__(self, chunk_rows: int = 50000, gzip_compressed: bool = False, dtype: Optional[dict] = None):
+        self.chunk_rows = chunk_rows
+        self.gzip_compressed = gzip_compressed
+        self.dtype = dtype
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip_compressed else None
+        self._header = None
+        self._partial_line = b""
+        self._rows = []
+        self._row_count = 0
+
+    def feed(self, data: bytes) -> Iterator[pd.DataFrame]:
+        if self._decompressor is None:
+            yield from self._add_data(data)
+            return
+        # Decompress in bounded pieces, a small compressed piece can expand to a large amount of text.
+        while data:
+            try:
+                decompressed_data = self._decompressor.decompress(data, MAX_DECOMPRESSED_BYTES)
+            except zlib.error as err_msg:
+                raise ValueError(f"Invalid gzip stream: {err_msg}")
+            yield from self._add_data(decompressed_data)
+            data = self._decompressor.unconsumed_tail
+
+    def _add_data(self, data: bytes) -> List[pd.DataFrame]:
+        data = self._partial_line + data
+        last_line_end = data.rfind(b"\n")
+        if last_line_end < 0:
+            self._partial_line = data
+            return []
+        self._partial_line = data[last_line_end + 1:]
+        return self._add_lines(data[:last_line_end + 1])
+
+    def close(self) -> List[pd.DataFrame]:
+        lines = self._partial_line
+        if self._decompressor is not None:
+            lines += self._decompressor.flush()
+            if not self._decompressor.eof:
+                raise ValueError("Invalid gzip stream: the stream ended before the end of the compressed data.")
+        self._partial_line = b""
+        chunks = self._add_lines(lines if lines.endswith(b"\n") or not lines else lines + b"\n")
+        if self._row_count:
+            chunks.append(self._parse_rows())
+        return chunks
+
+    def _add_lines(self, lines: bytes) -> List[pd.DataFrame]:
+        if self._header is None and lines:
+            header_end = lines.index(b"\n") + 1
+            self._header = lines[:header_end]
+            lines = lines[header_end:]
+        chunks = []
+        row_count = lines.count(b"\n")
+        while self._row_count + row_count >= self.chunk_rows:
+            # Cut the lines after the row completing the current chunk.
+            cut = -1
+            for _ in range(self.chunk_rows - self._row_count):
+                cut = lines.index(b"\n", cut + 1)
+            self._rows.append(lines[:cut + 1])
+            self._row_count = self.chunk_rows
+            chunks.append(self._parse_rows())
+            lines = lines[cut + 1:]
+            row_count = lines.count(b"\n")
+        if row_count:
+            self._rows.append(lines)
+            self._row_count += row_count
+        return chunks
+
+    def _parse_rows(self) -> pd.DataFrame:
+        csv_bytes = self._header + b"".join(self._rows)
+        self._rows = []
+        self._row_count = 0
+        return pd.read_csv(io.BytesIO(csv_bytes), dtype=self.dtype, skip_blank_lines=True)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+import pandas as pd
+from fastapi import HTTPException
+from dbutil.dbschema import JobData, JobResultData
+from dbutil.optiondata_dao import DataPersistence
+from util.task_dispatcher import TaskDispatcher
+
+"""
+This module runs the long uploads and pricings as background jobs, so their requests return a job ID at once
+instead of holding the connection until the work is done.
+
+The jobs wait in an asyncio queue served by a fixed number of worker tasks on the event loop. The blocking work
+of a job still goes through the TaskDispatcher pools, so the workers only await it. The state of every job is
+kept in the JobData table and the results in the JobResultData table, so the status can be polled from any
+request and stays readable after a restart.
+"""
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# A job is a coroutine function called with the progress callback, report_progress(rows_processed, rows_total),
+# and returning the JSON document of its result.
+ProgressCallback = Callable[[int, Optional[int]], Awaitable[None]]
+Job = Callable[[ProgressCallback], Awaitable[str]]
+
+class JobQueue:
+    """
+    JobQueue class runs the submitted jobs on a pool of asyncio worker tasks and stores their state in the
+    JobData table and their result in the JobResultData table.
+
+    Attributes:
+    -----------
+    persistence : DataPersistence
+        An instance of the DataPersistence class for storing the job states.
+    worker_count : int
+        Number of jobs run at the same time.
+    max_queued_jobs : int
+        Number of jobs waiting for a worker, the submissions beyond it are rejected with a 503 until the queue drains.
+    result_ttl_seconds : float
+        Time the finished jobs are kept in the JobData table, 0 or less keeps them forever.
+    dispatcher : TaskDispatcher
+        Runs the database calls on the thread pool.
+
+    Methods:
+    --------
+    start() -> None
+        Starts the workers on the running event loop. The jobs left unfinished by a previous process are failed,
+        their inputs were only kept in memory.
+    stop() -> None
+        Cancels the workers. The jobs still queued are failed by the next start.
+    submit(job_type: str, job: Job) -> str
+        Stores the job as queued, adds it to the queue and returns its JobId. Raises a 503 when the queue is full.
+    fetch_job(job_id: str) -> Optional[dict]
+        Returns the stored state of the job, None for an unknown JobId.
+    fetch_job_result(job_id: str) -> Optional[str]
+        Returns the JSON document of the result of the job, None when the job has no result.
+    """
+
+    def __init__(self, persistence: DataPersistence, worker_count: int = 2, result_ttl_seconds: float = 86400,
+                 dispatcher: Optional[TaskDispatcher] = None, max_queued_jobs: int = 100):
+        self.persistence = persistence
+        self.worker_count = worker_count
+        self.max_queued_jobs = max_queued_jobs
+        self.result_ttl_seconds = result_ttl_seconds
+        self.dispatcher = dispatcher if dispatcher is not None else TaskDispatcher(io_pool_size=0, cpu_pool_size=0)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self.dispatcher.run_io(self.persistence.update_records, JobData,
+                                     (JobData.Status.in_([QUEUED, RUNNING]),),
+                                     {'Status': FAILED, 'Error': "The job was interrupted by a restart.", 'UpdatedAt': time.time()})
+        await self._delete_expired_jobs()
+        # The queue is bound to the event loop of the workers, it is created with them.
+        self._queue = asyncio.Queue(maxsize=self.max_queued_jobs)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, job_type: str, job: Job) -> str:
+        if not self._workers:
+            raise HTTPException(status_code=503, detail="The job queue is not running.")
+        if self._queue.full():
+            raise self._queue_full_error()
+        await self._delete_expired_jobs()
+        job_id = uuid.uuid4().hex
+        submitted_at = time.time()
+        job_state = pd.DataFrame([{'JobId': job_id, 'JobType': job_type, 'Status': QUEUED, 'RowsProcessed': 0,
+                                   'RowsTotal': None, 'Error': None,
+                                   'SubmittedAt': submitted_at, 'UpdatedAt': submitted_at}])
+        await self.dispatcher.run_io(self.persistence.upsert_records, JobData, job_state)
+        try:
+            self._queue.put_nowait((job_id, job))
+        except asyncio.QueueFull:
+            # The queue was filled by the submissions made while the job state was stored.
+            await self.dispatcher.run_io(self.persistence.delete_records, JobData, (JobData.JobId == job_id,))
+            raise self._queue_full_error()
+        return job_id
+
+    async def fetch_job(self, job_id: str) -> Optional[dict]:
+        job_states = await self.dispatcher.run_io(self.persistence.fetch_records, JobData, (JobData.JobId == job_id,))
+        if job_states.empty:
+            return None
+        # NaN is not valid JSON, the missing values, e.g. the RowsTotal of a job which has not counted its rows, are None.
+        job_state = job_states.astype(object).where(job_states.notna(), None).iloc[0].to_dict()
+        for column in ('RowsProcessed', 'RowsTotal'):
+            if job_state[column] is not None:
+                job_state[column] = int(job_state[column])
+        return job_state
+
+    async def fetch_job_result(self, job_id: str) -> Optional[str]:
+        job_results = await self.dispatcher.run_io(self.persistence.fetch_records, JobResultData,
+                                                   (JobResultData.JobId == job_id,))
+        return None if job_results.empty else job_results['Result'].iloc[0]
+
+    async def _work(self) -> None:
+        while True:
+            job_id, job = await self._queue.get()
+            try:
+                try:
+                    await self._update_job(job_id, Status=RUNNING)
+                    result = await job(lambda rows_processed, rows_total=None: self._report_progress(job_id, rows_processed, rows_total))
+                    # The result is stored first, a job reported as done always has its result.
+                    await self.dispatcher.run_io(self.persistence.upsert_records, JobResultData,
+                                                 pd.DataFrame({'JobId': [job_id], 'Result': [result]}))
+                    final_state = {'Status': DONE}
+                except HTTPException as e:
+                    final_state = {'Status': FAILED, 'Error': str(e.detail)}
+                except Exception as e:
+                    logger.exception(f"Job {job_id} failed")
+                    final_state = {'Status': FAILED, 'Error': str(e)}
+                # A failure to store the state must not stop the worker.
+                try:
+                    await self._update_job(job_id, **final_state)
+                except Exception:
+                    logger.exception(f"The state of the job {job_id} could not be stored")
+            finally:
+                self._queue.task_done()
+
+    def _queue_full_error(self) -> HTTPException:
+        return HTTPException(status_code=503, detail=f"The job queue is full, {self.max_queued_jobs} jobs are waiting. "
+                                                     f"Retry later.")
+
+    async def _report_progress(self, job_id: str, rows_processed: int, rows_total: Optional[int] = None) -> None:
+        progress = {'RowsProcessed': int(rows_processed)}
+        if rows_total is not None:
+            progress['RowsTotal'] = int(rows_total)
+        await self._update_job(job_id, **progress)
+
+    async def _update_job(self, job_id: str, **job_state) -> None:
+        await self.dispatcher.run_io(self.persistence.update_records, JobData, (JobData.JobId == job_id,),
+                                     {**job_state, 'UpdatedAt': time.time()})
+
+    async def _delete_expired_jobs(self) -> None:
+        if self.result_ttl_seconds <= 0:
+            return
+        query = (JobData.Status.in_([DONE, FAILED]), JobData.UpdatedAt < time.time() - self.result_ttl_seconds)
+        expired_jobs = await self.dispatcher.run_io(self.persistence.fetch_records, JobData, query)
+        if expired_jobs.empty:
+            return
+        expired_job_ids = expired_jobs['JobId'].tolist()
+        await self.dispatcher.run_io(self.persistence.delete_records, JobResultData, (JobResultData.JobId.in_(expired_job_ids),))
+        await self.dispatcher.run_io(self.persistence.delete_records, JobData, (JobData.JobId.in_(expired_job_ids),))
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+class ResultCache:
+    """
+    A bounded, thread safe LRU cache with a time to live, used to keep calculated results per DateAsOf
+    between requests. Entries are evicted when the cache is full (least recently used first) or when
+    they are older than the time to live. Writers invalidate the keys they change.
+
+    Every invalidation of a key bumps its generation. A reader computing a value reads the generation of the key
+    before fetching its inputs and passes it to put, so that a value computed from inputs changed in the meantime
+    is dropped instead of being cached.
+
+    Attributes:
+    -----------
+    max_entries : int
+        Maximum number of entries kept in the cache.
+    ttl_seconds : float
+        Time to live of an entry in seconds, 0 or less disables the expiry.
+
+    Methods:
+    --------
+    get(key) -> Optional[Any]
+        Returns the cached value for the key or None when it is missing or expired.
+    generation(key) -> int
+        Returns the invalidation generation of the key.
+    put(key, value, generation) -> None
+        Stores the value for the key, evicting the least recently used entries when the cache is full. The value is
+        dropped when the key was invalidated since the given generation was read.
+    invalidate(keys) -> None
+        Removes the given keys from the cache and bumps their generation.
+    clear() -> None
+        Removes all the entries from the cache.
+    stats() -> dict
+        Returns the hit, miss, eviction and invalidation counters with the current size.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl_seconds: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        # The generation of a key is the value of the counter at its last invalidation, or at the last clear.
+        self._generation_counter = 0
+        self._cleared_generation = 0
+        self._key_generations = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds > 0 and self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def generation(self, key: Hashable) -> int:
+        with self._lock:
+            return self._generation(key)
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self._generation_counter += 1
+            for key in keys:
+                self._key_generations[key] = self._generation_counter
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._generation_counter += 1
+            self._cleared_generation = self._generation_counter
+            self._key_generations.clear()
+
+    def _generation(self, key: Hashable) -> int:
+        return max(self._key_generations.get(key, 0), self._cleared_generation)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,61 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+class TaskDispatcher:
+    """
+    Execution layer running the blocking work of the API handlers outside of the asyncio event loop.
+    Persistence calls are dispatched to a bounded thread pool and pricing calculations to a process pool,
+    so a large request does not stop the event loop from serving the other requests.
+
+    Attributes:
+    -----------
+    io_pool_size : int
+        Number of threads running the blocking database calls. With 0 the calls run inline on the event loop.
+    cpu_pool_size : int
+        Number of worker processes running the pricing calculations. With 0 the calculations run on the
+        thread pool instead, or inline when there is no thread pool either.
+
+    Methods:
+    --------
+    run_io(function: Callable, *args, **kwargs) -> Any
+        Awaits the result of a blocking call run on the thread pool. Coroutine functions, e.g. the methods of
+        an async persistence, are awaited directly on the event loop.
+    run_cpu(function: Callable, *args, **kwargs) -> Any
+        Awaits the result of a calculation run on the process pool. The function, its arguments and its result
+        are pickled, so the function must be defined at module level or be a method of a picklable object.
+    shutdown(wait: bool) -> None
+        Shuts the pools down.
+    """
+
+    def __init__(self, io_pool_size: int = 8, cpu_pool_size: int = 0):
+        self.io_pool_size = io_pool_size
+        self.cpu_pool_size = cpu_pool_size
+        self._io_executor = ThreadPoolExecutor(max_workers=io_pool_size, thread_name_prefix="io-worker") \
+            if io_pool_size > 0 else None
+        # The workers are spawned rather than forked, forking a process running threads and open database
+        # connections is not safe. The processes are started on the first submitted calculation.
+        self._cpu_executor = ProcessPoolExecutor(max_workers=cpu_pool_size, mp_context=multiprocessing.get_context("spawn")) \
+            if cpu_pool_size > 0 else None
+
+    async def run_io(self, function: Callable, *args, **kwargs) -> Any:
+        if asyncio.iscoroutinefunction(function):
+            return await function(*args, **kwargs)
+        return await self._run(self._io_executor, function, *args, **kwargs)
+
+    async def run_cpu(self, function: Callable, *args, **kwargs) -> Any:
+        executor = self._cpu_executor if self._cpu_executor is not None else self._io_executor
+        return await self._run(executor, function, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        for executor in (self._io_executor, self._cpu_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+
+    @staticmethod
+    async def _run(executor: Optional[Executor], function: Callable, *args, **kwargs) -> Any:
+        if executor is None:
+            return function(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(function, *args, **kwargs))